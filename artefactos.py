@@ -0,0 +1,201 @@
+import json
+import os
+import shutil
+import uuid
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from etapas import en_lotes
+
+
+class EscritorParquet:
+    """
+    Escribe documentos (dicts, con campos anidados) en un archivo Parquet lote a lote, de
+    modo que en memoria solo está el lote que se escribe. Se usa como gestor de contexto.
+
+    Todos los lotes se escriben con el mismo esquema: el indicado o, si no se indica, el
+    deducido del primer lote. Con un esquema deducido, los campos que aparecen por primera
+    vez en lotes posteriores se ignoran, y un campo siempre vacío en el primer lote (tipo
+    nulo) no admite valores después; si los datos pueden tener esa forma, hay que pasar
+    el esquema.
+
+    Parámetros:
+        ruta (str): Archivo de salida.
+        esquema (pyarrow.Schema | None): Esquema de los documentos.
+    """
+
+    def __init__(self, ruta, esquema=None):
+        self.ruta = ruta
+        self.esquema = esquema
+        self.filas = 0
+        self._escritor = None
+
+    def escribir(self, documentos):
+        """Escribe un lote de documentos."""
+        documentos = list(documentos)
+        if not documentos:
+            return
+        try:
+            tabla = pa.Table.from_pylist(documentos, schema=self.esquema)
+        except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+            raise ValueError(f"Los documentos {self.filas}-{self.filas + len(documentos) - 1} no encajan en el esquema de {self.ruta}: {e}") from e
+        if self._escritor is None:
+            self.esquema = tabla.schema
+            self._escritor = pq.ParquetWriter(self.ruta, self.esquema)
+        self._escritor.write_table(tabla)
+        self.filas += tabla.num_rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if self._escritor is None:
+            # Sin documentos: un Parquet vacío, con el esquema si se conoce
+            pq.write_table((self.esquema or pa.schema([])).empty_table(), self.ruta)
+        else:
+            self._escritor.close()
+
+
+class Artefactos:
+    """
+    Almacén de los artefactos intermedios de la ingesta por etapas.
+
+    Cada etapa escribe sus salidas (Parquet para tablas y documentos, NPY para vectores)
+    en su propio subdirectorio y `estado.json` registra qué etapas de la ejecución actual
+    han terminado, junto con las versiones con las que se generaron los artefactos. Si las
+    versiones no coinciden con las actuales, los artefactos se consideran obsoletos.
+
+    Todas las escrituras se hacen en un archivo temporal que se renombra al terminar, de
+    modo que una etapa interrumpida nunca deja un artefacto a medias.
+
+    Parámetros:
+        directorio (str): Carpeta raíz de los artefactos.
+        versiones (dict[str, str]): Versiones que deben coincidir para reutilizar los artefactos.
+    """
+
+    def __init__(self, directorio, versiones):
+        self.directorio = directorio
+        self.versiones = dict(versiones)
+        self._ruta_estado = os.path.join(directorio, "estado.json")
+        self.estado = {}
+        if os.path.exists(self._ruta_estado):
+            with open(self._ruta_estado, encoding="utf-8") as f:
+                self.estado = json.load(f)
+        if self.estado.get("versiones") != self.versiones:
+            self.estado = {}
+
+    # ========= Estado de las etapas =========
+
+    @property
+    def completadas(self):
+        return list(self.estado.get("completadas", []))
+
+    def nueva_ejecucion(self):
+        """Empieza una ejecución nueva: se olvidan las etapas completadas y sus artefactos."""
+        for nombre in os.listdir(self.directorio) if os.path.isdir(self.directorio) else []:
+            ruta = os.path.join(self.directorio, nombre)
+            if os.path.isdir(ruta):
+                shutil.rmtree(ruta)
+        self.estado = {"ejecucion": uuid.uuid4().hex, "versiones": self.versiones, "completadas": []}
+        self._guardar_estado()
+
+    def completar(self, etapa):
+        completadas = [e for e in self.completadas if e != etapa] + [etapa]
+        self.estado["completadas"] = completadas
+        self._guardar_estado()
+
+    def invalidar(self, etapas):
+        """Marca como no completadas las etapas indicadas (sus artefactos se sobrescribirán)."""
+        self.estado["completadas"] = [e for e in self.completadas if e not in set(etapas)]
+        self._guardar_estado()
+
+    def _guardar_estado(self):
+        os.makedirs(self.directorio, exist_ok=True)
+        self._escribir_json_atomico(self._ruta_estado, self.estado)
+
+    # ========= Lectura / escritura =========
+
+    def ruta(self, etapa, nombre):
+        directorio = os.path.join(self.directorio, etapa)
+        os.makedirs(directorio, exist_ok=True)
+        return os.path.join(directorio, nombre)
+
+    @staticmethod
+    def _escribir_json_atomico(ruta, datos):
+        tmp = ruta + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(datos, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, ruta)
+
+    def escribir_json(self, etapa, nombre, datos):
+        self._escribir_json_atomico(self.ruta(etapa, f"{nombre}.json"), datos)
+
+    def leer_json(self, etapa, nombre):
+        with open(self.ruta(etapa, f"{nombre}.json"), encoding="utf-8") as f:
+            return json.load(f)
+
+    def escribir_tabla(self, etapa, nombre, df):
+        """Guarda un DataFrame como Parquet."""
+        ruta = self.ruta(etapa, f"{nombre}.parquet")
+        df.to_parquet(ruta + ".tmp", index=False)
+        os.replace(ruta + ".tmp", ruta)
+
+    def leer_tabla(self, etapa, nombre):
+        return pd.read_parquet(self.ruta(etapa, f"{nombre}.parquet"))
+
+    @contextmanager
+    def escritor_documentos(self, etapa, nombre, esquema=None):
+        """
+        Abre un `EscritorParquet` para guardar documentos por lotes a medida que llegan.
+        El artefacto solo se confirma si el bloque termina sin errores.
+        """
+        ruta = self.ruta(etapa, f"{nombre}.parquet")
+        try:
+            with EscritorParquet(ruta + ".tmp", esquema) as escritor:
+                yield escritor
+        except BaseException:
+            if os.path.exists(ruta + ".tmp"):
+                os.remove(ruta + ".tmp")
+            raise
+        os.replace(ruta + ".tmp", ruta)
+
+    def escribir_documentos(self, etapa, nombre, documentos, esquema=None, tam_lote=1000):
+        """
+        Guarda una secuencia de documentos (dicts, con campos anidados) como Parquet, lote
+        a lote. Retorna el número de documentos escritos.
+        """
+        with self.escritor_documentos(etapa, nombre, esquema) as escritor:
+            for lote in en_lotes(documentos, tam_lote):
+                escritor.escribir(lote)
+        return escritor.filas
+
+    def leer_documentos(self, etapa, nombre, tam_lote=256):
+        """Lee por lotes los documentos guardados con `escribir_documentos`."""
+        archivo = pq.ParquetFile(self.ruta(etapa, f"{nombre}.parquet"))
+        for batch in archivo.iter_batches(batch_size=tam_lote):
+            yield batch.to_pylist()
+
+    def contar_documentos(self, etapa, nombre):
+        return pq.ParquetFile(self.ruta(etapa, f"{nombre}.parquet")).metadata.num_rows
+
+    def crear_matriz(self, etapa, nombre, filas, columnas, dtype=np.float32):
+        """Crea un NPY mapeado en memoria para escribirlo por partes; se confirma con `confirmar_matriz`."""
+        ruta = self.ruta(etapa, f"{nombre}.npy")
+        return np.lib.format.open_memmap(ruta + ".tmp.npy", mode="w+", dtype=dtype, shape=(filas, columnas))
+
+    def confirmar_matriz(self, etapa, nombre, matriz):
+        ruta = self.ruta(etapa, f"{nombre}.npy")
+        matriz.flush()
+        os.replace(ruta + ".tmp.npy", ruta)
+
+    def escribir_matriz(self, etapa, nombre, matriz):
+        ruta = self.ruta(etapa, f"{nombre}.npy")
+        np.save(ruta + ".tmp.npy", matriz)
+        os.replace(ruta + ".tmp.npy", ruta)
+
+    def leer_matriz(self, etapa, nombre):
+        return np.load(self.ruta(etapa, f"{nombre}.npy"), mmap_mode="r")
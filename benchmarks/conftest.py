@@ -0,0 +1,25 @@
+import os
+import sys
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from guias_sinteticas import generar_guia  # noqa: E402
+
+# Tamaños de guía: una típica y una larga, con tablas de profesorado y bibliografía que
+# se extienden por varias páginas
+TAMANOS = {
+    "tipica": {"paginas": 8, "profesores": 4, "referencias": 12, "temas": 6},
+    "larga": {"paginas": 30, "profesores": 20, "referencias": 80, "temas": 15},
+}
+
+
+@pytest.fixture(scope="session", params=list(TAMANOS))
+def guia(request, tmp_path_factory):
+    """(ruta, datos) de una guía sintética de cada tamaño, generada una vez por sesión."""
+    ruta = str(tmp_path_factory.mktemp("guias") / f"guia_{request.param}.pdf")
+    datos = generar_guia(ruta, indice=len(request.param), **TAMANOS[request.param])
+    return ruta, datos
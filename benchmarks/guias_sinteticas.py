@@ -0,0 +1,223 @@
+"""
+Generador de guías docentes sintéticas con la misma estructura que las de la UPM.
+
+Cada PDF tiene portada e índice, la tabla clave/valor de "1.1. Datos de la asignatura",
+las tablas de profesorado y de recursos didácticos (que se extienden por varias páginas si
+son largas), las secciones numeradas que leen los extractores y un temario con subtemas.
+Las páginas llevan encabezado y pie dentro de los márgenes que recorta `ParsedGuide`.
+
+Uso:
+    python benchmarks/guias_sinteticas.py salida/ --guias 20 --paginas 12
+"""
+
+import argparse
+import os
+import random
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.platypus import PageBreak, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+PALABRAS = (
+    "datos sistemas modelo análisis diseño algoritmo red aprendizaje información proceso "
+    "gestión servicio arquitectura programación estructura evaluación método práctica "
+    "proyecto software calidad seguridad rendimiento consulta índice almacenamiento"
+).split()
+
+ESTILO_TABLA = TableStyle([
+    ("GRID", (0, 0), (-1, -1), 0.5, colors.black),
+    ("VALIGN", (0, 0), (-1, -1), "TOP"),
+    ("FONTSIZE", (0, 0), (-1, -1), 8),
+])
+
+
+def _frase(rng, n):
+    return " ".join(rng.choice(PALABRAS) for _ in range(n)).capitalize()
+
+
+def datos_guia(indice=0, profesores=4, referencias=12, temas=6, subtemas=3, semilla=None):
+    """
+    Datos de una guía sintética (los que después se escriben en el PDF), para poder
+    comprobar lo que devuelven los extractores.
+    """
+    rng = random.Random(indice if semilla is None else semilla)
+    id_asignatura = f"{105000000 + indice}"
+    return {
+        "id_asignatura": id_asignatura,
+        "nombre": f"Asignatura sintética {indice}",
+        "titulacion": ("61CI", "Grado en Ingeniería de Computadores"),
+        "escuela": ("61", "Escuela Técnica Superior de Ingeniería de Sistemas Informáticos"),
+        "profesores": [
+            (f"Profesor {i} {rng.choice(PALABRAS).capitalize()}", f"profesor{i}.{indice}@upm.es")
+            for i in range(profesores)
+        ],
+        "referencias": [f"{_frase(rng, 5)} ({2000 + i % 24})" for i in range(referencias)],
+        "competencias": [(f"CE{i + 1}", _frase(rng, 14)) for i in range(4)],
+        "descripcion": _frase(rng, 120),
+        "conocimientos_previos": ["Programación", "Estructuras de datos"],
+        "temario": [
+            (f"{t + 1}", _frase(rng, 4), [(f"{t + 1}.{s + 1}", _frase(rng, 5)) for s in range(subtemas)])
+            for t in range(temas)
+        ],
+    }
+
+
+def _encabezado_y_pie(datos):
+    def dibujar(canvas, doc):
+        canvas.saveState()
+        canvas.setFont("Helvetica", 8)
+        alto = A4[1]
+        canvas.drawString(40, alto - 30, "ETSI Sistemas Informáticos - Guía de aprendizaje")
+        canvas.drawString(40, 30, f"GA_{datos['titulacion'][0]}_{datos['id_asignatura']}")
+        canvas.drawRightString(A4[0] - 40, 30, f"Página {doc.page}")
+        canvas.restoreState()
+    return dibujar
+
+
+def _contenido(datos, estilos, paginas_relleno=0):
+    h1, h2, normal = estilos["Heading2"], estilos["Heading3"], estilos["Normal"]
+    celda = ParagraphStyle("celda", parent=normal, fontSize=8, leading=10)
+    p = lambda texto, estilo=normal: Paragraph(texto, estilo)
+    historia = []
+
+    # Portada e índice: el texto de las secciones empieza en la tercera página
+    historia += [p(f"{datos['id_asignatura']} - {datos['nombre']}", estilos["Title"]), p("Guía de aprendizaje"), PageBreak()]
+    historia += [p("Índice", h1), p("Datos descriptivos, profesorado, conocimientos previos, competencias, temario, cronograma, evaluación y recursos didácticos"), PageBreak()]
+
+    # 1. Datos descriptivos
+    historia += [p("1. Datos descriptivos", h1), p("1.1. Datos de la asignatura", h2)]
+    filas = [
+        ["Nombre de la asignatura", f"{datos['id_asignatura']} - {datos['nombre']}"],
+        ["No de créditos", "6 ECTS"],
+        ["Carácter", "Obligatoria"],
+        ["Curso", "2024-25"],
+        ["Semestre", "Quinto semestre"],
+        ["Período de impartición", "Septiembre-Enero"],
+        ["Idioma de impartición", "Castellano"],
+        ["Titulación", " - ".join(datos["titulacion"])],
+        ["Centro responsable de la\ntitulación", " - ".join(datos["escuela"])],
+    ]
+    historia += [Table(filas, colWidths=[150, 330], style=ESTILO_TABLA), Spacer(0, 12)]
+
+    # 2. Profesorado (tabla que continúa en las páginas siguientes si es larga)
+    historia += [p("2. Profesorado", h1), p("2.1. Profesorado implicado en la docencia", h2)]
+    filas = [["Nombre", "Despacho", "Correo electrónico", "Horario de tutorías"]]
+    filas += [[f"{nombre}\n(Coordinador)" if i == 0 else nombre, f"{1000 + i}", correo, "Consultar web"] for i, (nombre, correo) in enumerate(datos["profesores"])]
+    historia += [Table(filas, colWidths=[150, 60, 170, 100], style=ESTILO_TABLA), Spacer(0, 12)]
+
+    # 3. Conocimientos previos
+    historia += [
+        p("3. Conocimientos previos recomendados", h1),
+        p("3.1. Asignaturas previas que se recomienda haber cursado", h2),
+        *[p(f"- {a}") for a in datos["conocimientos_previos"]],
+        p("3.2. Otros conocimientos previos recomendados para cursar la asignatura", h2),
+        p("El plan de estudios no tiene definidos otros conocimientos previos para esta asignatura."),
+    ]
+
+    # 4. Competencias
+    historia += [p("4. Competencias y resultados de aprendizaje", h1), p("4.1. Competencias", h2)]
+    historia += [p(f"{codigo} - {texto}") for codigo, texto in datos["competencias"]]
+    historia += [p("4.2. Resultados del aprendizaje", h2), p(f"RA1 - {_frase(random.Random(0), 10)}")]
+
+    # 5. Descripción y temario
+    historia += [
+        p("5. Descripción de la asignatura y temario", h1),
+        p("5.1. Descripción de la asignatura", h2),
+        p(datos["descripcion"]),
+        p("5.2. Temario de la asignatura", h2),
+    ]
+    for numero, titulo, subtemas in datos["temario"]:
+        historia.append(p(f"{numero}. {titulo}"))
+        historia += [p(f"&nbsp;&nbsp;&nbsp;{n}. {t}") for n, t in subtemas]
+
+    # 6. Cronograma
+    historia += [p("6. Cronograma", h1), p("6.1. Cronograma de la asignatura", h2)]
+    filas = [["Sem", "Actividad presencial", "Tele-enseñanza", "Evaluación"]]
+    filas += [[str(s + 1), f"Tema {s % len(datos['temario']) + 1}", "", ""] for s in range(15)]
+    historia += [Table(filas, colWidths=[40, 200, 120, 120], style=ESTILO_TABLA)]
+
+    # 7. Evaluación, con el relleno que lleva la guía al número de páginas pedido
+    historia += [p("7. Actividades y criterios de evaluación", h1), p("7.1. Actividades de evaluación de la asignatura", h2)]
+    for _ in range(paginas_relleno):
+        historia += [p(_frase(random.Random(len(historia)), 300)), PageBreak()]
+
+    # 8. Recursos didácticos (tabla de bibliografía)
+    historia += [p("8. Recursos didácticos", h1), p("8.1. Recursos didácticos de la asignatura", h2)]
+    filas = [["Nombre", "Tipo", "Observaciones"]]
+    for i, referencia in enumerate(datos["referencias"]):
+        # Los nombres largos ocupan varias líneas de la celda, como en las guías reales
+        filas.append([Paragraph(referencia, celda), "Bibliografía", ""])
+        if i % 4 == 3:
+            filas.append([f"https://moodle.upm.es/recurso/{i}", "Recursos web", "Moodle"])
+    historia += [Table(filas, colWidths=[280, 90, 110], style=ESTILO_TABLA)]
+    return historia
+
+
+def generar_guia(ruta, paginas=None, **kwargs):
+    """
+    Escribe una guía sintética en `ruta`.
+
+    Parámetros:
+        ruta (str): Archivo PDF de salida.
+        paginas (int | None): Número de páginas mínimo; se alcanza añadiendo páginas de
+            texto en la sección de evaluación (sin tablas ni encabezados numerados).
+        **kwargs: Parámetros de `datos_guia` (indice, profesores, referencias, temas, subtemas).
+
+    Retorna:
+        dict: Los datos de la guía generada.
+    """
+    datos = datos_guia(**kwargs)
+    estilos = getSampleStyleSheet()
+    pie = _encabezado_y_pie(datos)
+
+    def construir(relleno):
+        doc = SimpleDocTemplate(ruta, pagesize=A4, topMargin=70, bottomMargin=70)
+        doc.build(_contenido(datos, estilos, relleno), onFirstPage=pie, onLaterPages=pie)
+        return doc.page
+
+    total = construir(0)
+    if paginas and total < paginas:
+        construir(paginas - total)
+    return datos
+
+
+def generar_guias(directorio, guias=10, paginas=None, **kwargs):
+    """Genera `guias` PDFs en `directorio` y devuelve sus rutas."""
+    os.makedirs(directorio, exist_ok=True)
+    rutas = []
+    for i in range(guias):
+        ruta = os.path.join(directorio, f"guia_sintetica_{i:04d}.pdf")
+        generar_guia(ruta, paginas=paginas, indice=i, **kwargs)
+        rutas.append(ruta)
+    return rutas
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Genera guías docentes sintéticas con la estructura de las de la UPM.")
+    parser.add_argument("directorio", help="Carpeta de salida.")
+    parser.add_argument("--guias", type=int, default=10, help="Número de guías.")
+    parser.add_argument("--paginas", type=int, default=None, help="Páginas mínimas por guía.")
+    parser.add_argument("--profesores", type=int, default=4, help="Filas de la tabla de profesorado.")
+    parser.add_argument("--referencias", type=int, default=12, help="Referencias bibliográficas.")
+    parser.add_argument("--temas", type=int, default=6, help="Temas del temario.")
+    parser.add_argument("--subtemas", type=int, default=3, help="Subtemas por tema.")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    rutas = generar_guias(
+        args.directorio,
+        args.guias,
+        paginas=args.paginas,
+        profesores=args.profesores,
+        referencias=args.referencias,
+        temas=args.temas,
+        subtemas=args.subtemas,
+    )
+    print(f"Guías generadas: {len(rutas)} en {args.directorio}")
+
+
+if __name__ == "__main__":
+    main()
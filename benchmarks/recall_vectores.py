@@ -0,0 +1,196 @@
+"""
+Compara el perfil de vectores float32 (el de siempre) con el perfil compacto (int8_hnsw y
+vectores fuera de `_source`) del índice de guías docentes.
+
+Crea dos índices de prueba con los mismos documentos y mide, por campo vectorial:
+
+- recall@k de la búsqueda kNN frente a los k vecinos exactos (coseno calculado con numpy),
+- latencia de `es_field_search` (p50, p95 y media, con el vector de consulta ya calculado),
+- tamaño del índice en disco y tamaño medio de una respuesta con `_source` completo.
+
+Los documentos se leen de un índice existente (con los vectores en `_source`) o de los
+artefactos de la ingesta por etapas. Sin `--consultas`, las consultas son los vectores de
+descripción de documentos elegidos al azar; con `--consultas` se codifican los textos del
+archivo (uno por línea) con el modelo de embeddings. Necesita Elasticsearch 8.12 o posterior.
+
+Uso:
+    python benchmarks/recall_vectores.py --origen artefactos --k 10 --salida recall.json
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+import numpy as np
+from elasticsearch import Elasticsearch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from artefactos import Artefactos  # noqa: E402
+from chatbot.core.es_search import es_field_search, knn_query  # noqa: E402
+from embeddings import CAMPOS_VECTOR, MODELO_EMBEDDINGS, ModeloPerezoso  # noqa: E402
+from escaneo import escanear  # noqa: E402
+from indexacion import IndexadorMasivo  # noqa: E402
+from pipeline import INDEX_NAME, VERSION_ARTEFACTOS, artefactos_dir, mapping_indice  # noqa: E402
+from utils import VERSION_EXTRACTOR  # noqa: E402
+
+
+def documentos_indice(es, indice):
+    """Documentos de un índice existente, con sus vectores."""
+    for doc in escanear(es, indice, excluir=None):
+        if not any(campo in doc for campo in CAMPOS_VECTOR):
+            raise SystemExit(f"El índice {indice} no guarda los vectores en _source; usa --origen artefactos")
+        yield doc
+
+
+def documentos_artefactos(directorio):
+    """Documentos reconstruidos a partir de los artefactos de las etapas extract y embed."""
+    artefactos = Artefactos(directorio, {
+        "artefactos": VERSION_ARTEFACTOS,
+        "extractor": VERSION_EXTRACTOR,
+        "modelo": MODELO_EMBEDDINGS,
+    })
+    vectores = {campo: artefactos.leer_matriz("embed", campo) for campo in CAMPOS_VECTOR}
+    presentes = {campo: artefactos.leer_matriz("embed", f"{campo}_presente") for campo in CAMPOS_VECTOR}
+    fila = 0
+    for lote in artefactos.leer_documentos("extract", "contenido"):
+        for doc in lote:
+            doc.pop("texto_competencias", None)
+            for campo in CAMPOS_VECTOR:
+                if presentes[campo][fila]:
+                    doc[campo] = np.asarray(vectores[campo][fila])
+            fila += 1
+            yield doc
+
+
+def crear_indice(es, nombre, mapping, documentos):
+    if es.indices.exists(index=nombre):
+        es.indices.delete(index=nombre)
+    es.indices.create(index=nombre, body=mapping)
+    with IndexadorMasivo(es, nombre) as indexador:
+        indexador.indexar(documentos)
+    # Un único segmento para que la latencia no dependa de cómo se hayan fusionado
+    es.indices.forcemerge(index=nombre, max_num_segments=1)
+    es.indices.refresh(index=nombre)
+
+
+def vecinos_exactos(matriz, ids, consulta, k):
+    """Ids de los k documentos más cercanos por coseno."""
+    normas = np.linalg.norm(matriz, axis=1) * np.linalg.norm(consulta)
+    similitud = matriz @ consulta / np.where(normas == 0, 1, normas)
+    return [ids[i] for i in np.argsort(-similitud)[:k]]
+
+
+def percentil(valores, p):
+    return round(float(np.percentile(valores, p)) * 1000, 2) if valores else None
+
+
+def medir(es, indice, campo, consultas, exactos, k, num_candidates):
+    recalls, latencias = [], []
+    for consulta, esperados in zip(consultas, exactos):
+        res = es.search(index=indice, knn=knn_query(campo, consulta.tolist(), k, num_candidates), size=k, _source=False)
+        obtenidos = {hit["_id"] for hit in res["hits"]["hits"]}
+        recalls.append(len(obtenidos & set(esperados)) / max(len(esperados), 1))
+
+        t0 = time.perf_counter()
+        es_field_search(es, indice, "", campo, hits_size=k, query_vector=consulta.tolist(), num_candidates=num_candidates)
+        latencias.append(time.perf_counter() - t0)
+    return {
+        "recall": round(float(np.mean(recalls)), 4) if recalls else None,
+        "latencia_p50_ms": percentil(latencias, 50),
+        "latencia_p95_ms": percentil(latencias, 95),
+        "latencia_media_ms": round(float(np.mean(latencias)) * 1000, 2) if latencias else None,
+    }
+
+
+def tamano_respuesta(es, indice, k):
+    """Bytes medios de una respuesta de búsqueda con `_source` completo."""
+    res = es.search(index=indice, size=k, query={"match_all": {}})
+    return len(json.dumps(res.body)) // max(len(res["hits"]["hits"]), 1)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Recall@k y latencia del perfil de vectores compacto frente al float.")
+    parser.add_argument("--es", default="http://localhost:9200", help="URL de Elasticsearch.")
+    parser.add_argument("--origen", choices=["indice", "artefactos"], default="indice", help="De dónde se leen los documentos.")
+    parser.add_argument("--indice", default=INDEX_NAME, help="Índice de origen (con --origen indice).")
+    parser.add_argument("--artefactos", default=artefactos_dir, help="Directorio de artefactos (con --origen artefactos).")
+    parser.add_argument("--prefijo", default=f"{INDEX_NAME}_bench", help="Prefijo de los índices de prueba.")
+    parser.add_argument("--consultas", default=None, help="Archivo con una consulta de texto por línea.")
+    parser.add_argument("--n-consultas", type=int, default=100, help="Consultas de muestra si no se da --consultas.")
+    parser.add_argument("--k", type=int, default=10, help="Vecinos evaluados (recall@k).")
+    parser.add_argument("--num-candidates", type=int, default=None, help="num_candidates de la búsqueda kNN.")
+    parser.add_argument("--hnsw-m", type=int, default=None, help="Parámetro m de HNSW de ambos índices.")
+    parser.add_argument("--hnsw-ef-construction", type=int, default=None, help="Parámetro ef_construction de ambos índices.")
+    parser.add_argument("--conservar", action="store_true", help="No borra los índices de prueba al terminar.")
+    parser.add_argument("--salida", default=None, help="Archivo JSON con los resultados.")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    es = Elasticsearch(args.es, request_timeout=120)
+
+    if args.origen == "indice":
+        documentos = list(documentos_indice(es, args.indice))
+    else:
+        documentos = list(documentos_artefactos(args.artefactos))
+    print(f"Documentos: {len(documentos)}")
+
+    # Matriz de cada campo con los documentos que lo tienen, para los vecinos exactos
+    matrices = {}
+    for campo in CAMPOS_VECTOR:
+        filas = [(str(d["id_asignatura"]), np.asarray(d[campo], dtype=np.float32)) for d in documentos if campo in d]
+        matrices[campo] = ([i for i, _ in filas], np.stack([v for _, v in filas]) if filas else np.zeros((0, 0)))
+
+    if args.consultas:
+        with open(args.consultas, encoding="utf-8") as f:
+            textos = [linea.strip() for linea in f if linea.strip()]
+        consultas = list(ModeloPerezoso(MODELO_EMBEDDINGS).encode(textos, convert_to_numpy=True).astype(np.float32))
+    else:
+        con_descripcion = [d for d in documentos if "descripcion_vector" in d]
+        muestra = random.Random(0).sample(con_descripcion, min(args.n_consultas, len(con_descripcion)))
+        consultas = [np.asarray(d["descripcion_vector"], dtype=np.float32) for d in muestra]
+    print(f"Consultas: {len(consultas)}")
+
+    perfiles = {
+        "float": mapping_indice(False, args.hnsw_m, args.hnsw_ef_construction),
+        "compacto": mapping_indice(True, args.hnsw_m, args.hnsw_ef_construction),
+    }
+    resultados = {}
+    try:
+        for perfil, mapping in perfiles.items():
+            indice = f"{args.prefijo}_{perfil}"
+            crear_indice(es, indice, mapping, (dict(d) for d in documentos))
+            stats = es.indices.stats(index=indice)["_all"]["primaries"]["store"]["size_in_bytes"]
+            resultados[perfil] = {
+                "tamano_indice_mb": round(stats / 1024 / 1024, 2),
+                "bytes_por_hit": tamano_respuesta(es, indice, args.k),
+                "campos": {},
+            }
+            for campo, (ids, matriz) in matrices.items():
+                if not ids:
+                    continue
+                exactos = [vecinos_exactos(matriz, ids, c, args.k) for c in consultas]
+                resultados[perfil]["campos"][campo] = medir(es, indice, campo, consultas, exactos, args.k, args.num_candidates)
+    finally:
+        if not args.conservar:
+            for perfil in perfiles:
+                es.indices.delete(index=f"{args.prefijo}_{perfil}", ignore_unavailable=True)
+
+    print(f"{'perfil':<10}{'campo':<30}{f'recall@{args.k}':>10}{'p50 ms':>9}{'p95 ms':>9}")
+    for perfil, resultado in resultados.items():
+        for campo, r in resultado["campos"].items():
+            print(f"{perfil:<10}{campo:<30}{r['recall']:>10}{r['latencia_p50_ms']:>9}{r['latencia_p95_ms']:>9}")
+        print(f"{perfil:<10}índice: {resultado['tamano_indice_mb']} MB, respuesta: {resultado['bytes_por_hit']} bytes/hit")
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump({"k": args.k, "consultas": len(consultas), "documentos": len(documentos), "perfiles": resultados}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""
+Servidores HTTP locales que imitan los servicios externos del pipeline, para probarlo sin
+red. Cada uno se usa como gestor de contexto y guarda las peticiones que recibe.
+"""
+
+import gzip
+import threading
+import time
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, urlparse
+
+
+class ServidorScholarLocal:
+    """
+    Servidor HTTP local que imita la página de resultados de Google Scholar, para probar el
+    resolutor sin red. Se usa como gestor de contexto y expone su URL en `url`.
+
+    Parámetros:
+        resultados (dict[str, dict] | None): Resultado por consulta ({"Titulo", "Autores",
+            "Enlace"}). Las consultas que no aparecen devuelven un resultado con su propio
+            texto como título, salvo que `sin_resultados` las incluya.
+        sin_resultados (set[str] | None): Consultas que devuelven una página sin resultados.
+        fallos (int): Número de primeras peticiones que se responden con `estado_fallo`.
+        estado_fallo (int): Estado HTTP de las respuestas fallidas (429, 503...).
+        retraso (float): Segundos de espera antes de responder cada petición.
+    """
+
+    def __init__(self, resultados=None, sin_resultados=None, fallos=0, estado_fallo=429, retraso=0.0):
+        self.resultados = resultados or {}
+        self.sin_resultados = set(sin_resultados or ())
+        self.fallos = fallos
+        self.estado_fallo = estado_fallo
+        self.retraso = retraso
+        self.peticiones = []
+        self._lock = threading.Lock()
+        self._servidor = None
+        self._hilo = None
+
+    def _pagina(self, consulta):
+        if consulta in self.sin_resultados:
+            return "<html><body><div id='gs_res_ccl_mid'></div></body></html>"
+        r = self.resultados.get(consulta) or {
+            "Titulo": consulta,
+            "Autores": "Autor A",
+            "Enlace": f"http://example.org/{quote(consulta)}",
+        }
+        return (
+            "<html><body><div id='gs_res_ccl_mid'>"
+            "<div class='gs_r gs_or gs_scl'><div class='gs_ri'>"
+            f"<h3 class='gs_rt'><span>[PDF]</span><a href='{escape(r['Enlace'])}'>{escape(r['Titulo'])}</a></h3>"
+            f"<div class='gs_a'>{escape(r['Autores'])} - Editorial, 2020 - example.org</div>"
+            "</div></div></div></body></html>"
+        )
+
+    def _manejador(self):
+        servidor = self
+
+        class Manejador(BaseHTTPRequestHandler):
+            def do_GET(self):
+                consulta = parse_qs(urlparse(self.path).query).get("q", [""])[0]
+                with servidor._lock:
+                    servidor.peticiones.append(consulta)
+                    fallar = len(servidor.peticiones) <= servidor.fallos
+                if servidor.retraso:
+                    time.sleep(servidor.retraso)
+                if fallar:
+                    self.send_response(servidor.estado_fallo)
+                    self.send_header("Retry-After", "0")
+                    self.end_headers()
+                    return
+                cuerpo = servidor._pagina(consulta).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(cuerpo)))
+                self.end_headers()
+                self.wfile.write(cuerpo)
+
+            def log_message(self, *args):
+                pass
+
+        return Manejador
+
+    @property
+    def url(self):
+        host, puerto = self._servidor.server_address[:2]
+        return f"http://{host}:{puerto}"
+
+    def __enter__(self):
+        self._servidor = ThreadingHTTPServer(("127.0.0.1", 0), self._manejador())
+        self._hilo = threading.Thread(target=self._servidor.serve_forever, daemon=True)
+        self._hilo.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+
+class ServidorGraphDBLocal:
+    """
+    Servidor HTTP local que imita el endpoint `statements` de GraphDB y guarda lo que
+    recibe, para probar el cargador sin GraphDB. Se usa como gestor de contexto.
+
+    Cada petición se guarda en `peticiones` como diccionario con "content_type",
+    "content_encoding", "bytes" (tamaño recibido) y "cuerpo" (texto descomprimido).
+
+    Parámetros:
+        fallos (int): Número de primeras peticiones que se responden con 503.
+    """
+
+    def __init__(self, fallos=0):
+        self.fallos = fallos
+        self.peticiones = []
+        self._recibidas = 0
+        self._lock = threading.Lock()
+        self._servidor = None
+
+    def _manejador(self):
+        servidor = self
+
+        class Manejador(BaseHTTPRequestHandler):
+            def do_POST(self):
+                datos = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with servidor._lock:
+                    servidor._recibidas += 1
+                    fallar = servidor._recibidas <= servidor.fallos
+                if fallar:
+                    self.send_response(503)
+                    self.end_headers()
+                    return
+                codificacion = self.headers.get("Content-Encoding")
+                cuerpo = gzip.decompress(datos) if codificacion == "gzip" else datos
+                with servidor._lock:
+                    servidor.peticiones.append({
+                        "ruta": self.path,
+                        "content_type": self.headers.get("Content-Type"),
+                        "content_encoding": codificacion,
+                        "bytes": len(datos),
+                        "cuerpo": cuerpo.decode("utf-8"),
+                    })
+                self.send_response(204)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        return Manejador
+
+    @property
+    def triples(self):
+        """Líneas recibidas en todas las peticiones aceptadas."""
+        return [l for p in self.peticiones for l in p["cuerpo"].splitlines() if l.strip()]
+
+    @property
+    def url(self):
+        host, puerto = self._servidor.server_address[:2]
+        return f"http://{host}:{puerto}/repositories/asignaturas/statements"
+
+    def __enter__(self):
+        self._servidor = ThreadingHTTPServer(("127.0.0.1", 0), self._manejador())
+        threading.Thread(target=self._servidor.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+
+class ServidorGuiasLocal:
+    """
+    Servidor HTTP local con una página de titulación que enlaza PDFs desde una tabla, para
+    probar el descargador sin red. Los PDFs llevan ETag y atienden Range con If-Range: un
+    rango que empieza más allá del final del archivo se responde con 416 y un cuerpo de relleno.
+
+    Cada petición se guarda en `peticiones` como (ruta, cabecera Range o None).
+
+    Parámetros:
+        archivos (dict[str, bytes]): Contenido de cada PDF por nombre de archivo.
+        etag (str): ETag de todos los PDFs.
+    """
+
+    def __init__(self, archivos, etag='"v1"'):
+        self.archivos = archivos
+        self.etag = etag
+        self.peticiones = []
+        self._lock = threading.Lock()
+        self._servidor = None
+
+    def _manejador(self):
+        servidor = self
+
+        class Manejador(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _responder(self, estado, cuerpo=b"", cabeceras=()):
+                self.send_response(estado)
+                for clave, valor in cabeceras:
+                    self.send_header(clave, valor)
+                self.send_header("Content-Length", str(len(cuerpo)))
+                self.end_headers()
+                self.wfile.write(cuerpo)
+
+            def do_GET(self):
+                rango = self.headers.get("Range")
+                with servidor._lock:
+                    servidor.peticiones.append((self.path, rango))
+                if self.path == "/":
+                    filas = "".join(f"<tr><td><a href='/{nombre}'>{nombre}</a></td></tr>" for nombre in servidor.archivos)
+                    return self._responder(200, f"<html><body><table>{filas}</table></body></html>".encode("utf-8"))
+
+                datos = servidor.archivos.get(self.path.lstrip("/"))
+                if datos is None:
+                    return self._responder(404)
+                cabeceras = [("ETag", servidor.etag)]
+                if self.headers.get("If-None-Match") == servidor.etag:
+                    return self._responder(304, cabeceras=cabeceras)
+                if rango and self.headers.get("If-Range", servidor.etag) == servidor.etag:
+                    inicio = int(rango.split("=")[1].rstrip("-"))
+                    if inicio >= len(datos):
+                        # Con un cuerpo grande aiohttp no libera la conexión hasta salir del bloque
+                        return self._responder(416, b" " * (1 << 20), [("Content-Range", f"bytes */{len(datos)}")])
+                    return self._responder(206, datos[inicio:], cabeceras + [("Content-Range", f"bytes {inicio}-{len(datos) - 1}/{len(datos)}")])
+                self._responder(200, datos, cabeceras)
+
+            def log_message(self, *args):
+                pass
+
+        return Manejador
+
+    @property
+    def url(self):
+        host, puerto = self._servidor.server_address[:2]
+        return f"http://{host}:{puerto}/"
+
+    def __enter__(self):
+        self._servidor = ThreadingHTTPServer(("127.0.0.1", 0), self._manejador())
+        threading.Thread(target=self._servidor.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._servidor.shutdown()
+        self._servidor.server_close()
@@ -0,0 +1,46 @@
+"""
+Pruebas de la escritura por lotes de documentos en Parquet (artefactos y exportación).
+"""
+
+import os
+
+import pyarrow.parquet as pq
+import pytest
+
+from artefactos import Artefactos
+from escaneo import exportar_parquet
+from pipeline import ESQUEMA_CONTENIDO, extraer_guia
+
+
+@pytest.fixture
+def artefactos(tmp_path):
+    return Artefactos(str(tmp_path), {})
+
+
+def test_contenido_con_esquema_fijo(artefactos, guia):
+    ruta, _ = guia
+    contenido = extraer_guia(ruta)["contenido"]
+    # El primer lote no tiene competencias ni temario: el esquema no depende de él
+    documentos = [dict(contenido, competencias=[], temario=[])] * 3 + [contenido] * 3
+
+    assert artefactos.escribir_documentos("extract", "contenido", documentos, ESQUEMA_CONTENIDO, tam_lote=3) == 6
+    leidos = [doc for lote in artefactos.leer_documentos("extract", "contenido", 4) for doc in lote]
+    assert leidos == documentos
+
+
+def test_error_no_deja_artefacto(artefactos):
+    def documentos():
+        yield {"id": "1"}
+        raise RuntimeError("fallo en la etapa")
+
+    with pytest.raises(RuntimeError):
+        artefactos.escribir_documentos("extract", "contenido", documentos(), tam_lote=1)
+    assert os.listdir(os.path.dirname(artefactos.ruta("extract", "x"))) == []
+
+
+def test_exportar_parquet(tmp_path):
+    ruta = str(tmp_path / "indice.parquet")
+    documentos = [{"id": str(i), "competencias": [{"codigo": "CG1", "texto": "x"}] if i % 2 else []} for i in range(2500)]
+    assert exportar_parquet(iter(documentos), ruta) == 2500
+    assert exportar_parquet(iter([]), str(tmp_path / "vacio.parquet")) == 0
+    assert pq.read_table(ruta).to_pylist() == documentos
@@ -0,0 +1,135 @@
+"""
+Pruebas de ResolutorBibliografia contra ServidorScholarLocal: reintentos ante 429 y 503,
+limitador de tasa y caché persistente de referencias sin resultados.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from bibliografia import CacheBibliografia, ResolutorBibliografia, TokenBucket
+from servidores_locales import ServidorScholarLocal
+
+
+@pytest.fixture
+def resolutores():
+    creados = []
+
+    def crear(servidor, **opciones):
+        opciones = {"tasa": 1000, "rafaga": 100, "concurrencia": 4, "espera_base": 0.01, "espera_max": 0.05, **opciones}
+        creados.append(ResolutorBibliografia(base_url=servidor.url, **opciones))
+        return creados[-1]
+
+    yield crear
+    for resolutor in creados:
+        resolutor.close()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = CacheBibliografia(str(tmp_path / "scholar.sqlite"))
+    yield cache
+    cache.close()
+
+
+def test_resuelve_referencias(resolutores):
+    resultados = {"Fundamentos de bases de datos": {"Titulo": "Fundamentos", "Autores": "Elmasri", "Enlace": "http://example.org/f"}}
+    with ServidorScholarLocal(resultados=resultados) as servidor:
+        resolutor = resolutores(servidor)
+        # Nombres con espacios distintos comparten una única consulta
+        resueltas = resolutor.resolver(["Fundamentos de  bases de datos", "Fundamentos de bases de datos"])
+
+    assert servidor.peticiones == ["Fundamentos de bases de datos"]
+    assert resueltas["Fundamentos de  bases de datos"] == {"Titulo": "Fundamentos", "Autores": "Elmasri", "Enlace": "http://example.org/f"}
+    assert resueltas["Fundamentos de bases de datos"] == resueltas["Fundamentos de  bases de datos"]
+
+
+@pytest.mark.parametrize("estado", [429, 503])
+def test_reintenta_ante_estados_reintentables(estado, resolutores):
+    with ServidorScholarLocal(fallos=2, estado_fallo=estado) as servidor:
+        resolutor = resolutores(servidor, concurrencia=1, reintentos=3)
+        resueltas = resolutor.resolver(["Libro A"])
+
+    assert resueltas["Libro A"]["Titulo"] == "Libro A"
+    assert servidor.peticiones == ["Libro A"] * 3
+    assert resolutor.stats()["reintentos"] == 2
+    assert resolutor.stats()["errores"] == 0
+
+
+def test_error_tras_agotar_reintentos_no_se_guarda(cache, resolutores):
+    with ServidorScholarLocal(fallos=10, estado_fallo=503) as servidor:
+        resolutor = resolutores(servidor, reintentos=2, cache=cache)
+        resueltas = resolutor.resolver(["Libro A"])
+
+    assert resueltas == {}
+    assert len(servidor.peticiones) == 3
+    assert resolutor.stats()["errores"] == 1
+    assert resolutor.stats()["fallidas"] == ["Libro A"]
+    assert len(cache) == 0
+
+
+def test_fallida_se_reintenta(resolutores):
+    with ServidorScholarLocal(fallos=1, estado_fallo=503) as servidor:
+        # Sin concurrencia la primera petición, la que falla, es la de "Libro A"
+        resolutor = resolutores(servidor, concurrencia=1, reintentos=0)
+        assert list(resolutor.resolver(["Libro  A", "Libro B"])) == ["Libro B"]
+        assert list(resolutor.fallidas) == ["Libro A"]
+
+        # La consulta fallida no quedó en caché: al pedirla otra vez se consulta y se resuelve
+        assert resolutor.resolver(["Libro  A"])["Libro  A"]["Titulo"] == "Libro A"
+        assert resolutor.fallidas == {}
+
+
+def test_no_encontrados_se_guardan_en_cache(cache, resolutores):
+    with ServidorScholarLocal(sin_resultados={"Apuntes de clase"}) as servidor:
+        primero = resolutores(servidor, cache=cache)
+        resueltas = primero.resolver(["Apuntes de clase", "Libro A"])
+        assert resueltas["Apuntes de clase"] == {}
+        assert primero.stats()["no_encontrados"] == 1
+
+        # Otra ejecución con la misma caché no vuelve a consultar ninguna de las dos
+        segundo = resolutores(servidor, cache=cache)
+        assert segundo.resolver(["Apuntes de clase", "Libro A"]) == resueltas
+
+    assert sorted(servidor.peticiones) == ["Apuntes de clase", "Libro A"]
+    assert segundo.stats()["consultas"] == 0
+    assert segundo.stats()["aciertos_cache"] == 2
+
+
+def test_limitador_de_tasa():
+    async def adquirir(limitador, n):
+        t0 = time.monotonic()
+        for _ in range(n):
+            await limitador.adquirir()
+        return time.monotonic() - t0
+
+    # Ráfaga de 2 y 20 peticiones/s: las 6 primeras tardan al menos (6 - 2) / 20 s
+    assert asyncio.run(adquirir(TokenBucket(20, capacidad=2), 6)) >= 0.19
+    assert asyncio.run(adquirir(TokenBucket(20, capacidad=6), 6)) < 0.05
+
+
+def test_resolutor_respeta_la_tasa(resolutores):
+    with ServidorScholarLocal() as servidor:
+        resolutor = resolutores(servidor, tasa=20, rafaga=1, concurrencia=8)
+        t0 = time.monotonic()
+        resueltas = resolutor.resolver([f"Libro {i}" for i in range(6)])
+        segundos = time.monotonic() - t0
+
+    assert len(resueltas) == 6
+    assert segundos >= 0.24
+    assert resolutor.stats()["segundos_espera"] > 0
+
+
+def test_limitador_y_sesion_entre_llamadas(resolutores):
+    with ServidorScholarLocal() as servidor:
+        resolutor = resolutores(servidor, tasa=20, rafaga=1, concurrencia=8)
+        t0 = time.monotonic()
+        resolutor.resolver([f"Libro {i}" for i in range(3)])
+        sesion = resolutor._session
+        # El segundo lote espera al limitador del primero en vez de empezar con la ráfaga llena
+        resolutor.resolver([f"Libro {i}" for i in range(3, 6)])
+        segundos = time.monotonic() - t0
+
+    assert resolutor._session is sesion
+    assert segundos >= 0.24
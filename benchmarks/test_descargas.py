@@ -0,0 +1,60 @@
+"""
+Pruebas de DescargadorGuias contra ServidorGuiasLocal: descarga, GET condicional y
+reanudación con Range, incluido un `.part` que ya no corresponde al archivo (416).
+"""
+
+import json
+import os
+
+import pytest
+
+from descargas import ARCHIVO_ESTADO, DESCARGADO, REANUDADO, SIN_CAMBIOS, DescargadorGuias
+from servidores_locales import ServidorGuiasLocal
+
+PDF = b"%PDF-1.4 " + bytes(range(256)) * 4
+
+
+@pytest.fixture
+def descargas(tmp_path):
+    # Una sola conexión en el pool y sin reintentos: una petición que la retenga mientras
+    # hace otra agota el timeout y la descarga falla
+    return DescargadorGuias(str(tmp_path), por_host=1, concurrencia=1, reintentos=0, timeout=5.0)
+
+
+def _parcial(descargador, nombre, datos, etag='"v1"'):
+    with open(os.path.join(descargador.directorio, nombre + ".part"), "wb") as f:
+        f.write(datos)
+    descargador.estado[nombre] = {"url": "", "etag": etag, "last_modified": None}
+    descargador.guardar_estado()
+
+
+def test_descarga_y_get_condicional(descargas):
+    with ServidorGuiasLocal({"a.pdf": PDF}) as servidor:
+        assert descargas.descargar([servidor.url]) == {"a.pdf": DESCARGADO}
+        assert descargas.descargar([servidor.url]) == {"a.pdf": SIN_CAMBIOS}
+
+    with open(os.path.join(descargas.directorio, "a.pdf"), "rb") as f:
+        assert f.read() == PDF
+
+
+def test_reanuda_con_range(descargas):
+    _parcial(descargas, "a.pdf", PDF[:100])
+    with ServidorGuiasLocal({"a.pdf": PDF}) as servidor:
+        assert descargas.descargar([servidor.url]) == {"a.pdf": REANUDADO}
+
+    assert ("/a.pdf", "bytes=100-") in servidor.peticiones
+    with open(os.path.join(descargas.directorio, "a.pdf"), "rb") as f:
+        assert f.read() == PDF
+
+
+def test_parcial_invalido_descarga_completa(descargas):
+    # El .part es más largo que el archivo del servidor: el Range recibe un 416
+    _parcial(descargas, "a.pdf", PDF + b"sobrante")
+    with ServidorGuiasLocal({"a.pdf": PDF}) as servidor:
+        assert descargas.descargar([servidor.url]) == {"a.pdf": DESCARGADO}
+
+    assert [p for p in servidor.peticiones if p[0] == "/a.pdf"] == [("/a.pdf", f"bytes={len(PDF) + 8}-"), ("/a.pdf", None)]
+    with open(os.path.join(descargas.directorio, "a.pdf"), "rb") as f:
+        assert f.read() == PDF
+    with open(os.path.join(descargas.directorio, ARCHIVO_ESTADO), encoding="utf-8") as f:
+        assert json.load(f)["a.pdf"]["etag"] == '"v1"'
@@ -0,0 +1,71 @@
+"""
+Ejecuta SQL_GET_DOSSIER sobre el esquema de tables.py (en SQLite, creado con
+`Base.metadata.create_all`) para detectar columnas o uniones que no existen.
+
+Las funciones JSON de PostgreSQL se traducen a sus equivalentes de SQLite y se quitan las
+conversiones `::tipo` y el ORDER BY dentro de los agregados, que SQLite 3.40 no admite;
+las tablas, columnas y uniones son las de la consulta real.
+"""
+
+import json
+import re
+
+import pytest
+from sqlalchemy import create_engine, insert, text
+
+import tables
+from chatbot.core.sql import SQL_GET_DOSSIER
+
+
+def _a_sqlite(sql):
+    sql = re.sub(r"::\w+", "", sql)
+    sql = re.sub(r"\s+ORDER BY [\w.]+(?=\s*\))", "", sql)
+    return sql.replace("json_agg(", "json_group_array(").replace("json_build_object(", "json_object(")
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    tables.Base.metadata.create_all(engine)
+    t = tables.Base.metadata.tables
+    with engine.begin() as conn:
+        conn.execute(insert(t["escuelas"]), [{"id": 61, "nombre": "ETSISI", "entidad_dbpedia": "-"}])
+        conn.execute(insert(t["titulaciones"]), [{"id": "61CI", "nombre": "Grado en Computadores", "tipo_estudio": "Grado"}])
+        conn.execute(insert(t["titulacionesescuelas"]), [{"titulacion_id": "61CI", "escuela_id": 61}])
+        conn.execute(insert(t["asignaturas"]), [{
+            "id": 615000237, "nombre": "Bases de Datos", "numero_creditos": 6, "agno_academico": "2024-25",
+            "semestre": "Quinto semestre", "idioma": "Castellano", "titulacion_id": "61CI",
+        }])
+        conn.execute(insert(t["titulacionesasignaturas"]), [{"titulacion_id": "61CI", "asignatura_id": 615000237}])
+        conn.execute(insert(t["profesores"]), [
+            {"id": 1, "nombre": "Ana", "correo_electronico": "ana@upm.es", "escuela_id": 61},
+            {"id": 2, "nombre": "Luis", "correo_electronico": "luis@upm.es", "escuela_id": 61},
+        ])
+        conn.execute(insert(t["profesoresasignaturas"]), [
+            {"profesor_id": 1, "asignatura_id": 615000237},
+            {"profesor_id": 2, "asignatura_id": 615000237},
+        ])
+        conn.execute(insert(t["bibliografias"]), [{"id": 1, "titulo": "Fundamentos", "autores": "Elmasri", "direccion_url": ""}])
+        conn.execute(insert(t["bibliografiaasignaturas"]), [{"asignatura_id": 615000237, "bibliografia_id": 1}])
+    return engine
+
+
+def _dossier(engine, asig_id):
+    with engine.begin() as conn:
+        fila = conn.execute(text(_a_sqlite(SQL_GET_DOSSIER.text)), {"id": asig_id}).mappings().first()
+    return {k: json.loads(v) if isinstance(v, str) else v for k, v in fila.items()}
+
+
+def test_dossier_completo(engine):
+    dossier = _dossier(engine, "615000237")
+    assert dossier["meta"]["nombre"] == "Bases de Datos"
+    assert sorted(p["correo"] for p in dossier["profes"]) == ["ana@upm.es", "luis@upm.es"]
+    assert dossier["biblio"] == [{"titulo": "Fundamentos", "autores": "Elmasri", "direccion_url": ""}]
+    assert dossier["titulacion"] == [{"nombre": "Grado en Computadores", "tipo_estudio": "Grado"}]
+    assert dossier["escuela"] == [{"nombre": "ETSISI"}]
+
+
+def test_dossier_asignatura_inexistente(engine):
+    dossier = _dossier(engine, "999999999")
+    assert dossier["meta"] is None
+    assert dossier["profes"] == dossier["biblio"] == dossier["escuela"] == []
@@ -0,0 +1,64 @@
+"""
+Pruebas de EmbeddingCache: escritura por lotes, lectura y reutilización de las filas
+liberadas por los desalojos.
+"""
+
+import numpy as np
+import pytest
+
+from chatbot.core.embedding_cache import EmbeddingCache
+
+DIM = 8
+
+
+def _vectores(n, desde=0):
+    return np.arange(desde * DIM, (desde + n) * DIM, dtype=np.float32).reshape(n, DIM)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "modelo", dim=DIM, max_entradas=2000)
+    yield cache
+    cache.close()
+
+
+def test_lote_grande_una_ampliacion(cache, monkeypatch):
+    textos = [f"texto {i}" for i in range(1500)]
+    vectores = _vectores(1500)
+    llamadas = []
+    mapear = cache._mapear
+    monkeypatch.setattr(cache, "_mapear", lambda filas_min=0: llamadas.append(filas_min) or mapear(filas_min))
+
+    cache.put_many(textos, vectores)
+
+    assert llamadas == [1500]
+    assert np.array_equal(np.vstack(cache.get_many(textos)), vectores)
+    assert cache.stats()["entradas"] == 1500
+
+
+def test_no_sobrescribe_existentes(cache):
+    cache.put_many(["a", "b"], _vectores(2))
+    cache.put_many(["b", "c"], _vectores(2, desde=10))
+
+    a, b, c = cache.get_many(["a", "b", "c"])
+    assert np.array_equal(b, _vectores(2)[1])
+    assert np.array_equal(c, _vectores(2, desde=10)[1])
+    assert cache.stats()["entradas"] == 3
+
+
+def test_desalojo_reutiliza_filas(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "modelo", dim=DIM, max_entradas=4)
+    try:
+        cache.put_many([f"viejo {i}" for i in range(4)], _vectores(4))
+        cache.get_many(["viejo 2", "viejo 3"])
+        cache.put_many(["nuevo 0", "nuevo 1"], _vectores(2, desde=4))
+        # Los dos menos usados salen; sus filas se reutilizan en el siguiente lote
+        assert cache.get_many(["viejo 0", "viejo 1"]) == [None, None]
+        cache.put_many(["nuevo 2", "nuevo 3"], _vectores(2, desde=6))
+
+        textos = ["nuevo 0", "nuevo 1", "nuevo 2", "nuevo 3"]
+        assert np.array_equal(np.vstack(cache.get_many(textos)), _vectores(4, desde=4))
+        assert cache.stats()["desalojos"] == 4
+        assert cache._vectores.shape[0] == 1024
+    finally:
+        cache.close()
@@ -0,0 +1,88 @@
+"""
+Comprueba que `buscarTablaCombinada`, que solo extrae tablas de las páginas candidatas
+según la capa de texto, da lo mismo que recorrer las tablas de todas las páginas (la
+implementación anterior, copiada aquí como referencia) en las guías sintéticas.
+"""
+
+import pytest
+
+import utils
+from utils import ParsedGuide, hasTargetHeaders, scrapBibliography, scrapProfesores
+
+ENCABEZADOS_PROFESORES = {"nombre", "correo electrónico"}
+ENCABEZADOS_BIBLIOGRAFIA = {"nombre", "tipo", "observaciones"}
+
+
+def _buscar_tabla_todas_las_paginas(guia, encabezados_objetivo):
+    # Implementación de referencia: tablas de todas las páginas, sin prepaso de texto
+    tabla_encontrada = None
+    indice_pagina = -1
+    indice_tabla = -1
+
+    for i in range(len(guia)):
+        for j, tabla in enumerate(guia.tablas(i)):
+            if hasTargetHeaders(tabla, encabezados_objetivo):
+                tabla_encontrada = tabla
+                indice_pagina = i
+                indice_tabla = j
+                break
+        if tabla_encontrada:
+            break
+
+    if not tabla_encontrada:
+        return None
+
+    filas_combinadas = list(tabla_encontrada)
+    pagina_actual = indice_pagina
+
+    while True:
+        if indice_tabla != len(guia.tablas(pagina_actual)) - 1:
+            break
+        if pagina_actual + 1 >= len(guia):
+            break
+        tablas_pag_siguiente = guia.tablas(pagina_actual + 1)
+        if not tablas_pag_siguiente:
+            break
+        primera_tabla_siguiente = tablas_pag_siguiente[0]
+        if hasTargetHeaders(primera_tabla_siguiente, encabezados_objetivo):
+            break
+        filas_combinadas.extend(primera_tabla_siguiente)
+        pagina_actual += 1
+        indice_tabla = 0
+
+    return filas_combinadas
+
+
+@pytest.mark.parametrize("encabezados", [ENCABEZADOS_PROFESORES, ENCABEZADOS_BIBLIOGRAFIA])
+def test_tabla_combinada_igual_que_recorrido_completo(guia, encabezados):
+    ruta, _ = guia
+    with ParsedGuide(ruta) as g:
+        esperado = _buscar_tabla_todas_las_paginas(g, encabezados)
+    with ParsedGuide(ruta) as g:
+        assert utils.buscarTablaCombinada(g, encabezados) == esperado
+    assert esperado
+
+
+@pytest.mark.parametrize(
+    "scraper, encabezados",
+    [(scrapProfesores, ENCABEZADOS_PROFESORES), (scrapBibliography, ENCABEZADOS_BIBLIOGRAFIA)],
+)
+def test_scrapers_igual_que_recorrido_completo(guia, monkeypatch, scraper, encabezados):
+    ruta, _ = guia
+    df = scraper(ruta, encabezados)
+    with monkeypatch.context() as m:
+        m.setattr(utils, "buscarTablaCombinada", _buscar_tabla_todas_las_paginas)
+        esperado = scraper(ruta, encabezados)
+    assert not df.empty
+    assert df.equals(esperado)
+
+
+def test_sin_paginas_candidatas_recorre_todas(guia, monkeypatch):
+    # Sin capa de texto útil ninguna página es candidata: se recorren todas las páginas
+    ruta, _ = guia
+    monkeypatch.setattr(ParsedGuide, "posicion_encabezados", lambda self, i, encabezados: None)
+    with ParsedGuide(ruta) as g:
+        esperado = _buscar_tabla_todas_las_paginas(g, ENCABEZADOS_PROFESORES)
+    with ParsedGuide(ruta) as g:
+        assert utils.buscarTablaCombinada(g, ENCABEZADOS_PROFESORES) == esperado
+    assert esperado
@@ -0,0 +1,90 @@
+"""
+Benchmarks de las funciones de extracción sobre guías sintéticas (ver `guias_sinteticas.py`).
+
+    pytest benchmarks --benchmark-autosave
+    pytest benchmarks --benchmark-compare --benchmark-compare-fail=mean:15%
+
+Con `--benchmark-autosave` cada ejecución se guarda en `.benchmarks/`; al preparar una
+versión se compara con la anterior para detectar regresiones. Cada benchmark anota en
+`extra_info` las páginas de la guía, de modo que el informe permite calcular páginas/s.
+"""
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from pipeline import extraer_guia  # noqa: E402
+from utils import (  # noqa: E402
+    ParsedGuide,
+    estructurar_temario,
+    extract_asignatura,
+    extraer_seccion,
+    extraer_temario_asignatura,
+    scrapBibliography,
+    scrapProfesores,
+)
+
+
+def _paginas(ruta):
+    with ParsedGuide(ruta) as g:
+        return len(g)
+
+
+def test_extract_asignatura(benchmark, guia):
+    ruta, datos = guia
+    benchmark.extra_info["paginas"] = _paginas(ruta)
+    df = benchmark(extract_asignatura, ruta)
+    assert df["Nombre de la asignatura"].values[0] == f"{datos['id_asignatura']} - {datos['nombre']}"
+
+
+def test_scrap_profesores(benchmark, guia):
+    ruta, datos = guia
+    benchmark.extra_info["paginas"] = _paginas(ruta)
+    df = benchmark(scrapProfesores, ruta, {"nombre", "correo electrónico"})
+    correos = {correo for _, correo in datos["profesores"]}
+    assert correos <= set(df["Correo electrónico"])
+
+
+def test_scrap_bibliography(benchmark, guia):
+    ruta, datos = guia
+    benchmark.extra_info["paginas"] = _paginas(ruta)
+    df = benchmark(scrapBibliography, ruta, {"nombre", "tipo", "observaciones"})
+    assert len(df) == len(datos["referencias"])
+
+
+def test_extraer_seccion(benchmark, guia):
+    ruta, datos = guia
+    benchmark.extra_info["paginas"] = _paginas(ruta)
+    texto = benchmark(
+        extraer_seccion,
+        ruta,
+        titulo="Descripción de la asignatura y temario",
+        inicio="Descripción de la asignatura",
+        fin="Temario de la asignatura",
+    )
+    assert texto.split()[:3] == datos["descripcion"].split()[:3]
+
+
+def test_extraer_seccion_guia_analizada(benchmark, guia):
+    # Con la guía ya abierta solo se mide la búsqueda en el índice de secciones
+    ruta, _ = guia
+    with ParsedGuide(ruta) as g:
+        g.indice_secciones()
+        texto = benchmark(extraer_seccion, g, "Competencias y resultados de aprendizaje", "Competencias", "Resultados del aprendizaje")
+    assert texto
+
+
+def test_estructurar_temario(benchmark, guia):
+    ruta, datos = guia
+    texto = extraer_temario_asignatura(ruta)
+    temario = benchmark(estructurar_temario, texto)
+    assert len(temario) == len(datos["temario"])
+    assert [len(t["subtemas"]) for t in temario] == [len(s) for _, _, s in datos["temario"]]
+
+
+def test_extraer_guia(benchmark, guia):
+    # Guía completa: lo que cuesta cada PDF en la etapa extract
+    ruta, datos = guia
+    benchmark.extra_info["paginas"] = _paginas(ruta)
+    registro = benchmark.pedantic(extraer_guia, args=(ruta,), rounds=3, iterations=1)
+    assert registro["asignatura"]["id"] == datos["id_asignatura"]
@@ -0,0 +1,76 @@
+"""
+Pruebas de CargadorGraphDB contra ServidorGraphDBLocal: subida por lotes en N-Triples
+comprimido con gzip y reintentos ante 503.
+"""
+
+import pytest
+
+import graphdb
+from graphdb import CargadorGraphDB, ErrorGraphDB
+from servidores_locales import ServidorGraphDBLocal
+
+
+def _tripletas(n):
+    return [f'<http://upm.es/ontology/asignatura/{i}> <http://upm.es/ontology/nombre> "Asignatura {i}" .' for i in range(n)]
+
+
+@pytest.fixture
+def sin_esperas(monkeypatch):
+    # Los reintentos esperan 1, 2, 4... segundos; en las pruebas no hace falta
+    monkeypatch.setattr(graphdb.time, "sleep", lambda segundos: None)
+
+
+def test_sube_lotes_gzip_n_triples():
+    lineas = _tripletas(25)
+    with ServidorGraphDBLocal() as servidor:
+        cargador = CargadorGraphDB(servidor.url, tam_lote=10, workers=2)
+        subidas = cargador.subir(iter(lineas))
+        cargador.close()
+
+    assert subidas == 25
+    assert sorted(len(p["cuerpo"].splitlines()) for p in servidor.peticiones) == [5, 10, 10]
+    for peticion in servidor.peticiones:
+        assert peticion["ruta"] == "/repositories/asignaturas/statements"
+        assert peticion["content_type"] == "application/n-triples; charset=utf-8"
+        assert peticion["content_encoding"] == "gzip"
+        assert peticion["bytes"] < len(peticion["cuerpo"].encode("utf-8"))
+    assert sorted(servidor.triples) == sorted(lineas)
+
+    informe = cargador.informe()
+    assert (informe["triples"], informe["lotes"], informe["reintentos"]) == (25, 3, 0)
+    assert informe["bytes"] == sum(p["bytes"] for p in servidor.peticiones)
+
+
+def test_sin_comprimir():
+    lineas = _tripletas(3)
+    with ServidorGraphDBLocal() as servidor:
+        cargador = CargadorGraphDB(servidor.url, comprimir=False)
+        cargador.subir(lineas)
+        cargador.close()
+
+    [peticion] = servidor.peticiones
+    assert peticion["content_encoding"] is None
+    assert peticion["cuerpo"] == "\n".join(lineas) + "\n"
+
+
+def test_reintenta_ante_503(sin_esperas):
+    lineas = _tripletas(20)
+    with ServidorGraphDBLocal(fallos=2) as servidor:
+        cargador = CargadorGraphDB(servidor.url, tam_lote=10, workers=1, reintentos=3)
+        assert cargador.subir(lineas) == 20
+        cargador.close()
+
+    # Los lotes rechazados se reenvían completos: no se pierde ni se duplica nada
+    assert sorted(servidor.triples) == sorted(lineas)
+    assert cargador.informe()["reintentos"] == 2
+
+
+def test_error_tras_agotar_reintentos(sin_esperas):
+    with ServidorGraphDBLocal(fallos=10) as servidor:
+        cargador = CargadorGraphDB(servidor.url, reintentos=2)
+        with pytest.raises(ErrorGraphDB):
+            cargador.subir(_tripletas(3))
+        cargador.close()
+
+    assert servidor.peticiones == []
+    assert cargador.informe()["reintentos"] == 2
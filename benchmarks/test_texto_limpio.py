@@ -0,0 +1,25 @@
+"""
+`extraer_texto_limpio` con una guía ya analizada respeta los márgenes pedidos aunque la
+guía se abriera con otros.
+"""
+
+from utils import ParsedGuide, extraer_texto_limpio
+
+
+def test_margenes_de_la_guia_por_defecto(guia):
+    ruta, _ = guia
+    with ParsedGuide(ruta, margen_superior=80, margen_inferior=40) as g:
+        texto, recortes = extraer_texto_limpio(g)
+        assert texto == g.texto_limpio()
+        assert recortes[0] is g.recorte(0)
+    assert texto == extraer_texto_limpio(ruta, 80, 40)[0]
+
+
+def test_margenes_distintos_de_los_de_la_guia(guia):
+    ruta, _ = guia
+    esperado, recortes_esperados = extraer_texto_limpio(ruta, 60, 60)
+    with ParsedGuide(ruta, margen_superior=0, margen_inferior=0) as g:
+        texto, recortes = extraer_texto_limpio(g, 60, 60)
+        assert [r.bbox for r in recortes] == [r.bbox for r in recortes_esperados]
+        assert texto != g.texto_limpio()
+    assert texto == esperado
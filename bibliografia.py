@@ -0,0 +1,289 @@
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from urllib.parse import quote
+
+import aiohttp
+
+from utils import CABECERAS_SCHOLAR, parsear_resultado_scholar
+
+SCHOLAR_URL = "https://scholar.google.com"
+
+# Respuestas ante las que merece la pena reintentar la consulta
+_ESTADOS_REINTENTABLES = {429, 500, 502, 503, 504}
+
+
+class ErrorScholar(Exception):
+    """Se lanza cuando una consulta a Google Scholar falla tras agotar los reintentos."""
+
+
+def normalizar_consulta(nombre):
+    """Clave de caché de una referencia: el nombre con los espacios colapsados."""
+    return " ".join(str(nombre).split())
+
+
+class CacheBibliografia:
+    """
+    Caché persistente (SQLite) de las referencias resueltas en Google Scholar.
+
+    Se guardan también las referencias sin resultados (diccionario vacío), de modo que una
+    referencia nunca se consulta dos veces entre ejecuciones. Los errores no se guardan y
+    se vuelven a intentar en la siguiente ejecución.
+
+    Parámetros:
+        ruta (str): Ruta del archivo SQLite.
+    """
+
+    def __init__(self, ruta):
+        directorio = os.path.dirname(ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(ruta, check_same_thread=False, isolation_level=None, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS referencias ("
+            "consulta TEXT PRIMARY KEY, resultado TEXT NOT NULL, fecha REAL NOT NULL)"
+        )
+
+    def get_many(self, consultas):
+        """Devuelve {consulta: resultado} con las consultas que ya están en la caché."""
+        resultado = {}
+        consultas = list(dict.fromkeys(consultas))
+        with self._lock:
+            for i in range(0, len(consultas), 500):
+                lote = consultas[i : i + 500]
+                marcas = ",".join("?" * len(lote))
+                for consulta, valor in self._db.execute(
+                    f"SELECT consulta, resultado FROM referencias WHERE consulta IN ({marcas})", lote
+                ):
+                    resultado[consulta] = json.loads(valor)
+        return resultado
+
+    def put(self, consulta, resultado):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO referencias (consulta, resultado, fecha) VALUES (?, ?, ?)",
+                (consulta, json.dumps(resultado, ensure_ascii=False), time.time()),
+            )
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM referencias").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class TokenBucket:
+    """
+    Limitador de tasa asíncrono: permite `tasa` peticiones por segundo de media con
+    ráfagas de hasta `capacidad` peticiones.
+    """
+
+    def __init__(self, tasa, capacidad=1):
+        self.tasa = tasa
+        self.capacidad = capacidad
+        self._tokens = capacidad
+        self._ultimo = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def adquirir(self):
+        async with self._lock:
+            while True:
+                ahora = time.monotonic()
+                self._tokens = min(self.capacidad, self._tokens + (ahora - self._ultimo) * self.tasa)
+                self._ultimo = ahora
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.tasa)
+
+
+class ResolutorBibliografia:
+    """
+    Resuelve referencias bibliográficas en Google Scholar de forma concurrente.
+
+    Las consultas pasan por un token bucket (tasa global), un semáforo (peticiones
+    simultáneas) y se reintentan con espera exponencial y jitter ante 429, 5xx o errores de
+    conexión, respetando la cabecera Retry-After. Un fallo solo afecta a su referencia: las
+    consultas fallidas quedan en `fallidas` con su motivo, no se guardan en la caché y se
+    vuelven a intentar si se piden de nuevo.
+
+    El limitador y la sesión HTTP duran lo que el resolutor: la tasa se respeta entre
+    llamadas a `resolver` y las conexiones se reutilizan. Hay que llamar a `close` al
+    terminar.
+
+    Parámetros:
+        base_url (str): URL base de Google Scholar o de un servidor local equivalente.
+        tasa (float): Peticiones por segundo permitidas.
+        rafaga (int): Peticiones que pueden salir seguidas sin esperar al limitador.
+        concurrencia (int): Peticiones en vuelo como máximo.
+        reintentos (int): Reintentos por referencia antes de darla por fallida.
+        espera_base (float): Espera inicial en segundos entre reintentos (se duplica en cada uno).
+        espera_max (float): Espera máxima en segundos entre reintentos.
+        timeout (float): Tiempo máximo por petición en segundos.
+        cache (CacheBibliografia | None): Caché persistente de resultados.
+    """
+
+    def __init__(
+        self,
+        base_url=SCHOLAR_URL,
+        tasa=0.2,
+        rafaga=1,
+        concurrencia=4,
+        reintentos=5,
+        espera_base=2.0,
+        espera_max=120.0,
+        timeout=30.0,
+        cache=None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.tasa = tasa
+        self.rafaga = rafaga
+        self.concurrencia = concurrencia
+        self.reintentos = reintentos
+        self.espera_base = espera_base
+        self.espera_max = espera_max
+        self.timeout = timeout
+        self.cache = cache
+
+        self.consultas = 0
+        self.aciertos_cache = 0
+        self.no_encontrados = 0
+        self.reintentados = 0
+        self.errores = 0
+        self.fallidas = {}
+        # Tiempo total de las llamadas a `resolver` y tiempo sumado que las consultas pasan
+        # esperando al limitador o a un reintento (se solapan entre consultas concurrentes)
+        self.segundos = 0.0
+        self.segundos_espera = 0.0
+
+        self._limitador = TokenBucket(tasa, rafaga)
+        # La sesión se crea en la primera consulta y queda ligada a su bucle de eventos;
+        # `resolver` usa siempre el mismo bucle propio
+        self._session = None
+        self._loop = None
+
+    def _espera(self, intento, retry_after=None):
+        if retry_after is not None:
+            try:
+                return min(float(retry_after), self.espera_max)
+            except ValueError:
+                pass
+        espera = min(self.espera_base * 2 ** intento, self.espera_max)
+        return random.uniform(espera / 2, espera)
+
+    async def _consultar(self, session, semaforo, consulta):
+        url = f"{self.base_url}/scholar?q={quote(consulta)}"
+        for intento in range(self.reintentos + 1):
+            retry_after = None
+            async with semaforo:
+                t0 = time.monotonic()
+                await self._limitador.adquirir()
+                self.segundos_espera += time.monotonic() - t0
+                self.consultas += 1
+                try:
+                    async with session.get(url, headers=random.choice(CABECERAS_SCHOLAR)) as respuesta:
+                        if respuesta.status == 200:
+                            return parsear_resultado_scholar(await respuesta.text())
+                        if respuesta.status not in _ESTADOS_REINTENTABLES:
+                            raise ErrorScholar(f"Error al acceder a Google Scholar: {respuesta.status}")
+                        retry_after = respuesta.headers.get("Retry-After")
+                        motivo = respuesta.status
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    motivo = repr(e)
+            if intento == self.reintentos:
+                raise ErrorScholar(f"Error al acceder a Google Scholar tras {self.reintentos} reintentos: {motivo}")
+            self.reintentados += 1
+            espera = self._espera(intento, retry_after)
+            self.segundos_espera += espera
+            await asyncio.sleep(espera)
+
+    async def resolver_async(self, nombres):
+        """
+        Resuelve los nombres dados. Todas las llamadas deben hacerse desde el mismo bucle
+        de eventos, al que queda ligada la sesión HTTP.
+
+        Retorna:
+            dict[str, dict]: {nombre: {"Titulo", "Autores", "Enlace"}} con las referencias
+            resueltas; las que no tienen resultados quedan con un diccionario vacío y las que
+            fallaron no aparecen (quedan en `fallidas`).
+        """
+        consultas = {}
+        for nombre in nombres:
+            consulta = normalizar_consulta(nombre)
+            if consulta:
+                consultas.setdefault(consulta, []).append(nombre)
+
+        resueltas = self.cache.get_many(list(consultas)) if self.cache is not None else {}
+        self.aciertos_cache += len(resueltas)
+        faltan = [c for c in consultas if c not in resueltas]
+
+        if faltan:
+            if self._session is None:
+                self._session = aiohttp.ClientSession(
+                    connector=aiohttp.TCPConnector(limit=self.concurrencia),
+                    timeout=aiohttp.ClientTimeout(total=self.timeout),
+                )
+            semaforo = asyncio.Semaphore(self.concurrencia)
+            tareas = [self._consultar(self._session, semaforo, c) for c in faltan]
+            for consulta, resultado in zip(faltan, await asyncio.gather(*tareas, return_exceptions=True)):
+                if isinstance(resultado, BaseException):
+                    self.errores += 1
+                    self.fallidas[consulta] = str(resultado)
+                    print(f"Error con {consulta}: {resultado}")
+                    continue
+                self.fallidas.pop(consulta, None)
+                if not resultado:
+                    self.no_encontrados += 1
+                resueltas[consulta] = resultado
+                if self.cache is not None:
+                    self.cache.put(consulta, resultado)
+
+        return {
+            nombre: resueltas[consulta]
+            for consulta, originales in consultas.items()
+            if consulta in resueltas
+            for nombre in originales
+        }
+
+    def resolver(self, nombres):
+        """Versión síncrona de `resolver_async`, para llamarla desde código sin bucle de eventos."""
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+        t0 = time.perf_counter()
+        try:
+            return self._loop.run_until_complete(self.resolver_async(nombres))
+        finally:
+            self.segundos += time.perf_counter() - t0
+
+    async def cerrar_async(self):
+        """Cierra la sesión HTTP desde el bucle de eventos en el que se usó `resolver_async`."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def close(self):
+        """Cierra la sesión HTTP y el bucle de eventos propio de `resolver`."""
+        if self._loop is not None:
+            self._loop.run_until_complete(self.cerrar_async())
+            self._loop.close()
+            self._loop = None
+
+    def stats(self):
+        return {
+            "consultas": self.consultas,
+            "aciertos_cache": self.aciertos_cache,
+            "no_encontrados": self.no_encontrados,
+            "reintentos": self.reintentados,
+            "errores": self.errores,
+            "fallidas": sorted(self.fallidas),
+            "segundos": round(self.segundos, 3),
+            "segundos_espera": round(self.segundos_espera, 3),
+        }
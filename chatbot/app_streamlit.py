@@ -6,6 +6,8 @@ from typing import Any, Dict, List
 
 import streamlit as st
 from core.agent.agent import build_agent
+from core.config import EMBEDDING_WARMUP
+from core.data_access import get_embedding_service, get_result_cache
 from pydantic_ai.messages import (
     ModelRequest,
     ModelResponse,
@@ -84,6 +86,16 @@ def _render_turns() -> None:
                         _render_details(turn["details"])
 
 
+# ========= Embeddings =========
+
+
+@st.cache_resource(show_spinner="Cargando modelo de embeddings…")
+def _warmup_embeddings() -> bool:
+    """Una vez por proceso: el modelo queda cargado para todas las sesiones."""
+    get_embedding_service().warmup()
+    return True
+
+
 # ========= Streaming =========
 
 
@@ -164,6 +176,14 @@ async def main():
             st.session_state.messages = []
             st.session_state.ui_turns = []
             st.rerun()
+        with st.expander("Métricas de embeddings", expanded=False):
+            st.json(get_embedding_service().stats())
+        if get_result_cache() is not None:
+            with st.expander("Métricas de la caché de consultas", expanded=False):
+                st.json(get_result_cache().stats())
+
+    if EMBEDDING_WARMUP:
+        _warmup_embeddings()
 
     # Estado inicial
     if "agent" not in st.session_state:
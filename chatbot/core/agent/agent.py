@@ -83,6 +83,10 @@ HERRAMIENTAS DISPONIBLES (úsalas SOLO cuando aporten datos necesarios):
    - Si necesitas varias secciones, haz varias llamadas, pero evita duplicados.
    - Si una sección no existe, dilo sin inventar.
 
+12) fetch_dossier(asignatura_id) -> {meta, profes, biblio, titulacion, escuela, temario, competencias, descripcion, conocimientos_previos}
+   - Úsala cuando el usuario pida “toda la información” o varias secciones de una misma
+     asignatura: una sola llamada en lugar de una por sección.
+
 POLÍTICA DE USO DE TOOLS (DECISOR):
 - Paso 0: Normaliza la intención del usuario con precisión (¿qué campo/sección quiere?).
 - Paso 1: Asegura el contexto de asignatura:
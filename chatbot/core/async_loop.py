@@ -0,0 +1,50 @@
+import asyncio
+import functools
+import threading
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+# Bucle de eventos del proceso para los clientes asíncronos de PostgreSQL y Elasticsearch.
+#
+# Streamlit ejecuta cada interacción con su propio `asyncio.run`, es decir, con un bucle
+# nuevo cada vez, y los pools de conexiones asíncronos quedan ligados al bucle en el que
+# se abrieron. Para que los pools sean de todo el proceso y se reutilicen entre sesiones,
+# las consultas se ejecutan siempre en este bucle, que vive en un hilo propio; quien las
+# lanza espera el resultado sin bloquear su bucle.
+
+T = TypeVar("T")
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_lock = threading.Lock()
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=_loop.run_forever, name="backends-async", daemon=True
+            ).start()
+    return _loop
+
+
+async def run_in_loop(coro: Awaitable[T]) -> T:
+    """Ejecuta la corrutina en el bucle del proceso y espera su resultado."""
+    loop = get_loop()
+    try:
+        actual = asyncio.get_running_loop()
+    except RuntimeError:
+        actual = None
+    if actual is loop:
+        return await coro
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+
+def en_bucle(funcion: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+    """Decorador: la función asíncrona se ejecuta siempre en el bucle del proceso."""
+
+    @functools.wraps(funcion)
+    async def envoltorio(*args: Any, **kwargs: Any) -> T:
+        return await run_in_loop(funcion(*args, **kwargs))
+
+    return envoltorio
@@ -9,6 +9,32 @@ PG_DSN = os.getenv("PG_DSN", "")
 ES_URL = os.getenv("ES_URL", "")
 ES_INDEX = os.getenv("ES_INDEX", "")
 
+# Caché persistente de embeddings (compartida con pipeline.py); vacío = desactivada
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "distiluse-base-multilingual-cased-v2")
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", "")
+
+# Servicio de embeddings: carga del modelo al arrancar y agrupación de consultas concurrentes
+EMBEDDING_WARMUP = os.getenv("EMBEDDING_WARMUP", "1").lower() not in ("0", "false", "no")
+EMBEDDING_BATCH_MAX = int(os.getenv("EMBEDDING_BATCH_MAX", "32"))
+EMBEDDING_BATCH_WAIT_MS = float(os.getenv("EMBEDDING_BATCH_WAIT_MS", "5"))
+
+# Caché de resultados de PostgreSQL/Elasticsearch: tamaño en MB (0 = desactivada), caducidad
+# en segundos y cada cuántos segundos se comprueba si la ingesta ha cargado datos nuevos
+RESULT_CACHE_MB = float(os.getenv("RESULT_CACHE_MB", "64"))
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", "3600"))
+RESULT_CACHE_VERSION_CHECK = float(os.getenv("RESULT_CACHE_VERSION_CHECK", "30"))
+
+# Clientes asíncronos (un pool por proceso): conexiones, esperas en segundos y keep-alive
+PG_POOL_SIZE = int(os.getenv("PG_POOL_SIZE", "5"))
+PG_MAX_OVERFLOW = int(os.getenv("PG_MAX_OVERFLOW", "5"))
+PG_POOL_TIMEOUT = float(os.getenv("PG_POOL_TIMEOUT", "10"))
+PG_POOL_RECYCLE = int(os.getenv("PG_POOL_RECYCLE", "1800"))
+PG_CONNECT_TIMEOUT = int(os.getenv("PG_CONNECT_TIMEOUT", "5"))
+PG_STATEMENT_TIMEOUT_MS = int(os.getenv("PG_STATEMENT_TIMEOUT_MS", "10000"))
+PG_KEEPALIVE_IDLE = int(os.getenv("PG_KEEPALIVE_IDLE", "30"))
+ES_CONNECTIONS = int(os.getenv("ES_CONNECTIONS", "10"))
+ES_TIMEOUT = float(os.getenv("ES_TIMEOUT", "10"))
+
 
 # Modelo y endpoint: soporta servidores locales compatibles con OpenAI
 LLM_MODEL = os.getenv("LLM_MODEL", "")
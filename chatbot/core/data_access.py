@@ -3,20 +3,37 @@ from typing import Any, Dict, List, Optional
 from elasticsearch import Elasticsearch
 from sqlalchemy import create_engine
 from sqlalchemy.engine import Engine
-
-from .config import ES_URL, PG_DSN
+from sqlalchemy.exc import SQLAlchemyError
+
+from .config import (
+    EMBEDDING_BATCH_MAX,
+    EMBEDDING_BATCH_WAIT_MS,
+    EMBEDDING_CACHE_DIR,
+    EMBEDDING_MODEL,
+    ES_URL,
+    PG_DSN,
+    RESULT_CACHE_MB,
+    RESULT_CACHE_TTL,
+    RESULT_CACHE_VERSION_CHECK,
+)
+from .embedding_cache import EmbeddingCache
+from .embedding_service import EmbeddingService
 from .models import MetaAsignatura
+from .result_cache import ResultCache, cacheada
 from .sql import (
     SQL_FIND_ASIG_BY_NAME,
-    SQL_GET_BIBLIO,
-    SQL_GET_ESCUELA,
-    SQL_GET_META,
-    SQL_GET_PROFES,
-    SQL_GET_TITULACION,
+    SQL_GET_DOSSIER,
+    SQL_GET_VERSION,
 )
 
+# Secciones del dossier que salen de PostgreSQL
+SECCIONES_PG = ("meta", "profes", "biblio", "titulacion", "escuela")
+
 _engine: Optional[Engine] = None
 _es: Optional[Elasticsearch] = None
+_embedding_cache: Optional[EmbeddingCache] = None
+_embedding_service: Optional[EmbeddingService] = None
+_result_cache: Optional[ResultCache] = None
 
 
 def get_engine() -> Engine:
@@ -33,6 +50,48 @@ def get_es() -> Elasticsearch:
     return _es
 
 
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    global _embedding_cache
+    if _embedding_cache is None and EMBEDDING_CACHE_DIR:
+        _embedding_cache = EmbeddingCache(EMBEDDING_CACHE_DIR, EMBEDDING_MODEL)
+    return _embedding_cache
+
+
+def get_embedding_service() -> EmbeddingService:
+    global _embedding_service
+    if _embedding_service is None:
+        _embedding_service = EmbeddingService(
+            EMBEDDING_MODEL,
+            cache=get_embedding_cache(),
+            lote_max=EMBEDDING_BATCH_MAX,
+            espera_max=EMBEDDING_BATCH_WAIT_MS / 1000,
+        )
+    return _embedding_service
+
+
+def get_dataset_version() -> Optional[str]:
+    """Versión de los datos cargados por la ingesta, o None si no se puede leer."""
+    try:
+        with get_engine().begin() as conn:
+            row = conn.execute(SQL_GET_VERSION).first()
+    except SQLAlchemyError:
+        return None
+    return row[0] if row else None
+
+
+def get_result_cache() -> Optional[ResultCache]:
+    global _result_cache
+    if _result_cache is None and RESULT_CACHE_MB > 0:
+        _result_cache = ResultCache(
+            int(RESULT_CACHE_MB * 1024 * 1024),
+            ttl=RESULT_CACHE_TTL,
+            leer_version=get_dataset_version,
+            intervalo_version=RESULT_CACHE_VERSION_CHECK,
+        )
+    return _result_cache
+
+
+@cacheada(get_result_cache)
 def find_asignatura_id(nombre_o_id: str) -> Optional[str]:
     q = (nombre_o_id or "").strip()
     if q.isdigit() and 6 <= len(q) <= 9:
@@ -42,39 +101,37 @@ def find_asignatura_id(nombre_o_id: str) -> Optional[str]:
     return row[0] if row else None
 
 
-def get_meta(asig_id: str) -> Optional[MetaAsignatura]:
+@cacheada(get_result_cache)
+def get_dossier_pg(asig_id: str) -> Dict[str, Any]:
+    """Secciones de SECCIONES_PG de la asignatura, leídas con una única consulta."""
     with get_engine().begin() as conn:
-        row = conn.execute(SQL_GET_META, {"id": asig_id}).mappings().first()
-    return MetaAsignatura(**row) if row else None
+        row = conn.execute(SQL_GET_DOSSIER, {"id": asig_id}).mappings().first()
+    return dossier_desde_fila(row)
+
+
+def dossier_desde_fila(row: Any) -> Dict[str, Any]:
+    meta = row["meta"]
+    return {
+        "meta": MetaAsignatura(**meta) if meta else None,
+        **{seccion: row[seccion] for seccion in SECCIONES_PG if seccion != "meta"},
+    }
+
+
+def get_meta(asig_id: str) -> Optional[MetaAsignatura]:
+    return get_dossier_pg(asig_id)["meta"]
 
 
 def get_profes(asig_id: str) -> List[Dict[str, str]]:
-    with get_engine().begin() as conn:
-        return [
-            dict(r)
-            for r in conn.execute(SQL_GET_PROFES, {"id": asig_id}).mappings().all()
-        ]
+    return get_dossier_pg(asig_id)["profes"]
 
 
 def get_biblio(asig_id: str) -> List[Dict[str, Any]]:
-    with get_engine().begin() as conn:
-        return [
-            dict(r)
-            for r in conn.execute(SQL_GET_BIBLIO, {"id": asig_id}).mappings().all()
-        ]
+    return get_dossier_pg(asig_id)["biblio"]
 
 
 def get_titulacion(asig_id: str) -> List[Dict[str, Any]]:
-    with get_engine().begin() as conn:
-        return [
-            dict(r)
-            for r in conn.execute(SQL_GET_TITULACION, {"id": asig_id}).mappings().all()
-        ]
+    return get_dossier_pg(asig_id)["titulacion"]
 
 
 def get_escuela(asig_id: str) -> List[Dict[str, Any]]:
-    with get_engine().begin() as conn:
-        return [
-            dict(r)
-            for r in conn.execute(SQL_GET_ESCUELA, {"id": asig_id}).mappings().all()
-        ]
+    return get_dossier_pg(asig_id)["escuela"]
@@ -0,0 +1,99 @@
+from typing import Any, Dict, Optional
+
+from elasticsearch import AsyncElasticsearch
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from .async_loop import en_bucle
+from .config import (
+    ES_CONNECTIONS,
+    ES_TIMEOUT,
+    ES_URL,
+    PG_CONNECT_TIMEOUT,
+    PG_DSN,
+    PG_KEEPALIVE_IDLE,
+    PG_MAX_OVERFLOW,
+    PG_POOL_RECYCLE,
+    PG_POOL_SIZE,
+    PG_POOL_TIMEOUT,
+    PG_STATEMENT_TIMEOUT_MS,
+)
+from .data_access import dossier_desde_fila, get_result_cache
+from .result_cache import cacheada
+from .sql import SQL_FIND_ASIG_BY_NAME, SQL_GET_DOSSIER
+
+# Variantes asíncronas de data_access para las herramientas del agente. Los clientes solo
+# se usan desde el bucle del proceso (async_loop), donde viven sus pools.
+
+_engine: Optional[AsyncEngine] = None
+_es: Optional[AsyncElasticsearch] = None
+
+
+def get_async_engine() -> AsyncEngine:
+    global _engine
+    if _engine is None:
+        # Mismo DSN que el motor síncrono, con el driver asíncrono de psycopg 3
+        url = make_url(PG_DSN).set(drivername="postgresql+psycopg")
+        _engine = create_async_engine(
+            url,
+            pool_size=PG_POOL_SIZE,
+            max_overflow=PG_MAX_OVERFLOW,
+            pool_timeout=PG_POOL_TIMEOUT,
+            pool_recycle=PG_POOL_RECYCLE,
+            pool_pre_ping=True,
+            connect_args={
+                "connect_timeout": PG_CONNECT_TIMEOUT,
+                "options": f"-c statement_timeout={PG_STATEMENT_TIMEOUT_MS}",
+                "keepalives": 1,
+                "keepalives_idle": PG_KEEPALIVE_IDLE,
+                "keepalives_interval": 10,
+                "keepalives_count": 3,
+            },
+        )
+    return _engine
+
+
+def get_async_es() -> AsyncElasticsearch:
+    global _es
+    if _es is None:
+        _es = AsyncElasticsearch(
+            ES_URL,
+            connections_per_node=ES_CONNECTIONS,
+            request_timeout=ES_TIMEOUT,
+            retry_on_timeout=True,
+            max_retries=2,
+        )
+    return _es
+
+
+@en_bucle
+async def close() -> None:
+    """Cierra los pools (al apagar el proceso)."""
+    global _engine, _es
+    if _engine is not None:
+        await _engine.dispose()
+        _engine = None
+    if _es is not None:
+        await _es.close()
+        _es = None
+
+
+@cacheada(get_result_cache)
+@en_bucle
+async def find_asignatura_id(nombre_o_id: str) -> Optional[str]:
+    q = (nombre_o_id or "").strip()
+    if q.isdigit() and 6 <= len(q) <= 9:
+        return q
+    async with get_async_engine().connect() as conn:
+        row = (await conn.execute(SQL_FIND_ASIG_BY_NAME, {"p": f"%{q}%", "raw": q})).first()
+    return row[0] if row else None
+
+
+@cacheada(get_result_cache)
+@en_bucle
+async def get_dossier_pg(asig_id: str) -> Dict[str, Any]:
+    """Secciones de SECCIONES_PG de la asignatura, leídas con una única consulta."""
+    async with get_async_engine().connect() as conn:
+        row = (await conn.execute(SQL_GET_DOSSIER, {"id": asig_id})).mappings().first()
+    return dossier_desde_fila(row)
+
@@ -0,0 +1,62 @@
+import asyncio
+from typing import Any, Dict, Iterable, List, Optional
+
+from . import data_access_async, es_search_async
+from .config import ES_INDEX
+from .data_access import SECCIONES_PG, get_dossier_pg, get_es
+from .es_search import SECCIONES_ES, es_get_sections
+
+# Todo lo que se sabe de una asignatura, con como mucho dos viajes: una consulta SQL para
+# las secciones de PostgreSQL y un GET por id para las de Elasticsearch. Las dos partes se
+# guardan en la caché de resultados, así que las herramientas del agente que piden una
+# sola sección reutilizan lo ya leído por las demás.
+
+SECCIONES = SECCIONES_PG + SECCIONES_ES
+
+
+def _secciones_pedidas(sections: Optional[Iterable[str]]) -> List[str]:
+    pedidas = list(SECCIONES if sections is None else sections)
+    desconocidas = [s for s in pedidas if s not in SECCIONES]
+    if desconocidas:
+        raise ValueError(f"Secciones desconocidas: {', '.join(desconocidas)}")
+    return pedidas
+
+
+def get_dossier(
+    asig_id: str, sections: Optional[Iterable[str]] = None
+) -> Dict[str, Any]:
+    """
+    Secciones pedidas (todas las de SECCIONES si `sections` es None) de la asignatura.
+
+    Las secciones de PostgreSQL se leen siempre juntas; de Elasticsearch se leen todas
+    las de texto en un mismo GET, que solo se hace si se pide alguna.
+    """
+    pedidas = _secciones_pedidas(sections)
+    dossier: Dict[str, Any] = {"id": asig_id}
+    if any(s in SECCIONES_PG for s in pedidas):
+        pg = get_dossier_pg(asig_id)
+        dossier.update({s: pg[s] for s in pedidas if s in SECCIONES_PG})
+    if any(s in SECCIONES_ES for s in pedidas):
+        es = es_get_sections(get_es(), ES_INDEX, asig_id)
+        dossier.update({s: es[s] for s in pedidas if s in SECCIONES_ES})
+    return dossier
+
+
+async def get_dossier_async(
+    asig_id: str, sections: Optional[Iterable[str]] = None
+) -> Dict[str, Any]:
+    """Como `get_dossier`, con las dos lecturas en paralelo: tarda lo que la más lenta."""
+    pedidas = _secciones_pedidas(sections)
+    lecturas = {}
+    if any(s in SECCIONES_PG for s in pedidas):
+        lecturas["pg"] = data_access_async.get_dossier_pg(asig_id)
+    if any(s in SECCIONES_ES for s in pedidas):
+        lecturas["es"] = es_search_async.es_get_sections(
+            data_access_async.get_async_es(), ES_INDEX, asig_id
+        )
+    partes = dict(zip(lecturas, await asyncio.gather(*lecturas.values())))
+
+    dossier: Dict[str, Any] = {"id": asig_id}
+    for parte in partes.values():
+        dossier.update({s: parte[s] for s in pedidas if s in parte})
+    return dossier
@@ -0,0 +1,232 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Caché de embeddings compartida por la ingesta (pipeline.py) y el chatbot (es_search.py).
+#
+# Los vectores se guardan en un único fichero float32 mapeado en memoria (una fila por
+# texto) y un índice SQLite relaciona la clave sha256(modelo + texto) con su fila y su
+# último uso. Al superar `max_entradas` se desalojan las menos usadas recientemente y sus
+# filas se reutilizan.
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entradas (
+    clave TEXT PRIMARY KEY,
+    fila INTEGER NOT NULL,
+    ultimo_uso REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entradas_ultimo_uso ON entradas (ultimo_uso);
+CREATE TABLE IF NOT EXISTS libres (fila INTEGER PRIMARY KEY);
+CREATE TABLE IF NOT EXISTS meta (clave TEXT PRIMARY KEY, valor TEXT NOT NULL);
+"""
+
+_LOTE_SQL = 500
+
+
+class EmbeddingCache:
+    def __init__(
+        self,
+        directorio: str,
+        modelo: str,
+        dim: int = 512,
+        max_entradas: int = 200_000,
+    ) -> None:
+        os.makedirs(directorio, exist_ok=True)
+        self.modelo = modelo
+        self.dim = dim
+        self.max_entradas = max_entradas
+        self.hits = 0
+        self.misses = 0
+        self.desalojos = 0
+
+        self._lock = threading.Lock()
+        self._ruta_vectores = os.path.join(directorio, "vectores.f32")
+        self._vectores: Optional[np.memmap] = None
+        self._db = sqlite3.connect(
+            os.path.join(directorio, "indice.sqlite"),
+            check_same_thread=False,
+            isolation_level=None,
+            timeout=30,
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+
+        row = self._db.execute("SELECT valor FROM meta WHERE clave = 'dim'").fetchone()
+        if row is None:
+            self._db.execute("INSERT INTO meta VALUES ('dim', ?), ('filas', '0')", (str(dim),))
+        elif int(row[0]) != dim:
+            raise ValueError(
+                f"La caché de {directorio} guarda vectores de {row[0]} dimensiones, no {dim}"
+            )
+
+    # ========= Claves y fichero de vectores =========
+
+    def clave(self, texto: str) -> str:
+        return hashlib.sha256(f"{self.modelo}\0{texto}".encode("utf-8")).hexdigest()
+
+    def _mapear(self, filas_min: int = 0) -> np.memmap:
+        """Abre (o amplía) el fichero de vectores para que tenga al menos `filas_min` filas."""
+        tam_fila = self.dim * 4
+        filas = os.path.getsize(self._ruta_vectores) // tam_fila if os.path.exists(self._ruta_vectores) else 0
+        if filas < filas_min:
+            filas = max(filas_min, 2 * filas, 1024)
+            with open(self._ruta_vectores, "ab") as f:
+                f.truncate(filas * tam_fila)
+        if self._vectores is None or self._vectores.shape[0] != filas:
+            if self._vectores is not None:
+                self._vectores.flush()
+            self._vectores = np.memmap(
+                self._ruta_vectores, dtype=np.float32, mode="r+", shape=(filas, self.dim)
+            )
+        return self._vectores
+
+    # ========= Lectura / escritura =========
+
+    def get_many(self, textos: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """Devuelve el vector de cada texto o None si no está en la caché."""
+        claves = [self.clave(t) for t in textos]
+        filas: Dict[str, int] = {}
+        with self._lock:
+            unicas = list(dict.fromkeys(claves))
+            for i in range(0, len(unicas), _LOTE_SQL):
+                lote = unicas[i : i + _LOTE_SQL]
+                marcas = ",".join("?" * len(lote))
+                filas.update(
+                    self._db.execute(
+                        f"SELECT clave, fila FROM entradas WHERE clave IN ({marcas})", lote
+                    ).fetchall()
+                )
+
+            resultado: List[Optional[np.ndarray]] = []
+            if filas:
+                vectores = self._mapear(max(filas.values()) + 1)
+            for c in claves:
+                fila = filas.get(c)
+                resultado.append(None if fila is None else np.array(vectores[fila]))
+
+            if filas:
+                ahora = time.time()
+                self._db.executemany(
+                    "UPDATE entradas SET ultimo_uso = ? WHERE clave = ?",
+                    [(ahora, c) for c in filas],
+                )
+            aciertos = sum(v is not None for v in resultado)
+            self.hits += aciertos
+            self.misses += len(resultado) - aciertos
+        return resultado
+
+    def put_many(self, textos: Sequence[str], vectores: np.ndarray) -> None:
+        """Guarda los vectores de los textos que aún no están en la caché."""
+        nuevos = {self.clave(t): v for t, v in zip(textos, vectores)}
+        if not nuevos:
+            return
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                claves = list(nuevos)
+                existentes = set()
+                for i in range(0, len(claves), _LOTE_SQL):
+                    lote = claves[i : i + _LOTE_SQL]
+                    marcas = ",".join("?" * len(lote))
+                    existentes.update(
+                        c
+                        for (c,) in self._db.execute(
+                            f"SELECT clave FROM entradas WHERE clave IN ({marcas})", lote
+                        )
+                    )
+                pendientes = [(c, v) for c, v in nuevos.items() if c not in existentes]
+                if not pendientes:
+                    self._db.execute("COMMIT")
+                    return
+
+                # Se reutilizan primero las filas liberadas por desalojos
+                libres = [
+                    f
+                    for (f,) in self._db.execute(
+                        "SELECT fila FROM libres ORDER BY fila LIMIT ?", (len(pendientes),)
+                    )
+                ]
+                self._db.executemany("DELETE FROM libres WHERE fila = ?", [(f,) for f in libres])
+                total = int(
+                    self._db.execute("SELECT valor FROM meta WHERE clave = 'filas'").fetchone()[0]
+                )
+                extra = len(pendientes) - len(libres)
+                filas = libres + list(range(total, total + extra))
+                self._db.execute(
+                    "UPDATE meta SET valor = ? WHERE clave = 'filas'", (str(total + extra),)
+                )
+
+                # Los vectores se escriben antes de registrar las claves: un lector nunca ve
+                # una clave cuya fila no esté escrita. El fichero se amplía una sola vez y
+                # todas las filas se copian en una asignación
+                mapa = self._mapear(total + extra)
+                mapa[np.asarray(filas)] = np.asarray([v for _, v in pendientes], dtype=np.float32)
+                mapa.flush()
+
+                ahora = time.time()
+                self._db.executemany(
+                    "INSERT INTO entradas (clave, fila, ultimo_uso) VALUES (?, ?, ?)",
+                    [(c, fila, ahora) for fila, (c, _) in zip(filas, pendientes)],
+                )
+                self._desalojar()
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def _desalojar(self) -> None:
+        total = self._db.execute("SELECT COUNT(*) FROM entradas").fetchone()[0]
+        sobran = total - self.max_entradas
+        if sobran <= 0:
+            return
+        viejas = self._db.execute(
+            "SELECT clave, fila FROM entradas ORDER BY ultimo_uso LIMIT ?", (sobran,)
+        ).fetchall()
+        self._db.executemany("DELETE FROM entradas WHERE clave = ?", [(c,) for c, _ in viejas])
+        self._db.executemany("INSERT OR IGNORE INTO libres (fila) VALUES (?)", [(f,) for _, f in viejas])
+        self.desalojos += len(viejas)
+
+    def encode(
+        self,
+        textos: Sequence[str],
+        codificar: Callable[[List[str]], np.ndarray],
+    ) -> np.ndarray:
+        """
+        Devuelve los vectores de `textos` (matriz float32) consultando primero la caché y
+        llamando a `codificar` solo con los textos que faltan.
+        """
+        resultado = self.get_many(textos)
+        faltan = [i for i, v in enumerate(resultado) if v is None]
+        if faltan:
+            textos_faltan = [textos[i] for i in faltan]
+            nuevos = np.asarray(codificar(textos_faltan), dtype=np.float32)
+            self.put_many(textos_faltan, nuevos)
+            for i, v in zip(faltan, nuevos):
+                resultado[i] = v
+        if not resultado:
+            return np.empty((0, self.dim), dtype=np.float32)
+        return np.vstack(resultado)
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        with self._lock:
+            entradas = self._db.execute("SELECT COUNT(*) FROM entradas").fetchone()[0]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entradas": entradas,
+            "desalojos": self.desalojos,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._vectores is not None:
+                self._vectores.flush()
+                self._vectores = None
+            self._db.close()
@@ -0,0 +1,166 @@
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .embedding_cache import EmbeddingCache
+
+# Servicio de embeddings compartido por todas las sesiones del chatbot.
+#
+# El modelo se carga una sola vez por proceso (al calentarlo o en la primera consulta) y
+# un hilo agrupa las peticiones que llegan a la vez desde distintas sesiones: espera como
+# mucho `espera_max` segundos desde la primera petición pendiente y codifica todos los
+# textos reunidos en una única pasada del modelo. Con caché, los textos ya vistos no
+# llegan al modelo.
+
+_MUESTRAS_LATENCIA = 1000
+
+
+class _Peticion:
+    __slots__ = ("textos", "futuro")
+
+    def __init__(self, textos: List[str]) -> None:
+        self.textos = textos
+        self.futuro: Future = Future()
+
+
+class EmbeddingService:
+    def __init__(
+        self,
+        modelo: str,
+        cache: Optional[EmbeddingCache] = None,
+        lote_max: int = 32,
+        espera_max: float = 0.005,
+    ) -> None:
+        self.modelo = modelo
+        self.cache = cache
+        self.lote_max = lote_max
+        self.espera_max = espera_max
+
+        self._model = None
+        self._lock_modelo = threading.Lock()
+        self._peticiones: "queue.Queue[_Peticion]" = queue.Queue()
+        self._hilo: Optional[threading.Thread] = None
+        self._lock_hilo = threading.Lock()
+
+        self._lock_stats = threading.Lock()
+        self.segundos_carga: Optional[float] = None
+        self.peticiones = 0
+        self.pasadas = 0
+        self.textos_codificados = 0
+        self._latencias: deque = deque(maxlen=_MUESTRAS_LATENCIA)
+        self._pasadas: deque = deque(maxlen=_MUESTRAS_LATENCIA)
+
+    # ========= Modelo =========
+
+    def _cargar(self):
+        with self._lock_modelo:
+            if self._model is None:
+                from sentence_transformers import SentenceTransformer
+
+                t0 = time.perf_counter()
+                self._model = SentenceTransformer(self.modelo)
+                self.segundos_carga = time.perf_counter() - t0
+        return self._model
+
+    def warmup(self) -> None:
+        """Carga el modelo y hace una primera pasada para que la primera consulta no la pague."""
+        self._cargar().encode(["calentamiento"])
+
+    # ========= Micro-lotes =========
+
+    def _arrancar(self) -> None:
+        with self._lock_hilo:
+            if self._hilo is None or not self._hilo.is_alive():
+                self._hilo = threading.Thread(
+                    target=self._bucle, name="embedding-service", daemon=True
+                )
+                self._hilo.start()
+
+    def _reunir(self) -> List[_Peticion]:
+        """Bloquea hasta la primera petición y añade las que lleguen dentro de la ventana."""
+        lote = [self._peticiones.get()]
+        textos = len(lote[0].textos)
+        limite = time.perf_counter() + self.espera_max
+        while textos < self.lote_max:
+            restante = limite - time.perf_counter()
+            if restante <= 0:
+                break
+            try:
+                peticion = self._peticiones.get(timeout=restante)
+            except queue.Empty:
+                break
+            lote.append(peticion)
+            textos += len(peticion.textos)
+        return lote
+
+    def _bucle(self) -> None:
+        while True:
+            lote = self._reunir()
+            textos = [t for p in lote for t in p.textos]
+            try:
+                model = self._cargar()
+                t0 = time.perf_counter()
+                vectores = np.asarray(model.encode(textos), dtype=np.float32)
+                segundos = time.perf_counter() - t0
+            except BaseException as e:
+                for p in lote:
+                    p.futuro.set_exception(e)
+                continue
+
+            with self._lock_stats:
+                self.pasadas += 1
+                self.textos_codificados += len(textos)
+                self._pasadas.append((len(textos), segundos))
+            inicio = 0
+            for p in lote:
+                p.futuro.set_result(vectores[inicio : inicio + len(p.textos)])
+                inicio += len(p.textos)
+
+    def _codificar(self, textos: List[str]) -> np.ndarray:
+        self._arrancar()
+        peticion = _Peticion(list(textos))
+        self._peticiones.put(peticion)
+        return peticion.futuro.result()
+
+    # ========= API =========
+
+    def encode(self, textos: Sequence[str]) -> np.ndarray:
+        """Vectores float32 de `textos`, consultando primero la caché si la hay."""
+        t0 = time.perf_counter()
+        if self.cache is not None:
+            vectores = self.cache.encode(textos, self._codificar)
+        else:
+            vectores = self._codificar(list(textos))
+        with self._lock_stats:
+            self.peticiones += 1
+            self._latencias.append(time.perf_counter() - t0)
+        return vectores
+
+    def stats(self) -> Dict[str, object]:
+        """Latencia de `encode` (ms, sobre las últimas peticiones) y tamaño de las pasadas."""
+        with self._lock_stats:
+            latencias = np.array(self._latencias) * 1000
+            pasadas = list(self._pasadas)
+            datos: Dict[str, object] = {
+                "modelo": self.modelo,
+                "cargado": self._model is not None,
+                "segundos_carga": round(self.segundos_carga, 2) if self.segundos_carga is not None else None,
+                "peticiones": self.peticiones,
+                "pasadas": self.pasadas,
+                "textos_codificados": self.textos_codificados,
+            }
+        if len(latencias):
+            datos["latencia_p50_ms"] = round(float(np.percentile(latencias, 50)), 2)
+            datos["latencia_p95_ms"] = round(float(np.percentile(latencias, 95)), 2)
+            datos["latencia_max_ms"] = round(float(latencias.max()), 2)
+        if pasadas:
+            datos["textos_por_pasada"] = round(sum(n for n, _ in pasadas) / len(pasadas), 2)
+            datos["pasada_media_ms"] = round(sum(s for _, s in pasadas) / len(pasadas) * 1000, 2)
+        if self.cache is not None:
+            datos["cache"] = self.cache.stats()
+        return datos
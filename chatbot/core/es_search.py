@@ -1,7 +1,10 @@
-from typing import List, Literal, Set
+from typing import Any, Callable, Dict, List, Literal, Optional, Set, Tuple
 
 from elasticsearch import Elasticsearch
-from sentence_transformers import SentenceTransformer
+
+from .data_access import get_result_cache
+from .embedding_service import EmbeddingService
+from .result_cache import cacheada
 
 Sections = Literal[
     "descripcion_vector",
@@ -10,92 +13,116 @@ Sections = Literal[
 ]
 
 
-def es_temario_search(es: Elasticsearch, index: str, id_asignatura: str) -> List[str]:
-    query = {
-        "query": {"term": {"id_asignatura": id_asignatura}},
-        "_source": ["temario"],
-    }
+# Secciones del dossier que salen de Elasticsearch y campo de _source de cada una
+SECCIONES_ES = ("temario", "competencias", "descripcion", "conocimientos_previos")
+_CAMPOS_SECCION = {
+    "temario": "temario",
+    "competencias": "competencias",
+    "descripcion": "descripcion_asignatura",
+    "conocimientos_previos": "conocimientos_previos",
+}
+
 
-    res = es.search(index=index, body=query)
+def _formatear_temario(src: Dict[str, Any]) -> List[str]:
     temario_list = []
+    for tema in src.get("temario", []) or []:
+        temario_list.append(
+            f"Tema {tema.get('numero', '')}: {tema.get('titulo', '')}"
+        )
 
-    for hit in res.get("hits", {}).get("hits", []):
-        temario = hit.get("_source", {}).get("temario", [])
-        for tema in temario:
+        for subtema in tema.get("subtemas", []):
             temario_list.append(
-                f"Tema {tema.get('numero', '')}: {tema.get('titulo', '')}"
+                f"\tSubtema {subtema.get('numero', '')}: {subtema.get('titulo', '')}"
             )
+    return temario_list
 
-            for subtema in tema.get("subtemas", []):
-                temario_list.append(
-                    f"\tSubtema {subtema.get('numero', '')}: {subtema.get('titulo', '')}"
-                )
 
-    return temario_list
+def _formatear_competencias(src: Dict[str, Any]) -> List[str]:
+    competencias_list = []
+    for comp in src.get("competencias", []) or []:
+        codigo = comp.get("codigo", "")
+        texto = comp.get("texto", "")
+        if codigo:
+            competencias_list.append(f"Competencia {codigo}: {texto}")
+        else:
+            competencias_list.append(f"Competencia: {texto}")
+    return competencias_list
 
 
-def es_competencias_search(
-    es: Elasticsearch, index: str, id_asignatura: str
-) -> List[str]:
-    query = {
-        "query": {"term": {"id_asignatura": id_asignatura}},
-        "_source": ["competencias"],
-    }
+def _formatear_texto(campo: str) -> Callable[[Dict[str, Any]], List[str]]:
+    def formatear(src: Dict[str, Any]) -> List[str]:
+        texto = src.get(campo, "")
+        return [texto] if texto else []
 
-    res = es.search(index=index, body=query)
-    competencias_list = []
+    return formatear
 
-    for hit in res.get("hits", {}).get("hits", []):
-        competencias = hit.get("_source", {}).get("competencias", [])
-        for comp in competencias:
-            codigo = comp.get("codigo", "")
-            texto = comp.get("texto", "")
-            if codigo:
-                competencias_list.append(f"Competencia {codigo}: {texto}")
-            else:
-                competencias_list.append(f"Competencia: {texto}")
 
-    return competencias_list
+_FORMATOS = {
+    "temario": _formatear_temario,
+    "competencias": _formatear_competencias,
+    "descripcion": _formatear_texto("descripcion_asignatura"),
+    "conocimientos_previos": _formatear_texto("conocimientos_previos"),
+}
 
 
-def es_descripcion_search(
+@cacheada(get_result_cache, ignorar=("es",))
+def es_get_sections(
+    es: Elasticsearch,
+    index: str,
+    id_asignatura: str,
+    sections: Tuple[str, ...] = SECCIONES_ES,
+) -> Dict[str, List[str]]:
+    """
+    Secciones de texto de la guía de una asignatura con un único GET por id (el documento
+    se indexa con `_id = id_asignatura`), trayendo de `_source` solo los campos pedidos.
+    """
+    res = es.options(ignore_status=404).get(
+        index=index,
+        id=id_asignatura,
+        source_includes=[_CAMPOS_SECCION[s] for s in sections],
+    )
+    src = res.get("_source", {}) if res.get("found") else {}
+    return {s: _FORMATOS[s](src) for s in sections}
+
+
+def es_temario_search(es: Elasticsearch, index: str, id_asignatura: str) -> List[str]:
+    return es_get_sections(es, index, id_asignatura)["temario"]
+
+
+def es_competencias_search(
     es: Elasticsearch, index: str, id_asignatura: str
 ) -> List[str]:
-    query = {
-        "query": {"term": {"id_asignatura": id_asignatura}},
-        "_source": ["descripcion_asignatura"],
-    }
+    return es_get_sections(es, index, id_asignatura)["competencias"]
 
-    res = es.search(index=index, body=query)
-    descripcion_list = []
 
-    for hit in res.get("hits", {}).get("hits", []):
-        descripcion = hit.get("_source", {}).get("descripcion_asignatura", "")
-        if descripcion:
-            descripcion_list.append(descripcion)
-
-    return descripcion_list
+def es_descripcion_search(
+    es: Elasticsearch, index: str, id_asignatura: str
+) -> List[str]:
+    return es_get_sections(es, index, id_asignatura)["descripcion"]
 
 
 def es_conocimientos_previos_search(
     es: Elasticsearch, index: str, id_asignatura: str
 ) -> List[str]:
-    query = {
-        "query": {"term": {"id_asignatura": id_asignatura}},
-        "_source": ["conocimientos_previos"],
-    }
-
-    res = es.search(index=index, body=query)
-    conocimientos_list = []
+    return es_get_sections(es, index, id_asignatura)["conocimientos_previos"]
 
-    for hit in res.get("hits", {}).get("hits", []):
-        conocimientos = hit.get("_source", {}).get("conocimientos_previos", "")
-        if conocimientos:
-            conocimientos_list.append(conocimientos)
 
-    return conocimientos_list
+def knn_query(
+    field: Sections,
+    query_vector: List[float],
+    k: int,
+    num_candidates: Optional[int] = None,
+) -> dict:
+    # Con vectores int8 conviene subir num_candidates para compensar la cuantización
+    return {
+        "field": field,
+        "query_vector": query_vector,
+        "k": k,
+        "num_candidates": num_candidates or max(k * 5, 100),
+    }
 
 
+@cacheada(get_result_cache, ignorar=("es", "service"))
 def es_field_search(
     es: Elasticsearch,
     index: str,
@@ -104,30 +131,41 @@ def es_field_search(
     *,
     hits_size: int = 10,
     max_subjects: int = 3,
+    service: Optional[EmbeddingService] = None,
+    query_vector: Optional[List[float]] = None,
+    num_candidates: Optional[int] = None,
 ) -> List[str]:
-    model = SentenceTransformer("distiluse-base-multilingual-cased-v2")
-    query_vector = model.encode(query_text).tolist()
+    if query_vector is not None:
+        query_vector = list(query_vector)
+    elif service is not None:
+        query_vector = service.encode([query_text])[0].tolist()
+    else:
+        raise ValueError("es_field_search necesita query_vector o un EmbeddingService")
+
+    source = _fuente_campo(field)
+    res = es.search(
+        index=index,
+        size=hits_size,
+        knn=knn_query(field, query_vector, hits_size, num_candidates),
+        _source=source,
+    )
+    return _formatear_hits(res, field, source, max_subjects)
+
 
+def _fuente_campo(field: Sections) -> List[str]:
     match field:
         case "descripcion_vector":
-            source = ["id_asignatura", "nombre_asignatura", "descripcion_asignatura"]
+            return ["id_asignatura", "nombre_asignatura", "descripcion_asignatura"]
         case "conocimientos_previos_vector":
-            source = ["id_asignatura", "nombre_asignatura", "conocimientos_previos"]
+            return ["id_asignatura", "nombre_asignatura", "conocimientos_previos"]
         case "competencias_vector":
-            source = ["id_asignatura", "nombre_asignatura", "competencias"]
+            return ["id_asignatura", "nombre_asignatura", "competencias"]
 
-    res = es.search(
-        index=index,
-        size=hits_size,
-        knn={
-            "field": field,
-            "query_vector": query_vector,
-            "k": hits_size,
-            "num_candidates": max(hits_size * 5, 100),
-        },
-        _source=source,
-    )
 
+def _formatear_hits(
+    res: Any, field: Sections, source: List[str], max_subjects: int
+) -> List[str]:
+    """Fragmentos de texto de las primeras `max_subjects` asignaturas de una búsqueda kNN."""
     chunks: List[str] = []
     seen_subjects: Set[str] = set()
 
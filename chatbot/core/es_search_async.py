@@ -0,0 +1,69 @@
+import asyncio
+from typing import Dict, List, Optional, Tuple
+
+from elasticsearch import AsyncElasticsearch
+
+from .async_loop import en_bucle
+from .data_access import get_result_cache
+from .embedding_service import EmbeddingService
+from .es_search import (
+    _CAMPOS_SECCION,
+    _FORMATOS,
+    SECCIONES_ES,
+    Sections,
+    _formatear_hits,
+    _fuente_campo,
+    knn_query,
+)
+from .result_cache import cacheada
+
+# Variantes asíncronas de es_search (mismos resultados, con AsyncElasticsearch).
+
+
+@cacheada(get_result_cache, ignorar=("es",))
+@en_bucle
+async def es_get_sections(
+    es: AsyncElasticsearch,
+    index: str,
+    id_asignatura: str,
+    sections: Tuple[str, ...] = SECCIONES_ES,
+) -> Dict[str, List[str]]:
+    res = await es.options(ignore_status=404).get(
+        index=index,
+        id=id_asignatura,
+        source_includes=[_CAMPOS_SECCION[s] for s in sections],
+    )
+    src = res.get("_source", {}) if res.get("found") else {}
+    return {s: _FORMATOS[s](src) for s in sections}
+
+
+@cacheada(get_result_cache, ignorar=("es", "service"))
+@en_bucle
+async def es_field_search(
+    es: AsyncElasticsearch,
+    index: str,
+    query_text: str,
+    field: Sections,
+    *,
+    hits_size: int = 10,
+    max_subjects: int = 3,
+    service: Optional[EmbeddingService] = None,
+    query_vector: Optional[List[float]] = None,
+    num_candidates: Optional[int] = None,
+) -> List[str]:
+    if query_vector is not None:
+        query_vector = list(query_vector)
+    elif service is not None:
+        # El servicio agrupa las consultas en su propio hilo; aquí solo se espera
+        query_vector = (await asyncio.to_thread(service.encode, [query_text]))[0].tolist()
+    else:
+        raise ValueError("es_field_search necesita query_vector o un EmbeddingService")
+
+    source = _fuente_campo(field)
+    res = await es.search(
+        index=index,
+        size=hits_size,
+        knn=knn_query(field, query_vector, hits_size, num_candidates),
+        _source=source,
+    )
+    return _formatear_hits(res, field, source, max_subjects)
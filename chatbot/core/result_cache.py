@@ -0,0 +1,196 @@
+import asyncio
+import functools
+import inspect
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+# Caché en memoria de los resultados de las consultas del chatbot a PostgreSQL y
+# Elasticsearch.
+#
+# Las entradas se guardan serializadas con pickle: así el tamaño de cada una es conocido
+# (el límite es de memoria, no de número de entradas) y quien recibe un resultado no
+# puede modificar el guardado. Se desalojan las menos usadas recientemente, caducan a
+# los `ttl` segundos y se descartan todas cuando cambia la versión de los datos que
+# registra la ingesta (comprobada como mucho cada `intervalo_version` segundos).
+
+_FALTA = object()
+
+
+class ResultCache:
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl: float = 3600,
+        leer_version: Optional[Callable[[], Optional[str]]] = None,
+        intervalo_version: float = 30,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.leer_version = leer_version
+        self.intervalo_version = intervalo_version
+
+        self._lock = threading.Lock()
+        self._entradas: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._bytes = 0
+        self.version: Optional[str] = None
+        self._version_comprobada = float("-inf")
+
+        self.hits = 0
+        self.misses = 0
+        self.caducadas = 0
+        self.desalojos = 0
+        self.invalidaciones = 0
+
+    # ========= Versión de los datos =========
+
+    def _toca_comprobar(self) -> bool:
+        if self.leer_version is None:
+            return False
+        ahora = time.monotonic()
+        with self._lock:
+            if ahora - self._version_comprobada < self.intervalo_version:
+                return False
+            self._version_comprobada = ahora
+        return True
+
+    def _aplicar_version(self, version: Optional[str]) -> None:
+        with self._lock:
+            if version != self.version:
+                if self._entradas:
+                    self.invalidaciones += 1
+                self._vaciar()
+                self.version = version
+
+    def _vaciar(self) -> None:
+        self._entradas.clear()
+        self._bytes = 0
+
+    def clear(self) -> None:
+        with self._lock:
+            self._vaciar()
+
+    # ========= Lectura / escritura =========
+
+    def _leer(self, clave: str) -> Any:
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                self.misses += 1
+                return _FALTA
+            datos, expira = entrada
+            if time.monotonic() >= expira:
+                del self._entradas[clave]
+                self._bytes -= len(datos)
+                self.caducadas += 1
+                self.misses += 1
+                return _FALTA
+            self._entradas.move_to_end(clave)
+            self.hits += 1
+        return pickle.loads(datos)
+
+    def _guardar(self, clave: str, valor: Any, version: Optional[str]) -> None:
+        datos = pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(datos) > self.max_bytes:
+            return
+        with self._lock:
+            # Si la versión cambió mientras se calculaba, el resultado puede ser de los datos viejos
+            if version != self.version:
+                return
+            anterior = self._entradas.pop(clave, None)
+            if anterior is not None:
+                self._bytes -= len(anterior[0])
+            self._entradas[clave] = (datos, time.monotonic() + self.ttl)
+            self._bytes += len(datos)
+            while self._bytes > self.max_bytes:
+                _, (viejos, _) = self._entradas.popitem(last=False)
+                self._bytes -= len(viejos)
+                self.desalojos += 1
+
+    def obtener(self, clave: str, calcular: Callable[[], Any]) -> Any:
+        """Devuelve el resultado guardado para `clave` o lo calcula y lo guarda."""
+        if self._toca_comprobar():
+            self._aplicar_version(self.leer_version())
+        valor = self._leer(clave)
+        if valor is not _FALTA:
+            return valor
+        version = self.version
+        valor = calcular()
+        self._guardar(clave, valor, version)
+        return valor
+
+    async def obtener_async(
+        self, clave: str, calcular: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """Como `obtener`, con `calcular` asíncrona; la versión se lee en un hilo aparte."""
+        if self._toca_comprobar():
+            self._aplicar_version(await asyncio.to_thread(self.leer_version))
+        valor = self._leer(clave)
+        if valor is not _FALTA:
+            return valor
+        version = self.version
+        valor = await calcular()
+        self._guardar(clave, valor, version)
+        return valor
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entradas": len(self._entradas),
+                "bytes": self._bytes,
+                "caducadas": self.caducadas,
+                "desalojos": self.desalojos,
+                "invalidaciones": self.invalidaciones,
+                "version": self.version,
+            }
+
+
+def cacheada(
+    obtener_cache: Callable[[], Optional[ResultCache]], ignorar: Tuple[str, ...] = ()
+) -> Callable:
+    """
+    Decorador: guarda en la caché que devuelve `obtener_cache` (ninguna si devuelve None)
+    el resultado de la función, con la función y sus argumentos como clave. Los
+    argumentos de `ignorar` (clientes, servicios) no forman parte de la clave. Sirve
+    también para funciones asíncronas.
+    """
+
+    def decorador(funcion: Callable) -> Callable:
+        firma = inspect.signature(funcion)
+        nombre = f"{funcion.__module__}.{funcion.__qualname__}"
+
+        def clave(args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> str:
+            ligados = firma.bind(*args, **kwargs)
+            ligados.apply_defaults()
+            argumentos = [(k, v) for k, v in ligados.arguments.items() if k not in ignorar]
+            return repr((nombre, argumentos))
+
+        if inspect.iscoroutinefunction(funcion):
+
+            @functools.wraps(funcion)
+            async def envoltorio_async(*args: Any, **kwargs: Any) -> Any:
+                cache = obtener_cache()
+                if cache is None:
+                    return await funcion(*args, **kwargs)
+                return await cache.obtener_async(
+                    clave(args, kwargs), lambda: funcion(*args, **kwargs)
+                )
+
+            return envoltorio_async
+
+        @functools.wraps(funcion)
+        def envoltorio(*args: Any, **kwargs: Any) -> Any:
+            cache = obtener_cache()
+            if cache is None:
+                return funcion(*args, **kwargs)
+            return cache.obtener(clave(args, kwargs), lambda: funcion(*args, **kwargs))
+
+        return envoltorio
+
+    return decorador
@@ -1,59 +1,91 @@
 from sqlalchemy import text
 
+# Resolución por nombre: primero por subcadena (índice de trigramas asignaturas_nombre_trgm),
+# ordenando por similitud; si no hay coincidencia, por palabras (índice de texto completo
+# asignaturas_nombre_tsv), ordenando por ts_rank. Las expresiones coinciden con las de los
+# índices creados en tables.MIGRACIONES. El Append de UNION ALL se detiene en cuanto la
+# primera rama devuelve una fila, así que la segunda solo se ejecuta como respaldo.
 SQL_FIND_ASIG_BY_NAME = text(
     """
-    SELECT id
-    FROM asignaturas
-    WHERE lower(unaccent(nombre)) LIKE lower(unaccent(:p))
-    ORDER BY similarity(lower(nombre), lower(:raw)) DESC
+    (
+        SELECT id
+        FROM asignaturas
+        WHERE lower(f_unaccent(nombre)) LIKE lower(f_unaccent(:p))
+        ORDER BY similarity(lower(f_unaccent(nombre)), lower(f_unaccent(:raw))) DESC
+        LIMIT 1
+    )
+    UNION ALL
+    (
+        SELECT id
+        FROM asignaturas
+        WHERE to_tsvector('spanish', f_unaccent(nombre)) @@ plainto_tsquery('spanish', f_unaccent(:raw))
+        ORDER BY ts_rank(
+            to_tsvector('spanish', f_unaccent(nombre)),
+            plainto_tsquery('spanish', f_unaccent(:raw))
+        ) DESC
+        LIMIT 1
+    )
     LIMIT 1
     """
 )
 
 
-SQL_GET_META = text(
-    "SELECT id, nombre, numero_creditos, semestre, idioma FROM asignaturas WHERE id = :id"
-)
-
-
-SQL_GET_PROFES = text(
-    """
-    SELECT p.nombre AS profesor, p.correo_electronico AS correo
-    FROM profesores p
-    JOIN profesoresasignaturas pa ON pa.profesor_id = p.id
-    WHERE pa.asignatura_id = :id
-    ORDER BY p.nombre
-    """
-)
+# Versión de los datos que registra la ingesta al cargar (tabla versiondatos)
+SQL_GET_VERSION = text("SELECT version FROM versiondatos WHERE id = 1")
 
 
-SQL_GET_BIBLIO = text(
-    """
-    SELECT b.titulo, b.autores, b.direccion_url
-    FROM bibliografias b
-    JOIN bibliografiaasignaturas ba ON ba.bibliografia_id = b.id
-    WHERE ba.id_asignatura = :id
-    ORDER BY b.titulo
-    LIMIT 20
-    """
-)
-
-
-SQL_GET_TITULACION = text(
-    """
-    SELECT t.nombre, t.tipo_estudio
-    FROM titulaciones t
-    JOIN titulacionesasignaturas at ON at.titulacion_id = t.id
-    WHERE at.asignatura_id = :id
-    """
-)
-
-SQL_GET_ESCUELA = text(
+# Dossier de una asignatura: metadatos y entidades enlazadas en una sola consulta, con
+# cada sección agregada a JSON (lista vacía si no hay filas). El id llega como texto y se
+# convierte al tipo de las columnas para que los filtros usen sus índices
+SQL_GET_DOSSIER = text(
     """
-    SELECT e.nombre
-    FROM escuelas e
-    JOIN titulaciones t ON t.escuela_id = e.id
-    JOIN titulacionesasignaturas at ON at.titulacion_id = t.id
-    WHERE at.asignatura_id = :id
+    SELECT
+        (
+            SELECT json_build_object(
+                'id', a.id::text,
+                'nombre', a.nombre,
+                'numero_creditos', a.numero_creditos::text,
+                'semestre', a.semestre,
+                'idioma', a.idioma
+            )
+            FROM asignaturas a
+            WHERE a.id = CAST(:id AS integer)
+        ) AS meta,
+        COALESCE((
+            SELECT json_agg(
+                json_build_object('profesor', p.nombre, 'correo', p.correo_electronico)
+                ORDER BY p.nombre
+            )
+            FROM profesores p
+            JOIN profesoresasignaturas pa ON pa.profesor_id = p.id
+            WHERE pa.asignatura_id = CAST(:id AS integer)
+        ), '[]'::json) AS profes,
+        COALESCE((
+            SELECT json_agg(
+                json_build_object('titulo', b.titulo, 'autores', b.autores, 'direccion_url', b.direccion_url)
+                ORDER BY b.titulo
+            )
+            FROM (
+                SELECT b.titulo, b.autores, b.direccion_url
+                FROM bibliografias b
+                JOIN bibliografiaasignaturas ba ON ba.bibliografia_id = b.id
+                WHERE ba.asignatura_id = CAST(:id AS integer)
+                ORDER BY b.titulo
+                LIMIT 20
+            ) b
+        ), '[]'::json) AS biblio,
+        COALESCE((
+            SELECT json_agg(json_build_object('nombre', t.nombre, 'tipo_estudio', t.tipo_estudio))
+            FROM titulaciones t
+            JOIN titulacionesasignaturas at ON at.titulacion_id = t.id
+            WHERE at.asignatura_id = CAST(:id AS integer)
+        ), '[]'::json) AS titulacion,
+        COALESCE((
+            SELECT json_agg(json_build_object('nombre', e.nombre))
+            FROM escuelas e
+            JOIN titulacionesescuelas te ON te.escuela_id = e.id
+            JOIN titulacionesasignaturas at ON at.titulacion_id = te.titulacion_id
+            WHERE at.asignatura_id = CAST(:id AS integer)
+        ), '[]'::json) AS escuela
     """
 )
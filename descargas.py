@@ -0,0 +1,268 @@
+import argparse
+import asyncio
+import json
+import os
+from email.utils import formatdate
+from urllib.parse import urljoin, urlparse
+
+import aiohttp
+from bs4 import BeautifulSoup
+
+from manifest import sha256_archivo
+
+# Páginas con las guías docentes de cada titulación
+PAGINAS_TITULACIONES = [
+    "https://cdia.etsisi.upm.es/curso-academico/",  # Ciencia de datos
+    "https://www.etsisi.upm.es/guias-docentes-curso-2025-26-61ci",  # Ingeniería de computadores
+    "https://www.etsisi.upm.es/guias-docentes-curso-2025-26-61iw",  # Ingeniería de software
+    "https://www.etsisi.upm.es/guias-docentes-curso-2025-26-61si",  # Sistemas de Información
+    "https://www.etsisi.upm.es/guias-docentes-curso-2025-26-61ti",  # Tecnologías para la Sociedad de la Información
+    "https://www.etsisi.upm.es/guias-docentes-curso-2025-26-61ct",  # Ingeniería de Computadores y Tecnologías para la Sociedad de la Información
+    "https://www.etsisi.upm.es/guias-docentes-curso-2025-26-61st",  # Ingeniería de Software y Tecnologías para la Sociedad de la Información
+]
+
+CABECERAS = {"User-Agent": "Mozilla/5.0 (compatible; PdfDownloader/1.0)"}
+DIRECTORIO = "Guias Docentes"
+
+# Archivo, dentro del directorio de descargas, con el ETag, Last-Modified y hash de cada PDF
+ARCHIVO_ESTADO = ".descargas.json"
+
+DESCARGADO = "descargado"
+REANUDADO = "reanudado"
+SIN_CAMBIOS = "sin_cambios"
+DUPLICADO = "duplicado"
+ERROR = "error"
+
+
+def extraer_enlaces_pdf(html, pagina_url):
+    """
+    Devuelve las URLs absolutas de los PDFs enlazados desde las tablas de una página.
+
+    Parámetros:
+        html (str): Contenido HTML de la página.
+        pagina_url (str): URL de la página, para resolver los enlaces relativos.
+
+    Retorna:
+        list[str]: URLs de los PDFs, sin repetir y en orden de aparición.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    enlaces = []
+    for tabla in soup.find_all("table"):
+        for a in tabla.find_all("a", href=True):
+            href = a["href"].strip()
+            if href.lower().endswith(".pdf"):
+                enlaces.append(urljoin(pagina_url, href))
+    return list(dict.fromkeys(enlaces))
+
+
+class DescargadorGuias:
+    """
+    Descarga las guías docentes enlazadas desde las páginas de las titulaciones.
+
+    Todas las peticiones comparten una sesión aiohttp con pool de conexiones y un límite
+    de peticiones simultáneas por host. Cada PDF se pide con GET condicional (If-None-Match
+    / If-Modified-Since), de modo que los que no han cambiado no se vuelven a descargar. La
+    descarga se escribe en un archivo `.part` que se renombra al terminar; si una descarga
+    se interrumpe, la siguiente ejecución la reanuda con una petición Range.
+
+    Los PDFs enlazados desde varias titulaciones se descargan una sola vez, y los que tienen
+    el mismo contenido que otro ya descargado con distinto nombre se descartan para que la
+    ingesta no procese dos veces la misma asignatura.
+
+    Parámetros:
+        directorio (str): Carpeta donde se guardan los PDFs.
+        por_host (int): Peticiones simultáneas como máximo a un mismo host.
+        concurrencia (int): Peticiones simultáneas como máximo en total.
+        reintentos (int): Reintentos por PDF ante errores de red o 5xx.
+        timeout (float): Tiempo máximo por petición en segundos.
+        verificar_ssl (bool): Si se verifican los certificados TLS. Desactivarlo solo si los
+            de algún servidor no validan.
+    """
+
+    def __init__(self, directorio=DIRECTORIO, por_host=4, concurrencia=16, reintentos=3, timeout=120.0, verificar_ssl=True):
+        self.directorio = directorio
+        self.por_host = por_host
+        self.concurrencia = concurrencia
+        self.reintentos = reintentos
+        self.timeout = timeout
+        self.verificar_ssl = verificar_ssl
+        self.ruta_estado = os.path.join(directorio, ARCHIVO_ESTADO)
+        self.estado = {}
+        if os.path.exists(self.ruta_estado):
+            with open(self.ruta_estado, encoding="utf-8") as f:
+                self.estado = json.load(f)
+
+    def guardar_estado(self):
+        """Escribe el estado en un archivo temporal y lo renombra sobre el definitivo."""
+        tmp = self.ruta_estado + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.estado, f, ensure_ascii=False, indent=2, sort_keys=True)
+        os.replace(tmp, self.ruta_estado)
+
+    async def _enlaces(self, session, pagina_url):
+        async with session.get(pagina_url) as respuesta:
+            respuesta.raise_for_status()
+            return extraer_enlaces_pdf(await respuesta.text(), pagina_url)
+
+    def _cabeceras_condicionales(self, nombre, destino, parcial):
+        entrada = self.estado.get(nombre, {})
+        cabeceras = {}
+        validador = entrada.get("etag") or entrada.get("last_modified")
+        if parcial and os.path.getsize(parcial) > 0 and validador:
+            # Reanudación: If-Range hace que el servidor envíe el archivo completo si ha cambiado
+            cabeceras["Range"] = f"bytes={os.path.getsize(parcial)}-"
+            cabeceras["If-Range"] = validador
+        elif os.path.exists(destino) or entrada.get("duplicado_de"):
+            # Los duplicados descartados también se piden de forma condicional
+            if entrada.get("etag"):
+                cabeceras["If-None-Match"] = entrada["etag"]
+            if entrada.get("last_modified"):
+                cabeceras["If-Modified-Since"] = entrada["last_modified"]
+            elif not entrada.get("etag") and os.path.exists(destino):
+                cabeceras["If-Modified-Since"] = formatdate(os.path.getmtime(destino), usegmt=True)
+        return cabeceras
+
+    async def _descargar(self, session, url):
+        nombre = os.path.basename(urlparse(url).path)
+        destino = os.path.join(self.directorio, nombre)
+        parcial = destino + ".part"
+
+        intento = 0
+        esperar = False
+        while True:
+            if esperar:
+                # La espera entre intentos se hace fuera de `session.get`, con la conexión ya
+                # devuelta al pool
+                await asyncio.sleep(2 ** intento)
+                intento += 1
+                esperar = False
+            try:
+                cabeceras = self._cabeceras_condicionales(nombre, destino, parcial if os.path.exists(parcial) else None)
+                async with session.get(url, headers=cabeceras) as respuesta:
+                    if respuesta.status == 304:
+                        return nombre, DUPLICADO if self.estado.get(nombre, {}).get("duplicado_de") else SIN_CAMBIOS
+                    if respuesta.status == 416 and "Range" in cabeceras:
+                        # El .part ya no corresponde al archivo del servidor: se descarta
+                        # junto con sus validadores y, tras salir del bloque y liberar la
+                        # conexión, se pide el archivo completo sin Range
+                        os.remove(parcial)
+                        entrada = self.estado.get(nombre, {})
+                        entrada.pop("etag", None)
+                        entrada.pop("last_modified", None)
+                        self.guardar_estado()
+                        continue
+                    if respuesta.status >= 500 and intento < self.reintentos:
+                        esperar = True
+                        continue
+                    respuesta.raise_for_status()
+
+                    reanudado = respuesta.status == 206
+                    # El validador se guarda antes de escribir para poder reanudar en otra ejecución
+                    self.estado[nombre] = {
+                        "url": url,
+                        "etag": respuesta.headers.get("ETag"),
+                        "last_modified": respuesta.headers.get("Last-Modified"),
+                    }
+                    self.guardar_estado()
+                    with open(parcial, "ab" if reanudado else "wb") as f:
+                        async for bloque in respuesta.content.iter_chunked(1 << 16):
+                            f.write(bloque)
+                break
+            except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError):
+                # El archivo .part se conserva y el siguiente intento continúa donde se quedó
+                if intento == self.reintentos:
+                    raise
+                esperar = True
+
+        os.replace(parcial, destino)
+        self.estado[nombre]["sha256"] = sha256_archivo(destino)
+        return nombre, REANUDADO if reanudado else DESCARGADO
+
+    def _descartar_duplicados(self, resultados):
+        """Elimina los PDFs descargados cuyo contenido coincide con otro con distinto nombre."""
+        por_hash = {}
+        for nombre in sorted(self.estado):
+            sha = self.estado[nombre].get("sha256")
+            if sha and os.path.exists(os.path.join(self.directorio, nombre)):
+                por_hash.setdefault(sha, []).append(nombre)
+        for nombres in por_hash.values():
+            # Se conserva el que ya existía antes de esta ejecución (o el primero por nombre)
+            nombres.sort(key=lambda n: (resultados.get(n) in (DESCARGADO, REANUDADO), n))
+            for duplicado in nombres[1:]:
+                os.remove(os.path.join(self.directorio, duplicado))
+                self.estado[duplicado]["duplicado_de"] = nombres[0]
+                resultados[duplicado] = DUPLICADO
+
+    async def descargar_async(self, paginas=PAGINAS_TITULACIONES):
+        """
+        Descarga los PDFs enlazados desde `paginas`.
+
+        Retorna:
+            dict[str, str]: Resultado por nombre de archivo ("descargado", "reanudado",
+            "sin_cambios", "duplicado" o "error").
+        """
+        os.makedirs(self.directorio, exist_ok=True)
+        conector = aiohttp.TCPConnector(limit=self.concurrencia, limit_per_host=self.por_host, ssl=None if self.verificar_ssl else False)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        async with aiohttp.ClientSession(connector=conector, timeout=timeout, headers=CABECERAS) as session:
+            enlaces = []
+            for pagina, resultado in zip(paginas, await asyncio.gather(*(self._enlaces(session, p) for p in paginas), return_exceptions=True)):
+                if isinstance(resultado, BaseException):
+                    print(f"ERROR al leer {pagina}: {resultado}")
+                    continue
+                enlaces.extend(resultado)
+
+            # Un mismo PDF puede enlazarse desde varias titulaciones
+            urls = {}
+            for url in enlaces:
+                nombre = os.path.basename(urlparse(url).path)
+                if nombre in urls and urls[nombre] != url:
+                    print(f"AVISO: {nombre} se enlaza desde {urls[nombre]} y {url}; se usa el primero")
+                urls.setdefault(nombre, url)
+
+            resultados = {}
+            for url, resultado in zip(urls.values(), await asyncio.gather(*(self._descargar(session, u) for u in urls.values()), return_exceptions=True)):
+                if isinstance(resultado, BaseException):
+                    print(f"ERROR al descargar {url}: {resultado}")
+                    resultados[os.path.basename(urlparse(url).path)] = ERROR
+                else:
+                    resultados[resultado[0]] = resultado[1]
+
+        self._descartar_duplicados(resultados)
+        self.guardar_estado()
+        return resultados
+
+    def descargar(self, paginas=PAGINAS_TITULACIONES):
+        """Versión síncrona de `descargar_async`."""
+        return asyncio.run(self.descargar_async(paginas))
+
+
+def resumen(resultados):
+    cuenta = {}
+    for estado in resultados.values():
+        cuenta[estado] = cuenta.get(estado, 0) + 1
+    return cuenta
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Descarga las guías docentes de las titulaciones.")
+    parser.add_argument("--directorio", default=DIRECTORIO, help="Carpeta donde se guardan los PDFs.")
+    parser.add_argument("--por-host", type=int, default=4, help="Descargas simultáneas por host.")
+    parser.add_argument("--concurrencia", type=int, default=16, help="Descargas simultáneas en total.")
+    parser.add_argument("--no-verificar-ssl", dest="verificar_ssl", action="store_false", help="No verifica los certificados TLS.")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    descargador = DescargadorGuias(
+        args.directorio,
+        por_host=args.por_host,
+        concurrencia=args.concurrencia,
+        verificar_ssl=args.verificar_ssl,
+    )
+    print(resumen(descargador.descargar()))
+
+
+if __name__ == "__main__":
+    main()
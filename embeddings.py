@@ -0,0 +1,78 @@
+import numpy as np
+
+MODELO_EMBEDDINGS = "distiluse-base-multilingual-cased-v2"
+DIM_EMBEDDINGS = 512
+
+# Campo vectorial del documento -> campo con el texto a vectorizar
+CAMPOS_VECTOR = {
+    "descripcion_vector": "descripcion_asignatura",
+    "competencias_vector": "texto_competencias",
+    "conocimientos_previos_vector": "conocimientos_previos",
+}
+
+
+class ModeloPerezoso:
+    """
+    Envoltorio de SentenceTransformer que solo carga el modelo la primera vez que se
+    necesita codificar algo. Con la caché de embeddings, una reingesta sin cambios no
+    llega a cargarlo.
+    """
+
+    def __init__(self, nombre=MODELO_EMBEDDINGS):
+        self.nombre = nombre
+        self._model = None
+
+    def encode(self, textos, **kwargs):
+        if self._model is None:
+            from sentence_transformers import SentenceTransformer
+            self._model = SentenceTransformer(self.nombre)
+        return self._model.encode(textos, **kwargs)
+
+
+def vectorizar_documentos(documentos, model, batch_size=64, cache=None):
+    """
+    Etapa de embeddings: reúne los textos de todas las secciones de todos los documentos y
+    los codifica en lotes grandes con una sola llamada al modelo.
+
+    Los textos vacíos no se codifican y el documento queda sin ese campo vectorial (un
+    dense_vector de 512 dimensiones no admite listas vacías). Los textos repetidos se
+    codifican una única vez. Los vectores se guardan como numpy.float32.
+
+    Parámetros:
+        documentos (list[dict]): Documentos con los campos de texto de CAMPOS_VECTOR.
+            Se modifican en el sitio; el campo auxiliar "texto_competencias" se elimina.
+        model (SentenceTransformer): Modelo de embeddings.
+        batch_size (int): Tamaño de lote para model.encode.
+        cache (EmbeddingCache | None): Caché persistente; solo se codifican los textos que no estén en ella.
+
+    Retorna:
+        list[dict]: Los mismos documentos, con los vectores añadidos.
+    """
+    textos = {}
+    for doc in documentos:
+        for campo_texto in CAMPOS_VECTOR.values():
+            texto = (doc.get(campo_texto) or "").strip()
+            if texto:
+                textos.setdefault(texto, len(textos))
+
+    def codificar(lote):
+        return model.encode(
+            lote,
+            batch_size=batch_size,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+        ).astype(np.float32, copy=False)
+
+    vectores = None
+    if textos:
+        vectores = cache.encode(list(textos), codificar) if cache is not None else codificar(list(textos))
+
+    for doc in documentos:
+        for campo_vector, campo_texto in CAMPOS_VECTOR.items():
+            texto = (doc.get(campo_texto) or "").strip()
+            doc.pop(campo_vector, None)
+            if texto:
+                doc[campo_vector] = vectores[textos[texto]]
+        doc.pop("texto_competencias", None)
+
+    return documentos
@@ -0,0 +1,200 @@
+import argparse
+import json
+import queue
+import threading
+
+from elasticsearch import Elasticsearch
+
+INDEX_NAME = "guias_docentes"
+
+# Los vectores ocupan la mayor parte de cada documento y casi nunca hacen falta al leer el corpus
+EXCLUIR_POR_DEFECTO = ["*_vector"]
+
+_FIN = object()
+
+
+def _escanear_slice(es, index_name, query, fuente, tam_pagina, keep_alive, slice_id=None, slices=1):
+    """Recorre un slice del índice con point-in-time + search_after, página a página."""
+    pit_id = es.open_point_in_time(index=index_name, keep_alive=keep_alive)["id"]
+    try:
+        search_after = None
+        while True:
+            parametros = {
+                "pit": {"id": pit_id, "keep_alive": keep_alive},
+                "size": tam_pagina,
+                "sort": ["_shard_doc"],
+                "query": query,
+                "source": fuente,
+                "track_total_hits": False,
+            }
+            if search_after is not None:
+                parametros["search_after"] = search_after
+            if slices > 1:
+                parametros["slice"] = {"id": slice_id, "max": slices}
+            res = es.search(**parametros)
+            pit_id = res.get("pit_id", pit_id)
+            hits = res["hits"]["hits"]
+            if not hits:
+                return
+            yield hits
+            if len(hits) < tam_pagina:
+                return
+            search_after = hits[-1]["sort"]
+    finally:
+        es.close_point_in_time(id=pit_id)
+
+
+def escanear(
+    es,
+    index_name=INDEX_NAME,
+    query=None,
+    incluir=None,
+    excluir=EXCLUIR_POR_DEFECTO,
+    tam_pagina=1000,
+    slices=1,
+    keep_alive="2m",
+):
+    """
+    Recorre todos los documentos de un índice que cumplen `query`, sin el límite de
+    `size` de una búsqueda normal.
+
+    Pagina con point-in-time y search_after (vista consistente del índice aunque se
+    escriba mientras tanto) y solo trae los campos pedidos: por defecto todos salvo los
+    vectores. Con `slices > 1` el índice se divide en slices que se leen en paralelo, cada
+    uno en su hilo; en ese caso el orden de los documentos no está definido.
+
+    Parámetros:
+        es (Elasticsearch): Cliente de Elasticsearch.
+        index_name (str): Índice a recorrer.
+        query (dict | None): Consulta de filtrado (match_all si es None).
+        incluir (list[str] | None): Campos de _source a devolver (todos si es None).
+        excluir (list[str] | None): Campos de _source a omitir.
+        tam_pagina (int): Documentos por página.
+        slices (int): Número de slices leídos en paralelo.
+        keep_alive (str): Tiempo que Elasticsearch mantiene el point-in-time entre páginas.
+
+    Retorna:
+        Iterator[dict]: _source de cada documento.
+    """
+    query = query or {"match_all": {}}
+    fuente = {}
+    if incluir:
+        fuente["includes"] = list(incluir)
+    if excluir:
+        fuente["excludes"] = list(excluir)
+    fuente = fuente or True
+
+    if slices <= 1:
+        for hits in _escanear_slice(es, index_name, query, fuente, tam_pagina, keep_alive):
+            for hit in hits:
+                yield hit["_source"]
+        return
+
+    paginas = queue.Queue(maxsize=2 * slices)
+    parar = threading.Event()
+
+    def leer(slice_id):
+        try:
+            for hits in _escanear_slice(es, index_name, query, fuente, tam_pagina, keep_alive, slice_id, slices):
+                while not parar.is_set():
+                    try:
+                        paginas.put(hits, timeout=0.1)
+                        break
+                    except queue.Full:
+                        pass
+                if parar.is_set():
+                    return
+        except BaseException as e:
+            paginas.put(e)
+        finally:
+            paginas.put(_FIN)
+
+    hilos = [threading.Thread(target=leer, args=(i,), daemon=True) for i in range(slices)]
+    for hilo in hilos:
+        hilo.start()
+    try:
+        terminados = 0
+        while terminados < slices:
+            pagina = paginas.get()
+            if pagina is _FIN:
+                terminados += 1
+            elif isinstance(pagina, BaseException):
+                raise pagina
+            else:
+                for hit in pagina:
+                    yield hit["_source"]
+    finally:
+        # Si el consumidor deja de leer (o hay un error) los hilos terminan y cierran su PIT
+        parar.set()
+        while any(h.is_alive() for h in hilos):
+            try:
+                paginas.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+
+def exportar_ndjson(documentos, ruta):
+    """Escribe los documentos en un archivo NDJSON (un JSON por línea). Retorna cuántos escribe."""
+    n = 0
+    with open(ruta, "w", encoding="utf-8") as f:
+        for doc in documentos:
+            f.write(json.dumps(doc, ensure_ascii=False))
+            f.write("\n")
+            n += 1
+    return n
+
+
+def exportar_parquet(documentos, ruta, tam_lote=1000):
+    """
+    Escribe los documentos en un archivo Parquet, conservando los campos anidados
+    (competencias, temario) como listas de structs. Retorna cuántos escribe.
+
+    Cada lote se escribe en cuanto se completa, con el esquema deducido del primero (ver
+    `artefactos.EscritorParquet`), así que la memoria no depende del tamaño del índice.
+    """
+    from artefactos import EscritorParquet
+    from etapas import en_lotes
+
+    with EscritorParquet(ruta) as escritor:
+        for lote in en_lotes(documentos, tam_lote):
+            escritor.escribir(lote)
+    return escritor.filas
+
+
+def exportar(documentos, ruta):
+    """Exporta a NDJSON o Parquet según la extensión de `ruta` (.ndjson/.jsonl o .parquet)."""
+    if ruta.endswith(".parquet"):
+        return exportar_parquet(documentos, ruta)
+    if ruta.endswith((".ndjson", ".jsonl")):
+        return exportar_ndjson(documentos, ruta)
+    raise ValueError(f"Formato de exportación no soportado: {ruta}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Exporta el índice de guías docentes a NDJSON o Parquet.")
+    parser.add_argument("salida", help="Archivo de salida (.ndjson, .jsonl o .parquet).")
+    parser.add_argument("--es", default="http://localhost:9200", help="URL de Elasticsearch.")
+    parser.add_argument("--indice", default=INDEX_NAME, help="Índice a exportar.")
+    parser.add_argument("--incluir", nargs="*", default=None, help="Campos a incluir (todos si se omite).")
+    parser.add_argument("--excluir", nargs="*", default=EXCLUIR_POR_DEFECTO, help="Campos a excluir (por defecto los vectores).")
+    parser.add_argument("--slices", type=int, default=1, help="Slices leídos en paralelo.")
+    parser.add_argument("--tam-pagina", type=int, default=1000, help="Documentos por página.")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    es = Elasticsearch(args.es)
+    documentos = escanear(
+        es,
+        args.indice,
+        incluir=args.incluir,
+        excluir=args.excluir,
+        tam_pagina=args.tam_pagina,
+        slices=args.slices,
+    )
+    print(f"Documentos exportados: {exportar(documentos, args.salida)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+import queue
+import threading
+import time
+
+_FIN = object()
+
+
+class Cancelado(Exception):
+    """Se lanza en una etapa cuando otra etapa del flujo ha fallado."""
+
+
+def en_lotes(items, tam_lote):
+    """Agrupa un iterable en listas de como mucho `tam_lote` elementos."""
+    lote = []
+    for item in items:
+        lote.append(item)
+        if len(lote) >= tam_lote:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+class Etapa:
+    """
+    Etapa de un flujo en streaming, ejecutada en su propio hilo.
+
+    `funcion` recibe un iterador con los elementos de la etapa anterior (o ninguno si es la
+    primera) y devuelve un iterable con sus salidas, que se escriben en una cola acotada.
+    Si la cola está llena la etapa se bloquea (contrapresión) hasta que la siguiente
+    consuma. Se mide el tiempo esperando entrada y el tiempo bloqueado en la salida.
+    """
+
+    def __init__(self, nombre, funcion, entrada, capacidad, cancelado):
+        self.nombre = nombre
+        self.funcion = funcion
+        self.entrada = entrada
+        self.salida = queue.Queue(maxsize=capacidad) if capacidad else None
+        self.cancelado = cancelado
+        self.error = None
+
+        self.recibidos = 0
+        self.emitidos = 0
+        self.t_espera = 0.0
+        self.t_bloqueo = 0.0
+        self.t_total = 0.0
+        self._hilo = threading.Thread(target=self._ejecutar, name=f"etapa-{nombre}", daemon=True)
+
+    def _leer(self):
+        while True:
+            t0 = time.perf_counter()
+            while True:
+                try:
+                    item = self.entrada.get(timeout=0.1)
+                    break
+                except queue.Empty:
+                    if self.cancelado.is_set():
+                        raise Cancelado()
+            self.t_espera += time.perf_counter() - t0
+            if item is _FIN:
+                return
+            self.recibidos += 1
+            yield item
+
+    def _poner(self, item):
+        t0 = time.perf_counter()
+        while True:
+            try:
+                self.salida.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                if self.cancelado.is_set():
+                    raise Cancelado()
+        self.t_bloqueo += time.perf_counter() - t0
+
+    def _ejecutar(self):
+        t0 = time.perf_counter()
+        try:
+            salidas = self.funcion(self._leer()) if self.entrada is not None else self.funcion()
+            for item in salidas or ():
+                self.emitidos += 1
+                if self.salida is not None:
+                    self._poner(item)
+            if self.salida is not None:
+                self._poner(_FIN)
+        except Cancelado:
+            pass
+        except BaseException as e:
+            self.error = e
+            self.cancelado.set()
+        finally:
+            self.t_total = time.perf_counter() - t0
+
+    def iniciar(self):
+        self._hilo.start()
+
+    def esperar(self):
+        self._hilo.join()
+
+    def informe(self):
+        activo = max(self.t_total - self.t_espera - self.t_bloqueo, 0.0)
+        return {
+            "etapa": self.nombre,
+            "recibidos": self.recibidos,
+            "emitidos": self.emitidos,
+            "segundos": round(self.t_total, 3),
+            "por_segundo": round((self.recibidos or self.emitidos) / self.t_total, 2) if self.t_total else 0.0,
+            "activo": round(activo / self.t_total, 3) if self.t_total else 0.0,
+            "esperando_entrada": round(self.t_espera / self.t_total, 3) if self.t_total else 0.0,
+            "bloqueado_salida": round(self.t_bloqueo / self.t_total, 3) if self.t_total else 0.0,
+        }
+
+
+class Flujo:
+    """
+    Cadena de etapas conectadas por colas acotadas. Todas las etapas se ejecutan a la vez,
+    de modo que la memoria usada no depende del número de elementos y las escrituras de
+    las últimas etapas se solapan con el trabajo de las primeras.
+
+    Parámetros:
+        capacidad (int): Tamaño máximo de cada cola entre etapas.
+    """
+
+    def __init__(self, capacidad=8):
+        self.capacidad = capacidad
+        self.etapas = []
+        self.cancelado = threading.Event()
+
+    def etapa(self, nombre, funcion, capacidad=None):
+        """Añade una etapa que consume las salidas de la anterior."""
+        entrada = self.etapas[-1].salida if self.etapas else None
+        if self.etapas and entrada is None:
+            raise ValueError(f"La etapa '{self.etapas[-1].nombre}' es final y no puede tener sucesora")
+        etapa = Etapa(nombre, funcion, entrada, capacidad or self.capacidad, self.cancelado)
+        self.etapas.append(etapa)
+        return self
+
+    def sumidero(self, nombre, funcion):
+        """Añade la etapa final, cuyas salidas solo se cuentan."""
+        entrada = self.etapas[-1].salida if self.etapas else None
+        self.etapas.append(Etapa(nombre, funcion, entrada, 0, self.cancelado))
+        return self
+
+    def ejecutar(self):
+        """Ejecuta todas las etapas y relanza el primer error que se produzca."""
+        for etapa in self.etapas:
+            etapa.iniciar()
+        for etapa in self.etapas:
+            etapa.esperar()
+        for etapa in self.etapas:
+            if etapa.error is not None:
+                raise etapa.error
+
+    def informe(self):
+        return [etapa.informe() for etapa in self.etapas]
+
+    def imprimir_informe(self):
+        print(f"{'etapa':<16}{'elementos':>10}{'seg':>9}{'elem/s':>9}{'activo':>9}{'espera':>9}{'contrapresión':>15}")
+        for fila in self.informe():
+            print(
+                f"{fila['etapa']:<16}{fila['recibidos'] or fila['emitidos']:>10}{fila['segundos']:>9}"
+                f"{fila['por_segundo']:>9}{fila['activo']:>9.1%}{fila['esperando_entrada']:>9.1%}"
+                f"{fila['bloqueado_salida']:>15.1%}"
+            )
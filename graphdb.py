@@ -0,0 +1,132 @@
+import gzip
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from etapas import en_lotes
+
+GRAPHDB_STATEMENTS = "http://localhost:8000/repositories/asignaturas/statements"
+
+# Respuestas ante las que merece la pena reintentar el envío de un lote
+_ESTADOS_REINTENTABLES = {429, 500, 502, 503, 504}
+
+
+class ErrorGraphDB(Exception):
+    """Se lanza cuando un lote no se puede subir a GraphDB tras agotar los reintentos."""
+
+
+class CargadorGraphDB:
+    """
+    Sube tripletas a GraphDB en su formato nativo, enviando el documento RDF directamente
+    al endpoint `statements` del repositorio en lugar de construir consultas INSERT DATA.
+
+    Las tripletas (líneas N-Triples) se agrupan en lotes grandes que se comprimen con gzip y
+    se envían en paralelo sobre una sesión HTTP con pool de conexiones. Cada lote se
+    reintenta con espera exponencial ante 429, 5xx o errores de conexión.
+
+    Parámetros:
+        endpoint (str): URL del endpoint `/repositories/<repo>/statements`.
+        tam_lote (int): Tripletas por petición.
+        workers (int): Peticiones simultáneas.
+        reintentos (int): Reintentos por lote.
+        comprimir (bool): Si se envía el cuerpo comprimido con gzip.
+        content_type (str): Formato del cuerpo ("application/n-triples" o "text/turtle").
+        timeout (float): Tiempo máximo por petición en segundos.
+    """
+
+    def __init__(
+        self,
+        endpoint=GRAPHDB_STATEMENTS,
+        tam_lote=50_000,
+        workers=4,
+        reintentos=5,
+        comprimir=True,
+        content_type="application/n-triples",
+        timeout=300.0,
+    ):
+        self.endpoint = endpoint
+        self.tam_lote = tam_lote
+        self.workers = workers
+        self.reintentos = reintentos
+        self.comprimir = comprimir
+        self.content_type = content_type
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=max(workers, 1))
+        self.session.mount("http://", adaptador)
+        self.session.mount("https://", adaptador)
+
+        self._lock = threading.Lock()
+        self.triples = 0
+        self.lotes = 0
+        self.bytes_enviados = 0
+        self.reintentados = 0
+        self.segundos = 0.0
+
+    def _enviar(self, lineas):
+        cuerpo = ("\n".join(lineas) + "\n").encode("utf-8")
+        cabeceras = {"Content-Type": f"{self.content_type}; charset=utf-8"}
+        if self.comprimir:
+            cuerpo = gzip.compress(cuerpo, compresslevel=5)
+            cabeceras["Content-Encoding"] = "gzip"
+
+        for intento in range(self.reintentos + 1):
+            try:
+                r = self.session.post(self.endpoint, data=cuerpo, headers=cabeceras, timeout=self.timeout)
+                if r.status_code < 300:
+                    break
+                if r.status_code not in _ESTADOS_REINTENTABLES:
+                    raise ErrorGraphDB(f"Error subiendo lote: {r.status_code} {r.text[:500]}")
+                motivo = f"{r.status_code} {r.text[:200]}"
+            except requests.RequestException as e:
+                motivo = repr(e)
+            if intento == self.reintentos:
+                raise ErrorGraphDB(f"Error subiendo lote tras {self.reintentos} reintentos: {motivo}")
+            with self._lock:
+                self.reintentados += 1
+            time.sleep(min(2 ** intento, 60))
+
+        with self._lock:
+            self.triples += len(lineas)
+            self.lotes += 1
+            self.bytes_enviados += len(cuerpo)
+        return len(lineas)
+
+    def subir(self, lineas):
+        """
+        Sube las tripletas de `lineas` (iterable de líneas N-Triples, sin salto de línea).
+        El iterable se consume por lotes: como mucho hay `2 * workers` lotes en memoria.
+
+        Retorna:
+            int: Tripletas subidas.
+        """
+        t0 = time.perf_counter()
+        subidas = 0
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            en_vuelo = deque()
+            for lote in en_lotes(lineas, self.tam_lote):
+                en_vuelo.append(pool.submit(self._enviar, lote))
+                if len(en_vuelo) >= 2 * self.workers:
+                    subidas += en_vuelo.popleft().result()
+            while en_vuelo:
+                subidas += en_vuelo.popleft().result()
+        self.segundos += time.perf_counter() - t0
+        return subidas
+
+    def informe(self):
+        return {
+            "triples": self.triples,
+            "lotes": self.lotes,
+            "bytes": self.bytes_enviados,
+            "reintentos": self.reintentados,
+            "segundos": round(self.segundos, 3),
+            "triples_por_segundo": round(self.triples / self.segundos, 2) if self.segundos else 0.0,
+        }
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,123 @@
+import time
+
+import numpy as np
+from elasticsearch.helpers import parallel_bulk
+
+
+class IndexadorMasivo:
+    """
+    Modo de indexación masiva en Elasticsearch.
+
+    Mientras está abierto (gestor de contexto) el índice tiene `refresh_interval` a -1 y
+    `number_of_replicas` a 0; al cerrarlo se restauran los valores anteriores y se fuerza un
+    refresh. Los documentos se envían con `parallel_bulk` en peticiones limitadas tanto por
+    número de documentos como por bytes (cada guía lleva tres vectores de 512 dimensiones,
+    así que el tamaño de una petición depende poco del texto). Los documentos rechazados se
+    reintentan uno a uno.
+
+    Parámetros:
+        es (Elasticsearch): Cliente de Elasticsearch.
+        index_name (str): Nombre del índice.
+        workers (int): Hilos de `parallel_bulk`.
+        chunk_docs (int): Documentos por petición bulk como máximo.
+        chunk_bytes (int): Bytes por petición bulk como máximo.
+        reintentos (int): Reintentos por documento rechazado.
+    """
+
+    def __init__(self, es, index_name, workers=4, chunk_docs=500, chunk_bytes=10 * 1024 * 1024, reintentos=3):
+        self.es = es
+        self.index_name = index_name
+        self.workers = workers
+        self.chunk_docs = chunk_docs
+        self.chunk_bytes = chunk_bytes
+        self.reintentos = reintentos
+        self._ajustes_originales = None
+
+        self.enviados = 0
+        self.indexados = 0
+        self.reintentados = 0
+        self.fallidos = []
+        self.segundos = 0.0
+
+    # ========= Ajustes del índice =========
+
+    def __enter__(self):
+        ajustes = self.es.indices.get_settings(index=self.index_name)[self.index_name]["settings"]["index"]
+        # None restablece el valor por defecto si el índice no tenía uno explícito
+        self._ajustes_originales = {
+            "refresh_interval": ajustes.get("refresh_interval"),
+            "number_of_replicas": ajustes.get("number_of_replicas"),
+        }
+        self.es.indices.put_settings(
+            index=self.index_name,
+            settings={"index": {"refresh_interval": "-1", "number_of_replicas": 0}},
+        )
+        return self
+
+    def __exit__(self, *exc):
+        if self._ajustes_originales is not None:
+            self.es.indices.put_settings(index=self.index_name, settings={"index": self._ajustes_originales})
+            self._ajustes_originales = None
+        self.es.indices.refresh(index=self.index_name)
+
+    # ========= Indexación =========
+
+    def _acciones(self, documentos, pendientes):
+        for doc in documentos:
+            self.enviados += 1
+            # El serializador de elasticsearch 8.7 no admite arrays de numpy 2
+            doc = {k: v.tolist() if isinstance(v, np.ndarray) else v for k, v in doc.items()}
+            pendientes[str(doc["id_asignatura"])] = doc
+            yield {"_index": self.index_name, "_id": doc["id_asignatura"], "_source": doc}
+
+    def _reintentar(self, doc, error):
+        for intento in range(self.reintentos):
+            self.reintentados += 1
+            time.sleep(min(2 ** intento, 30))
+            try:
+                self.es.index(index=self.index_name, id=doc["id_asignatura"], document=doc)
+                return True
+            except Exception as e:
+                error = e
+        self.fallidos.append((doc["id_asignatura"], str(error)))
+        print(f"Error indexando {doc['id_asignatura']}: {error}")
+        return False
+
+    def indexar(self, documentos):
+        """
+        Indexa los documentos (con `id_asignatura` como _id). `documentos` puede ser un
+        iterador: se consume a medida que `parallel_bulk` forma las peticiones y cada
+        documento se conserva solo hasta conocer su resultado.
+
+        Retorna:
+            int: Documentos indexados.
+        """
+        pendientes = {}
+        t0 = time.perf_counter()
+        indexados = 0
+        for ok, item in parallel_bulk(
+            self.es,
+            self._acciones(documentos, pendientes),
+            thread_count=self.workers,
+            chunk_size=self.chunk_docs,
+            max_chunk_bytes=self.chunk_bytes,
+            raise_on_error=False,
+            raise_on_exception=False,
+        ):
+            resultado = next(iter(item.values()), {})
+            doc = pendientes.pop(str(resultado.get("_id")), None)
+            if ok or (doc is not None and self._reintentar(doc, resultado.get("error"))):
+                indexados += 1
+        self.segundos += time.perf_counter() - t0
+        self.indexados += indexados
+        return indexados
+
+    def informe(self):
+        return {
+            "enviados": self.enviados,
+            "indexados": self.indexados,
+            "reintentos": self.reintentados,
+            "fallidos": len(self.fallidos),
+            "segundos": round(self.segundos, 3),
+            "docs_por_segundo": round(self.indexados / self.segundos, 2) if self.segundos else 0.0,
+        }
@@ -0,0 +1,98 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+ESTADO_EXTRAIDO = "extraido"
+ESTADO_CARGADO = "cargado"
+
+
+def sha256_archivo(ruta, tam_bloque=1 << 20):
+    """
+    Calcula el hash SHA-256 del contenido de un archivo leyéndolo por bloques.
+
+    Parámetros:
+        ruta (str | Path): Ruta del archivo.
+        tam_bloque (int): Tamaño de cada lectura en bytes.
+
+    Retorna:
+        str: Hash en hexadecimal.
+    """
+    h = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(tam_bloque), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+class Manifest:
+    """
+    Manifiesto de la ingesta incremental.
+
+    Guarda, por nombre de archivo, el hash SHA-256 del PDF, la versión de los extractores
+    con la que se procesó, el id de la asignatura que contiene y el estado de carga
+    ("extraido" o "cargado"). Se persiste como JSON y se reescribe de forma atómica.
+
+    Parámetros:
+        ruta (str | Path): Ruta del archivo JSON del manifiesto.
+    """
+
+    def __init__(self, ruta):
+        self.ruta = Path(ruta)
+        self.entradas = {}
+        if self.ruta.exists():
+            with open(self.ruta, encoding="utf-8") as f:
+                self.entradas = json.load(f)
+        self._hashes = {}
+
+    def planificar(self, rutas, version):
+        """
+        Compara los PDFs actuales con el manifiesto.
+
+        Parámetros:
+            rutas (list[str]): Rutas de los PDFs presentes en el directorio.
+            version (str): Versión actual de los extractores.
+
+        Retorna:
+            tuple[list[str], dict]: Rutas nuevas o modificadas (o cuya carga no terminó) y
+            entradas del manifiesto cuyos PDFs ya no existen, indexadas por nombre de archivo.
+        """
+        pendientes = []
+        presentes = set()
+        for ruta in rutas:
+            nombre = os.path.basename(ruta)
+            presentes.add(nombre)
+            sha = sha256_archivo(ruta)
+            self._hashes[nombre] = sha
+            entrada = self.entradas.get(nombre)
+            if (
+                entrada is None
+                or entrada.get("sha256") != sha
+                or entrada.get("version_extractor") != version
+                or entrada.get("estado") != ESTADO_CARGADO
+            ):
+                pendientes.append(ruta)
+
+        eliminados = {nombre: entrada for nombre, entrada in self.entradas.items() if nombre not in presentes}
+        return pendientes, eliminados
+
+    def marcar(self, ruta, version, id_asignatura, estado):
+        """Registra (o actualiza) la entrada de un PDF con el hash calculado en `planificar`."""
+        nombre = os.path.basename(ruta)
+        sha = self._hashes.get(nombre) or sha256_archivo(ruta)
+        self.entradas[nombre] = {
+            "sha256": sha,
+            "version_extractor": version,
+            "id_asignatura": id_asignatura,
+            "estado": estado,
+        }
+
+    def eliminar(self, nombre):
+        self.entradas.pop(nombre, None)
+
+    def guardar(self):
+        """Escribe el manifiesto en un archivo temporal y lo renombra sobre el definitivo."""
+        tmp = self.ruta.with_name(self.ruta.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.entradas, f, ensure_ascii=False, indent=2, sort_keys=True)
+        os.replace(tmp, self.ruta)
@@ -0,0 +1,152 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def rss_max_mb():
+    """
+    Pico de memoria residente (MB) de este proceso y del mayor de sus procesos hijos ya
+    terminados (los workers de extracción), o None si la plataforma no lo expone.
+    """
+    if resource is None:
+        return None
+    propio = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    hijos = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    # En Linux ru_maxrss está en KB
+    return round(max(propio, hijos) / 1024, 1)
+
+
+class Cronometro:
+    """
+    Mide tiempo real y tiempo de CPU del hilo actual entre `__enter__` y `__exit__`. El
+    tiempo de CPU es el del hilo para que los hilos de otras etapas no lo inflen.
+    """
+
+    def __enter__(self):
+        self._t0 = time.perf_counter()
+        self._cpu0 = time.thread_time()
+        self.segundos = 0.0
+        self.cpu = 0.0
+        return self
+
+    def __exit__(self, *exc):
+        self.segundos = time.perf_counter() - self._t0
+        self.cpu = time.thread_time() - self._cpu0
+
+
+class Perfilador:
+    """
+    Instrumentación de la ingesta: tiempo real y de CPU por etapa, perfil de cada guía
+    (tiempos por extractor y análisis de pdfplumber, medidos en `extraer_guia`) y pico de
+    memoria residente. Con `guardar` se escribe el informe completo en JSON y con
+    `imprimir_resumen` las etapas y las guías más lentas.
+    """
+
+    def __init__(self):
+        self.etapas = {}
+        self.guias = []
+        self._t0 = time.perf_counter()
+
+    @contextmanager
+    def etapa(self, nombre):
+        """
+        Mide una etapa. El tiempo de CPU es el del proceso: incluye los hilos auxiliares de
+        la etapa, pero no los procesos del pool de extracción.
+        """
+        t0 = time.perf_counter()
+        cpu0 = time.process_time()
+        try:
+            yield
+        finally:
+            registro = self.etapas.setdefault(nombre, {})
+            registro["segundos"] = round(registro.get("segundos", 0.0) + time.perf_counter() - t0, 3)
+            registro["cpu"] = round(registro.get("cpu", 0.0) + time.process_time() - cpu0, 3)
+            registro["rss_max_mb"] = rss_max_mb()
+
+    def anotar(self, etapa, **datos):
+        """Añade datos al registro de una etapa (informes de Flujo, de los cargadores...)."""
+        self.etapas.setdefault(etapa, {}).update(datos)
+
+    def agregar_guia(self, perfil):
+        """Añade el perfil de una guía (el que devuelve `extraer_guia`)."""
+        self.guias.append(perfil)
+
+    def mas_lentas(self, n=10):
+        return sorted(self.guias, key=lambda g: g["segundos"], reverse=True)[:n]
+
+    def informe(self, top=10):
+        totales = {}
+        for guia in self.guias:
+            for clave, valor in guia["pdfplumber"].items():
+                totales[clave] = totales.get(clave, 0) + valor
+        extractores = {}
+        for guia in self.guias:
+            for nombre, segundos in guia["extractores"].items():
+                extractores[nombre] = round(extractores.get(nombre, 0.0) + segundos, 3)
+        return {
+            "segundos": round(time.perf_counter() - self._t0, 3),
+            "rss_max_mb": rss_max_mb(),
+            "etapas": self.etapas,
+            "guias": {
+                "total": len(self.guias),
+                "segundos": round(sum(g["segundos"] for g in self.guias), 3),
+                "cpu": round(sum(g["cpu"] for g in self.guias), 3),
+                "pdfplumber": totales,
+                "extractores": extractores,
+                "mas_lentas": [g["archivo"] for g in self.mas_lentas(top)],
+                "detalle": self.guias,
+            },
+        }
+
+    def guardar(self, ruta, top=10):
+        tmp = f"{ruta}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.informe(top), f, ensure_ascii=False, indent=2)
+        os.replace(tmp, ruta)
+
+    def imprimir_resumen(self, top=10):
+        # Las etapas ejecutadas en un mismo flujo se miden juntas ("extract+embed+..."); las
+        # demás entradas solo tienen anotaciones
+        medidas = {nombre: registro for nombre, registro in self.etapas.items() if "segundos" in registro}
+        ancho = max([12, *(len(nombre) + 2 for nombre in medidas)])
+        print(f"{'etapa':<{ancho}}{'seg':>10}{'cpu':>10}{'rss MB':>10}")
+        for nombre, registro in medidas.items():
+            print(f"{nombre:<{ancho}}{registro['segundos']:>10}{registro.get('cpu', 0):>10}{registro.get('rss_max_mb') or '-':>10}")
+        if not self.guias:
+            return
+        print(f"Guías más lentas (de {len(self.guias)}):")
+        print(f"{'archivo':<40}{'seg':>8}{'cpu':>8}{'págs':>6}{'tablas':>8}  extractor más lento")
+        for guia in self.mas_lentas(top):
+            lento = max(guia["extractores"].items(), key=lambda kv: kv[1], default=("-", 0))
+            print(
+                f"{guia['archivo'][:39]:<40}{guia['segundos']:>8.2f}{guia['cpu']:>8.2f}"
+                f"{guia['paginas']:>6}{guia['pdfplumber'].get('tablas', 0):>8}  {lento[0]} ({lento[1]:.2f} s)"
+            )
+
+
+def perfilar(funcion, *args, salida=None, lineas=25):
+    """
+    Ejecuta `funcion(*args)` bajo cProfile, guarda las estadísticas en `salida` (formato de
+    pstats, legible con snakeviz o `python -m pstats`) e imprime las funciones con más
+    tiempo acumulado.
+
+    Retorna:
+        El resultado de la función.
+    """
+    perfil = cProfile.Profile()
+    resultado = perfil.runcall(funcion, *args)
+    if salida:
+        perfil.dump_stats(salida)
+    texto = io.StringIO()
+    pstats.Stats(perfil, stream=texto).sort_stats("cumulative").print_stats(lineas)
+    print(texto.getvalue())
+    return resultado
@@ -1,262 +1,79 @@
-import pandas as pd
+import argparse
+import copy
 import os
-import random
 import time
-import requests
+from collections import deque
+from contextlib import ExitStack, contextmanager
+from functools import cached_property
+from itertools import chain
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pyarrow as pa
+
 from utils import (
     extract_asignatura,
     scrapBibliography,
-    scrapGoogleScholar,
-    extraer_competencias,
-    extraer_conocimientos_previos,
+    extraer_texto_competencias,
+    extraer_texto_conocimientos_previos,
     scrapProfesores,
     estructurar_temario,
-    extraer_descripcion_asignatura,
+    extraer_texto_descripcion,
     extraer_temario_asignatura,
-    bulk_index_data,
-    uri,
-    doc_to_triples
+    bulk_delete_data,
+    borrar_triples_asignaturas,
+    ParsedGuide,
+    VERSION_EXTRACTOR
 )
 from elasticsearch import Elasticsearch
-from sqlalchemy import create_engine, text
-from sentence_transformers import SentenceTransformer
-from rdflib import Graph, Literal, RDF, URIRef, Namespace, XSD
-from tables import create_tables
+from sqlalchemy import create_engine
+from tables import create_tables, copiar_upsert, asignar_ids, borrar_enlaces_asignaturas, sellar_version
+from manifest import Manifest, ESTADO_EXTRAIDO, ESTADO_CARGADO
+from relaciones import AcumuladorRelaciones, COLUMNAS
+from embeddings import MODELO_EMBEDDINGS, DIM_EMBEDDINGS, CAMPOS_VECTOR, ModeloPerezoso, vectorizar_documentos
+from chatbot.core.embedding_cache import EmbeddingCache
+from etapas import Flujo, en_lotes
+from indexacion import IndexadorMasivo
+from graphdb import GRAPHDB_STATEMENTS, CargadorGraphDB
+from tripletas import tripletas_tablas, tripletas_contenido
+from bibliografia import SCHOLAR_URL, CacheBibliografia, ResolutorBibliografia, normalizar_consulta
+from artefactos import Artefactos
+from perfilado import Cronometro, Perfilador, perfilar, rss_max_mb
 
 # Variables iniciales
 directory = "Guias Docentes"
-
-model = SentenceTransformer('distiluse-base-multilingual-cased-v2')
-
-df_bibliografia_total = pd.DataFrame()
-df_bibliografia_asignatura = pd.DataFrame()
-df_profesores_total = pd.DataFrame()
-df_profesores_asignaturas_total = pd.DataFrame()
-df_asignaturas_total = pd.DataFrame()
-df_escuelas_total = pd.DataFrame()
-df_titulaciones_total = pd.DataFrame()
-df_titulaciones_escuelas_total = pd.DataFrame()
-df_titulaciones_asignaturas_total = pd.DataFrame()
-
-error_bibliografias = False
-
-documentos = []
-
-################################
-# Paso 1: Extrarer informacion #
-################################
-for file in os.listdir(directory):
-    if file.endswith(".pdf"):  
-        pdf_path = os.path.join(directory, file)
-        #############
-        # Metadatos #
-        #############
-
-        # Asignatura
-        df_asignatura = extract_asignatura(pdf_path)
-        id_asignatura, nombre_asignatura = df_asignatura['Nombre de la asignatura'].values[0].split(" - ", maxsplit=1)
-        num_creditos = df_asignatura['No de créditos'].values[0].split(" ")[0]
-        curso_texto = df_asignatura['Curso'].values[0]
-        semestre_texto = df_asignatura['Semestre'].values[0]
-        idioma = df_asignatura['Idioma de impartición'].values[0]
-        plan_estudios, nombre_titulacion = df_asignatura['Titulación'].values[0].split(" - ", maxsplit=1)
-        id_escuela, nombre_escuela = df_asignatura['Centro responsable de la\ntitulación'].values[0].split(" - ", maxsplit=1)
-        curso_academico = df_asignatura['Curso académico'].values[0]
-        df_asignatura = pd.DataFrame([{
-            "id": id_asignatura,
-            "nombre": nombre_asignatura,
-            "numero_creditos": num_creditos,
-            "agno_academico": curso_texto,
-            "semestre": semestre_texto,
-            "idioma": idioma
-        }])
-        
-        # Titulaciones 
-        df_asignaturas_total = pd.concat([df_asignaturas_total, df_asignatura], ignore_index=True)
-        if df_titulaciones_total.empty or plan_estudios not in df_titulaciones_total['id'].values:
-            df_titulacion = pd.DataFrame([{
-                "id": plan_estudios,
-                "nombre": nombre_titulacion,
-                "tipo_estudio": "Grado" if "Grado" in nombre_titulacion else "Máster"
-            }])
-            df_titulaciones_total = pd.concat([df_titulaciones_total, df_titulacion], ignore_index=True)
-
-        # Escuelas
-        if df_escuelas_total.empty or id_escuela not in df_escuelas_total['id'].values:
-            df_escuela = pd.DataFrame([{
-                "id": id_escuela,
-                "nombre": nombre_escuela,
-                "entidad_dbpedia": "http://es.dbpedia.org/resource/Escuela_Técnica_Superior_de_Ingeniería_de_Sistemas_Informáticos_(Universidad_Politécnica_de_Madrid)"
-            }])
-            df_escuelas_total = pd.concat([df_escuelas_total, df_escuela], ignore_index=True)
-        
-        # Escuelas - Titulaciones
-        if df_titulaciones_escuelas_total.empty or df_titulaciones_escuelas_total.get((df_titulaciones_escuelas_total['titulacion_id'] == plan_estudios) & (df_titulaciones_escuelas_total['escuela_id'] == id_escuela)).any().any() == False:
-            df_titulacion_escuela = pd.DataFrame([{
-                "titulacion_id": plan_estudios,
-                "escuela_id": id_escuela
-            }])
-            df_titulaciones_escuelas_total = pd.concat([df_titulaciones_escuelas_total, df_titulacion_escuela], ignore_index=True)
-        
-        # Titulaciones -Asignatura
-        df_titulacion_asignatura = pd.DataFrame([{
-            "titulacion_id": plan_estudios,
-            "asignatura_id": id_asignatura
-        }])
-        df_titulaciones_asignaturas_total = pd.concat([df_titulaciones_asignaturas_total, df_titulacion_asignatura], ignore_index=True)
-        
-        # Bibliografia
-        if not error_bibliografias:
-            df_scrap_bibliografia = scrapBibliography(pdf_path, {"nombre", "tipo", "observaciones"})  
-            dfs_bibliografia = []
-            for nombre in df_scrap_bibliografia['Nombre']:
-                try:
-                    dict_bibliografia = scrapGoogleScholar(nombre)
-                    if dict_bibliografia and "Titulo" in dict_bibliografia:
-                        df_bibliografia = pd.DataFrame([dict_bibliografia])
-                        dfs_bibliografia.append(df_bibliografia)
-                except Exception as e:
-                    print(f"Error con {nombre}: {e}")
-                    error_bibliografias = True
-                    break
-                time.sleep(random.uniform(5, 20))
-
-            if dfs_bibliografia:
-                df_bibliografia = pd.concat(dfs_bibliografia, ignore_index=True)
-                df_bibliografia_total =  pd.concat([df_bibliografia_total, df_bibliografia], ignore_index=True).drop_duplicates(subset=["Titulo"])
-                list_bibliografias = df_bibliografia_total['Titulo'].dropna().unique()
-                df_bibliografia_asignatura = pd.concat([df_bibliografia_asignatura,pd.DataFrame({'Titulo':list_bibliografias, 'id_asignatura': [id_asignatura]*len(list_bibliografias)})])
-        
-        
-        # Profesores
-        df_profesores = scrapProfesores(pdf_path, {"nombre", "correo electrónico"})
-        if not df_profesores_total.empty:
-            df_profesores_total = pd.concat([df_profesores_total, df_profesores], ignore_index=True)
-            df_profesores_total = df_profesores_total.drop_duplicates(
-                subset="Correo electrónico",
-                keep="first",
-                ignore_index=True
-            )
-        else:
-            df_profesores_total = df_profesores.copy()
-
-        # Profesores - Asignaturas
-        df_profesores_asignaturas = pd.DataFrame()
-        for _, row in df_profesores.iterrows():
-            profesor_correo = row["Correo electrónico"]
-            try:
-                profesor_id = df_profesores_total.index[df_profesores_total["Correo electrónico"] == profesor_correo][0]
-            except IndexError:
-                continue
-            df_temp = pd.DataFrame([{
-                "profesor_id": profesor_id,
-                "asignatura_id": id_asignatura
-            }])
-            df_profesores_asignaturas = pd.concat([df_profesores_asignaturas, df_temp], ignore_index=True)
-        if not df_profesores_asignaturas_total.empty:
-            df_profesores_asignaturas_total = pd.concat([df_profesores_asignaturas_total, df_profesores_asignaturas], ignore_index=True)
-        else:
-            df_profesores_asignaturas_total = df_profesores_asignaturas.copy()
-        
-        print(f"Metadatos descargados para el archivo {nombre_asignatura}")
-
-        #############
-        # Contenido #
-        #############
-
-        # Contenidos previos
-        conocimientos_previos, vector_conocimientos_previos = extraer_conocimientos_previos(pdf_path, model)
-
-        # Competencias 
-        competencias, vector_competencias = extraer_competencias(pdf_path, model)
-
-        # Descripcion
-        descripcion_asignatura, vector_descripcion = extraer_descripcion_asignatura(pdf_path, model)
-
-        # Temario
-        temario_estructurado = estructurar_temario(extraer_temario_asignatura(pdf_path))
-
-        documento = {
-            "id_asignatura":id_asignatura,
-            "nombre_asignatura": nombre_asignatura,
-            "competencias":competencias,
-            "competencias_vector":vector_competencias,
-            "descripcion_asignatura": descripcion_asignatura,
-            "descripcion_vector": vector_descripcion,
-            "temario":temario_estructurado,
-            "conocimientos_previos": conocimientos_previos,
-            "conocimientos_previos_vector": vector_conocimientos_previos,
-        }
-        documentos.append(documento)
-        print(f"Contenido descargado  para el archivo {nombre_asignatura}")
-
-print("Datos descargados")
-
-#################################
-# Paso 2: Almacenar informacion #
-#################################
-
-# Almacenar Metadatos -> PostGreSQL
-usuario = "userPSQL"
-contraseña = "passPSQL"
-host = "localhost"  
-puerto = "5432"
-base_datos = "postgres"
-
-engine = create_engine(f"postgresql+psycopg2://{usuario}:{contraseña}@{host}:{puerto}/{base_datos}")
-create_tables(engine)
-
-# Cargar DataFrame Asignaturas
-df_asignaturas_total.to_sql('asignaturas', engine, if_exists="append", index=False)
-#df_asignaturas_total.to_csv('df_asignaturas_total.csv')
-
-# Cargar DataFrame Titulaciones
-df_titulaciones_total.to_sql('titulaciones', engine, if_exists="append", index=False)
-#df_titulaciones_total.to_csv('df_titulaciones_total.csv')
-
-# Cargar DataFrame Escuelas
-df_escuelas_total.to_sql('escuelas', engine, if_exists="append", index=False)
-#df_escuelas_total.to_csv('df_escuelas_total.csv')
-
-# Cargar DataFrame Titulaciones - Asignaturas
-df_titulaciones_asignaturas_total.to_sql('titulacionesasignaturas', engine, if_exists="append", index=False)
-#df_titulaciones_asignaturas_total.to_csv('df_titulaciones_asignaturas_total.csv')
-
-# Cargar DataFrame Titulaciones - Escuelas
-df_titulaciones_escuelas_total.to_sql('titulacionesescuelas', engine, if_exists="append", index=False)
-#df_titulaciones_escuelas_total.to_csv('df_titulaciones_escuelas_total.csv')
-
-# Cargar DataFrame Profesores
-df_profesores_total = df_profesores_total.rename(columns={
-    "Nombre": "nombre",
-    "Correo electrónico": "correo_electronico"
-})
-df_profesores_total = df_profesores_total.reset_index().rename(columns={'index': 'id'})
-df_profesores_total.to_sql('profesores', engine, if_exists="append", index=False)
-#df_profesores_total.to_csv('df_profesores_total.csv')
-
-# Cargar DataFrame Profesores - Asignaturas
-df_profesores_asignaturas_total.to_sql('profesoresasignaturas', engine, if_exists="append", index=False)
-#df_profesores_asignaturas_total.to_csv('df_profesores_asignaturas_total.csv')
-              
-# Cargar DataFrame Bibliografias
-df_bibliografia_total['id'] = df_bibliografia_total.index
-df_bibliografia_total.to_sql('bibliografias', engine, if_exists="append", index=False)
-#df_bibliografia_total.to_csv('df_bibliografia_total.csv')
-
-# Cargar DataFrame Bibliografias - Asignaturas
-if not df_bibliografia_total.empty:
-    df_bibliografia_asignatura = pd.merge(df_bibliografia_asignatura, df_bibliografia_total, on= "Titulo", how ="inner")
-    df_bibliografia_asignatura = df_bibliografia_asignatura[["id", "id_asignatura"]].rename(columns={"id": "bibliografia_id"})    
-    df_bibliografia_asignatura.to_sql('bibliografiaasignaturas', engine, if_exists="append", index=False)
-    #df_bibliografia_asignatura.to_csv('df_bibliografia_asignatura.csv')
-
-# Almacenar Contenido -> ElasticSearch
-es = Elasticsearch("http://localhost:9200")
-
-index_name = "guias_docentes"
-
-mapping = {
+manifest_path = "manifest_ingesta.json"
+embedding_cache_dir = ".cache/embeddings"
+bibliografia_cache_path = ".cache/bibliografia.sqlite"
+artefactos_dir = ".artefactos"
+
+# Se incrementa cuando cambia el formato de los artefactos intermedios
+VERSION_ARTEFACTOS = "1"
+
+
+def _esquema_temario(niveles):
+    """Tipo Arrow del temario: temas con subtemas anidados hasta `niveles` niveles (1., 1.1., ...)."""
+    subtemas = pa.list_(pa.null())
+    for _ in range(niveles):
+        subtemas = pa.list_(pa.struct([("numero", pa.string()), ("titulo", pa.string()), ("subtemas", subtemas)]))
+    return subtemas
+
+
+# Esquema de `contenido.parquet`, fijado de antemano para escribirlo por lotes: un lote en
+# el que un campo siempre está vacío no cambia su tipo
+ESQUEMA_CONTENIDO = pa.schema([
+    ("id_asignatura", pa.string()),
+    ("nombre_asignatura", pa.string()),
+    ("competencias", pa.list_(pa.struct([("codigo", pa.string()), ("texto", pa.string())]))),
+    ("texto_competencias", pa.string()),
+    ("descripcion_asignatura", pa.string()),
+    ("temario", _esquema_temario(4)),
+    ("conocimientos_previos", pa.string()),
+])
+
+INDEX_NAME = "guias_docentes"
+
+MAPPING = {
     "mappings": {
         "properties": {
             "id_asignatura": {"type": "keyword"},
@@ -273,7 +90,7 @@ mapping = {
 
             "competencias_vector":{
                 "type": "dense_vector",
-                "dims": 512,
+                "dims": DIM_EMBEDDINGS,
                 "index": True,
                 "similarity": "cosine"
             },
@@ -282,7 +99,7 @@ mapping = {
 
             "descripcion_vector":{
                 "type": "dense_vector",
-                "dims": 512,
+                "dims": DIM_EMBEDDINGS,
                 "index": True,
                 "similarity": "cosine"
             },
@@ -301,12 +118,12 @@ mapping = {
                     }
                 }
             },
-            
+
             "conocimientos_previos":  {"type": "text"},
 
             "conocimientos_previos_vector":{
                 "type": "dense_vector",
-                "dims": 512,
+                "dims": DIM_EMBEDDINGS,
                 "index": True,
                 "similarity": "cosine"
             },
@@ -314,121 +131,842 @@ mapping = {
         }
     }
 }
-if not es.indices.exists(index=index_name):
-    es.indices.create(index=index_name, body=mapping)
-bulk_index_data(es, documentos, index_name)
-
-print("Datos almacenados")
-
-###############################
-# Paso 2: Enlazar informacion #
-###############################
-
-UPM = Namespace("http://upm.es/ontology/")
-DBO = Namespace("http://dbpedia.org/ontology/")
-FOAF = Namespace("http://xmlns.com/foaf/0.1/")
-graphdb_repo = "http://localhost:8000/repositories/asignaturas/statements"
-
-g = Graph()
-g.bind("upm", UPM)
-g.bind("dbo", DBO)
-g.bind("foaf", FOAF)
-
-with engine.connect() as conn:
-    # Escuelas
-    result = conn.execute(text("SELECT id, nombre, entidad_dbpedia FROM Escuelas;"))
-    for id, nombre, entidad in result:
-        escuela_uri = uri(UPM, "Escuela", id)
-        g.add((escuela_uri, RDF.type, UPM.Escuela))
-        g.add((escuela_uri, UPM.nombre, Literal(nombre, datatype=XSD.string)))
-        g.add((escuela_uri, UPM.codigo, Literal(id, datatype=XSD.integer)))
-        if entidad:
-            g.add((escuela_uri, UPM.entidad_dbpedia, URIRef(entidad)))
-
-    # Titulaciones
-    result = conn.execute(text("SELECT id, nombre, tipo_estudio FROM Titulaciones;"))
-    for id, nombre, tipo in result:
-        tit_uri = uri(UPM, "Titulacion", id)
-        g.add((tit_uri, RDF.type, UPM.Titulacion))
-        g.add((tit_uri, UPM.nombre, Literal(nombre, datatype=XSD.string)))
-        g.add((tit_uri, UPM.codigoTitulacion, Literal(id, datatype=XSD.string)))
-        g.add((tit_uri, UPM.tipo, Literal(tipo, datatype=XSD.string)))
-
-    # Asignaturas 
-    result = conn.execute(text("SELECT id, nombre, numero_creditos, semestre, idioma FROM Asignaturas;"))
-    for (id, nombre, creditos, semestre, idioma) in result:
-        asig_uri = uri(UPM, "Asignatura", id)
-        g.add((asig_uri, RDF.type, UPM.Asignatura))
-        g.add((asig_uri, UPM.nombre, Literal(nombre, datatype=XSD.string)))
-        g.add((asig_uri, UPM.creditosECTS, Literal(creditos, datatype=XSD.integer)))
-        if semestre: g.add((asig_uri, UPM.semestre, Literal(semestre, datatype=XSD.string)))
-        if idioma: g.add((asig_uri, UPM.idioma, Literal(idioma, datatype=XSD.string)))
-
-    # Profesores
-    result = conn.execute(text("SELECT id, nombre, correo_electronico FROM Profesores;"))
-    for id, nombre, correo in result:
-        prof_uri = uri(UPM, "Profesor", id)
-        g.add((prof_uri, RDF.type, UPM.Profesor))
-        g.add((prof_uri, UPM.nombre, Literal(nombre, datatype=XSD.string)))
-        g.add((prof_uri, UPM.correo, Literal(correo, datatype=XSD.string)))
-
-    # Recursos bibliográficos 
-    result = conn.execute(text("SELECT * FROM Bibliografias;"))
-    for id, titulo, autor, url in result:
-        rec_uri = uri(UPM, "RecursoBibliografico", id)
-        g.add((rec_uri, RDF.type, UPM.RecursoBibliografico))
-        g.add((rec_uri, UPM.titulo, Literal(titulo, datatype=XSD.string)))
-        g.add((rec_uri, UPM.autor, Literal(autor, datatype=XSD.string)))
-        if url:
-            g.add((rec_uri, UPM.direccionURL, Literal(url, datatype=XSD.string)))
-
-    # Relaciones Titulaciones ↔ Escuelas 
-    result = conn.execute(text("SELECT titulacion_id, escuela_id FROM TitulacionesEscuelas;"))
-    for tit_id, esc_id in result:
-        g.add((uri(UPM, "Escuela", esc_id), UPM.imparteTitulacion, uri(UPM, "Titulacion", tit_id)))
-
-    # Relaciones Titulaciones ↔ Asignaturas 
-    result = conn.execute(text("SELECT titulacion_id, asignatura_id FROM TitulacionesAsignaturas;"))
-    for tit_id, asig_id in result:
-        g.add((uri(UPM, "Titulacion", tit_id), UPM.incluyeAsignatura, uri(UPM, "Asignatura", asig_id)))
-
-    # Relaciones Asignaturas ↔ Profesores 
-    result = conn.execute(text("SELECT asignatura_id, profesor_id FROM ProfesoresAsignaturas;"))
-    for asig_id, prof_id in result:
-        g.add((uri(UPM, "Asignatura", asig_id), UPM.tieneProfesor, uri(UPM, "Profesor", prof_id)))
-
-    # Relaciones Asignaturas ↔ Bibliografias 
-    result = conn.execute(text("SELECT * FROM BibliografiaAsignaturas;"))
-    for asig_id, bib_id in result:
-        g.add((uri(UPM, "Asignatura", asig_id), UPM.tieneRecursoBibliografico, uri(UPM, "RecursoBibliografico", bib_id)))
-
-all_triples = []
-for s, p, o in g:
-    triple_ttl = f"<{s}> <{p}> "
-    if isinstance(o, URIRef):
-        triple_ttl += f"<{o}> ."
-    else:
-        triple_ttl += f"\"\"\"{o}\"\"\" ."
-    all_triples.append(triple_ttl)
-
-query = {"match_all": {}}
-res = es.search(index=index_name, query=query, size=1000)
-for hit in res['hits']['hits']:
-    doc = hit['_source']
-    all_triples.extend(doc_to_triples(doc))
-
-batch_size = 50
-for i in range(0, len(all_triples), batch_size):
-    batch = all_triples[i:i + batch_size]
-    sparql_update = "INSERT DATA { " + "\n".join(batch) + " }"
-    r = requests.post(
-        graphdb_repo,
-        data={"update": sparql_update},
-        auth=None
+
+
+def mapping_indice(compacto=False, m=None, ef_construction=None):
+    """
+    Mapping del índice de guías.
+
+    Por defecto es `MAPPING`: vectores float32 con HNSW y los vectores guardados en
+    `_source`. El perfil compacto (Elasticsearch 8.12 o posterior) indexa los vectores con
+    `int8_hnsw`, que cuantiza cada dimensión a un byte y reduce a una cuarta parte la
+    memoria que necesita el grafo, y los excluye de `_source`, de modo que no ocupan disco
+    ni viajan en las respuestas. Sin vectores en `_source` el índice no se puede reindexar
+    desde sí mismo: se vuelve a cargar desde los artefactos de la etapa `embed`.
+
+    Parámetros:
+        compacto (bool): Si se usa el perfil compacto.
+        m (int | None): Vecinos por nodo del grafo HNSW (16 por defecto en Elasticsearch).
+        ef_construction (int | None): Candidatos al construir el grafo (100 por defecto).
+
+    Retorna:
+        dict: Cuerpo de creación del índice.
+    """
+    mapping = copy.deepcopy(MAPPING)
+    opciones = {}
+    if compacto:
+        opciones["type"] = "int8_hnsw"
+        mapping["mappings"]["_source"] = {"excludes": list(CAMPOS_VECTOR)}
+    elif m is not None or ef_construction is not None:
+        opciones["type"] = "hnsw"
+    if m is not None:
+        opciones["m"] = m
+    if ef_construction is not None:
+        opciones["ef_construction"] = ef_construction
+    if opciones:
+        for campo in CAMPOS_VECTOR:
+            mapping["mappings"]["properties"][campo]["index_options"] = opciones
+    return mapping
+
+
+def extraer_guia(pdf_path):
+    """
+    Extrae toda la información de una guía docente sin acceder a red ni al modelo de embeddings.
+
+    Es la unidad de trabajo de la ingesta paralela: se ejecuta en un proceso del pool y
+    devuelve únicamente tipos planos (dict, list, str) para que el proceso padre los combine.
+
+    Parámetros:
+        pdf_path (str): Ruta del archivo PDF.
+
+    Retorna:
+        dict: Registros de asignatura, titulación, escuela, bibliografía, profesores y
+        contenido, y el perfil de la extracción (tiempos por extractor y llamadas a pdfplumber).
+    """
+    # Tiempo real y de CPU por extractor, para localizar las guías y pasos más lentos
+    extractores = {}
+
+    @contextmanager
+    def medir(nombre):
+        with Cronometro() as c:
+            yield
+        extractores[nombre] = round(c.segundos, 4)
+
+    # Se analiza el PDF una sola vez y todos los extractores reutilizan el resultado
+    with Cronometro() as total, ParsedGuide(pdf_path) as guia:
+        # Asignatura
+        with medir("asignatura"):
+            df_asignatura = extract_asignatura(guia)
+        id_asignatura, nombre_asignatura = df_asignatura['Nombre de la asignatura'].values[0].split(" - ", maxsplit=1)
+        num_creditos = df_asignatura['No de créditos'].values[0].split(" ")[0]
+        curso_texto = df_asignatura['Curso'].values[0]
+        semestre_texto = df_asignatura['Semestre'].values[0]
+        idioma = df_asignatura['Idioma de impartición'].values[0]
+        plan_estudios, nombre_titulacion = df_asignatura['Titulación'].values[0].split(" - ", maxsplit=1)
+        id_escuela, nombre_escuela = df_asignatura['Centro responsable de la\ntitulación'].values[0].split(" - ", maxsplit=1)
+
+        # Bibliografia (solo los nombres; el enriquecimiento con Google Scholar lo hace el padre)
+        with medir("bibliografia"):
+            df_scrap_bibliografia = scrapBibliography(guia, {"nombre", "tipo", "observaciones"})
+        bibliografia = df_scrap_bibliografia['Nombre'].tolist() if not df_scrap_bibliografia.empty else []
+
+        # Profesores
+        with medir("profesores"):
+            df_profesores = scrapProfesores(guia, {"nombre", "correo electrónico"})
+        profesores = df_profesores.to_dict("records") if not df_profesores.empty else []
+
+        # Contenido
+        with medir("conocimientos_previos"):
+            conocimientos_previos = extraer_texto_conocimientos_previos(guia)
+        with medir("competencias"):
+            competencias, texto_competencias = extraer_texto_competencias(guia)
+        with medir("descripcion"):
+            descripcion_asignatura = extraer_texto_descripcion(guia)
+        with medir("temario"):
+            temario_estructurado = estructurar_temario(extraer_temario_asignatura(guia))
+
+    perfil = {
+        "archivo": os.path.basename(pdf_path),
+        "id_asignatura": id_asignatura,
+        "paginas": len(guia),
+        "segundos": round(total.segundos, 4),
+        "cpu": round(total.cpu, 4),
+        "extractores": extractores,
+        "pdfplumber": dict(guia.contadores),
+        # Pico del proceso que extrae (el worker del pool), no solo de esta guía
+        "rss_max_mb": rss_max_mb(),
+    }
+
+    return {
+        "asignatura": {
+            "id": id_asignatura,
+            "nombre": nombre_asignatura,
+            "numero_creditos": num_creditos,
+            "agno_academico": curso_texto,
+            "semestre": semestre_texto,
+            "idioma": idioma
+        },
+        "titulacion": {
+            "id": plan_estudios,
+            "nombre": nombre_titulacion,
+            "tipo_estudio": "Grado" if "Grado" in nombre_titulacion else "Máster"
+        },
+        "escuela": {
+            "id": id_escuela,
+            "nombre": nombre_escuela,
+            "entidad_dbpedia": "http://es.dbpedia.org/resource/Escuela_Técnica_Superior_de_Ingeniería_de_Sistemas_Informáticos_(Universidad_Politécnica_de_Madrid)"
+        },
+        "bibliografia": bibliografia,
+        "profesores": profesores,
+        "contenido": {
+            "id_asignatura": id_asignatura,
+            "nombre_asignatura": nombre_asignatura,
+            "competencias": competencias,
+            "texto_competencias": texto_competencias,
+            "descripcion_asignatura": descripcion_asignatura,
+            "temario": temario_estructurado,
+            "conocimientos_previos": conocimientos_previos,
+        },
+        "perfil": perfil,
+    }
+
+
+def extraer_guias(rutas, workers=1):
+    """
+    Aplica `extraer_guia` a cada ruta, en serie o repartiendo los PDFs en un pool de procesos.
+
+    Los resultados se devuelven siempre en el mismo orden que `rutas`, de modo que una
+    ejecución paralela produce exactamente la misma salida que una en serie. Como mucho
+    hay `2 * workers` guías en vuelo, para que un consumidor lento no acumule resultados.
+    """
+    if workers <= 1:
+        yield from map(extraer_guia, rutas)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        en_vuelo = deque()
+        for ruta in rutas:
+            en_vuelo.append(pool.submit(extraer_guia, ruta))
+            if len(en_vuelo) >= 2 * workers:
+                yield en_vuelo.popleft().result()
+        while en_vuelo:
+            yield en_vuelo.popleft().result()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Ingesta de las guías docentes en PostgreSQL, Elasticsearch y GraphDB.",
+        epilog=(
+            f"Etapas: {', '.join(ETAPAS)}. Sin --from ni --only se reanuda desde la primera "
+            "etapa no completada de la última ejecución (o se empieza una nueva). Las etapas que "
+            "se ejecutan junto con extract consumen sus lotes a medida que se extraen, salvo con --por-etapas."
+        ),
     )
-    if r.status_code != 204:
-        print("Error subiendo batch:", r.status_code, r.text)
+    parser.add_argument("--from", dest="desde", choices=ETAPAS, help="Ejecuta desde esta etapa hasta el final, reutilizando los artefactos anteriores.")
+    parser.add_argument("--only", dest="solo", nargs="+", choices=ETAPAS, help="Ejecuta solo estas etapas.")
+    parser.add_argument("--por-etapas", action="store_true", help="Ejecuta cada etapa al terminar la anterior, sin solapar las cargas con la extracción (si falla una carga, las etapas anteriores quedan completadas).")
+    parser.add_argument("--artefactos", default=artefactos_dir, help="Directorio de los artefactos intermedios de cada etapa.")
+    parser.add_argument("--directorio", default=directory, help="Carpeta con las guías docentes en PDF.")
+    parser.add_argument("--workers", type=int, default=1, help="Número de procesos para extraer los PDFs (1 = en serie).")
+    parser.add_argument("--manifest", default=manifest_path, help="Manifiesto con el hash y estado de carga de cada guía.")
+    parser.add_argument("--batch-size", type=int, default=64, help="Tamaño de lote al calcular los embeddings.")
+    parser.add_argument("--lote-embeddings", type=int, default=512, help="Guías cuyos textos se vectorizan juntos (se acumulan lotes de --lote hasta reunirlas).")
+    parser.add_argument("--cache-embeddings", default=embedding_cache_dir, help="Directorio de la caché persistente de embeddings ('' para desactivarla).")
+    parser.add_argument("--lote", type=int, default=32, help="Guías por lote en cada etapa.")
+    parser.add_argument("--capacidad", type=int, default=64, help="Elementos máximos en cada cola de la extracción.")
+    parser.add_argument("--es-workers", type=int, default=4, help="Hilos de parallel_bulk al indexar en Elasticsearch.")
+    parser.add_argument("--es-chunk-docs", type=int, default=500, help="Documentos por petición bulk como máximo.")
+    parser.add_argument("--es-chunk-mb", type=float, default=10, help="Megabytes por petición bulk como máximo.")
+    parser.add_argument("--indice-compacto", action="store_true", help="Crea el índice con vectores int8_hnsw y sin vectores en _source (solo al crearlo).")
+    parser.add_argument("--hnsw-m", type=int, default=None, help="Parámetro m de HNSW de los campos vectoriales (solo al crear el índice).")
+    parser.add_argument("--hnsw-ef-construction", type=int, default=None, help="Parámetro ef_construction de HNSW (solo al crear el índice).")
+    parser.add_argument("--graphdb-url", default=GRAPHDB_STATEMENTS, help="Endpoint statements del repositorio de GraphDB.")
+    parser.add_argument("--graphdb-lote", type=int, default=50_000, help="Tripletas por petición a GraphDB.")
+    parser.add_argument("--graphdb-workers", type=int, default=4, help="Peticiones simultáneas a GraphDB.")
+    parser.add_argument("--cache-bibliografia", default=bibliografia_cache_path, help="Caché persistente de referencias de Google Scholar ('' para desactivarla).")
+    parser.add_argument("--scholar-url", default=SCHOLAR_URL, help="URL base de Google Scholar (o de un servidor local equivalente).")
+    parser.add_argument("--scholar-tasa", type=float, default=0.2, help="Peticiones por segundo a Google Scholar.")
+    parser.add_argument("--scholar-concurrencia", type=int, default=4, help="Peticiones simultáneas a Google Scholar.")
+    parser.add_argument("--completo", action="store_true", help="Reprocesa todas las guías aunque no hayan cambiado.")
+    parser.add_argument("--perfil", default=None, help="Archivo JSON en el que guardar el informe de perfilado de la ejecución.")
+    parser.add_argument("--perfil-top", type=int, default=10, help="Guías más lentas que se muestran en el resumen.")
+    parser.add_argument("--cprofile", metavar="PDF", default=None, help="Perfila con cProfile la extracción de este PDF y termina, sin ejecutar las etapas.")
+    parser.add_argument("--cprofile-salida", default="extraccion.prof", help="Archivo de estadísticas de pstats de --cprofile.")
+    args = parser.parse_args()
+    if args.desde and args.solo:
+        parser.error("--from y --only no se pueden combinar")
+    return args
+
+
+class Contexto:
+    """
+    Argumentos, artefactos, perfilador y conexiones compartidos por las etapas. Las
+    conexiones a PostgreSQL y Elasticsearch solo se abren si alguna etapa las usa.
+    """
+
+    def __init__(self, args, artefactos):
+        self.args = args
+        self.artefactos = artefactos
+        self.perfilador = Perfilador()
+
+    @cached_property
+    def engine(self):
+        usuario = "userPSQL"
+        contraseña = "passPSQL"
+        host = "localhost"
+        puerto = "5432"
+        base_datos = "postgres"
+
+        engine = create_engine(f"postgresql+psycopg2://{usuario}:{contraseña}@{host}:{puerto}/{base_datos}")
+        create_tables(engine)
+        return engine
+
+    @cached_property
+    def es(self):
+        es = Elasticsearch("http://localhost:9200")
+        if not es.indices.exists(index=INDEX_NAME):
+            mapping = mapping_indice(self.args.indice_compacto, self.args.hnsw_m, self.args.hnsw_ef_construction)
+            es.indices.create(index=INDEX_NAME, body=mapping)
+        return es
+
+
+############################
+# Ejecución en flujo       #
+############################
+# Cada etapa posterior a extract se define como un paso que procesa lotes de guías
+# ({"contenidos", "tablas", "ids"}) y se abre con un gestor de contexto que, al cerrarse
+# sin errores, escribe los artefactos de la etapa. Ejecutada por separado, la etapa lee
+# sus lotes de los artefactos de las anteriores; cuando varias etapas se ejecutan a
+# continuación de extract, sus pasos se encadenan en el mismo Flujo que la extracción y
+# cada lote se carga en PostgreSQL, GraphDB y Elasticsearch mientras se analizan los PDFs
+# siguientes (ver `etapa_extract`).
+
+# Entidades con id sustituto: (tabla, columna natural, tabla de enlace, columna del enlace)
+IDS_SUSTITUTOS = [
+    ("profesores", "correo_electronico", "profesoresasignaturas", "profesor_id"),
+    ("bibliografias", "titulo", "bibliografiaasignaturas", "bibliografia_id"),
+]
+
+
+def version_datos(ctx, etapa):
+    """Versión de los datos que deja cargados una etapa: la ejecución y la etapa que los escribió."""
+    return f"{ctx.artefactos.estado['ejecucion']}/{etapa}"
+
+
+############################
+# Etapa extract            #
+############################
+
+class Extraccion:
+    """
+    Guías pendientes según el manifiesto, relaciones acumuladas y resolutor de la
+    bibliografía de la etapa extract, con los pasos del flujo que analizan los PDFs.
+    """
+
+    def __init__(self, ctx):
+        args = ctx.args
+        self.ctx = ctx
+
+        # Orden determinista: la salida no depende del orden de os.listdir ni del número de workers
+        rutas = [os.path.join(args.directorio, file) for file in sorted(os.listdir(args.directorio)) if file.endswith(".pdf")]
+
+        # Solo se procesan las guías nuevas, modificadas o cuya carga no terminó
+        self.manifest = Manifest(args.manifest)
+        self.pendientes, self.eliminados = self.manifest.planificar(rutas, VERSION_EXTRACTOR)
+        if args.completo:
+            self.pendientes = rutas
+        print(f"Guías a procesar: {len(self.pendientes)}, sin cambios: {len(rutas) - len(self.pendientes)}, eliminadas: {len(self.eliminados)}")
+
+        self.relaciones = AcumuladorRelaciones()
+        self.ids_procesados = []
+        # Guías con referencias que no se pudieron resolver: no se marcan como cargadas
+        self.bibliografia_incompleta = []
+        self._ids_eliminados = [e["id_asignatura"] for e in self.eliminados.values() if e.get("id_asignatura")]
+
+        self.cache_bibliografia = CacheBibliografia(args.cache_bibliografia) if args.cache_bibliografia else None
+        self.resolutor = ResolutorBibliografia(
+            args.scholar_url,
+            tasa=args.scholar_tasa,
+            concurrencia=args.scholar_concurrencia,
+            cache=self.cache_bibliografia,
+        )
+
+    @property
+    def hay_cambios(self):
+        return bool(self.pendientes or self.eliminados)
+
+    def ids_eliminados(self):
+        """Asignaturas a eliminar; una asignatura que sigue en otro PDF no se elimina."""
+        procesados = set(self.ids_procesados)
+        return [id for id in self._ids_eliminados if id not in procesados]
+
+    def extraer(self):
+        yield from zip(self.pendientes, extraer_guias(self.pendientes, self.ctx.args.workers))
+
+    def metadatos(self, entradas):
+        """
+        Agrupa las guías en lotes de `--lote` y emite cada lote con su contenido, las filas
+        de relaciones que aparecen por primera vez en él (con los ids locales del
+        acumulador) y las asignaturas nuevas, cuyos enlaces se recargan.
+        """
+        # Las referencias de todas las guías de un lote se resuelven a la vez en Google
+        # Scholar; un fallo solo afecta a su referencia y no al resto de la ingesta
+        for lote in en_lotes(entradas, self.ctx.args.lote):
+            referencias = self.resolutor.resolver([nombre for _, registro in lote for nombre in registro["bibliografia"]])
+            contenidos = []
+            for ruta, registro in lote:
+                self.ctx.perfilador.agregar_guia(registro.pop("perfil"))
+
+                # Asignatura, titulación, escuela, profesores y sus enlaces
+                id_asignatura = self.relaciones.agregar_guia(registro)
+                nombre_asignatura = registro["asignatura"]["nombre"]
+
+                # Si la guía ahora describe otra asignatura, la anterior se elimina
+                anterior = self.manifest.entradas.get(os.path.basename(ruta), {}).get("id_asignatura")
+                if anterior and anterior != id_asignatura:
+                    self._ids_eliminados.append(anterior)
+                self.manifest.marcar(ruta, VERSION_EXTRACTOR, id_asignatura, ESTADO_EXTRAIDO)
+                self.ids_procesados.append(id_asignatura)
+
+                # Bibliografia
+                for nombre in registro["bibliografia"]:
+                    dict_bibliografia = referencias.get(nombre)
+                    if dict_bibliografia and "Titulo" in dict_bibliografia:
+                        self.relaciones.agregar_bibliografia(id_asignatura, dict_bibliografia)
+                if any(normalizar_consulta(n) and n not in referencias for n in registro["bibliografia"]):
+                    self.bibliografia_incompleta.append(ruta)
+
+                print(f"Metadatos descargados para el archivo {nombre_asignatura}")
+                contenidos.append(registro["contenido"])
+
+            tablas = self.relaciones.vaciar()
+            yield {"contenidos": contenidos, "tablas": tablas, "ids": tablas["asignaturas"]["id"].tolist()}
+
+    def terminar(self):
+        """Guarda las tablas y `guias.json` y actualiza el manifiesto."""
+        artefactos = self.ctx.artefactos
+        for tabla, df in self.relaciones.dataframes().items():
+            artefactos.escribir_tabla("extract", tabla, df)
+
+        artefactos.escribir_json("extract", "guias", {
+            "pendientes": self.pendientes,
+            "eliminados": list(self.eliminados),
+            "ids_procesados": self.ids_procesados,
+            "ids_eliminados": self.ids_eliminados(),
+            "bibliografia_incompleta": self.bibliografia_incompleta,
+        })
+
+        self.manifest.guardar()
+        print("Bibliografía:", self.resolutor.stats())
+        if self.bibliografia_incompleta:
+            print(
+                f"Referencias sin resolver: {len(self.resolutor.fallidas)} en {len(self.bibliografia_incompleta)} guías; "
+                "esas guías se volverán a procesar en la próxima ejecución"
+            )
+
+    def close(self):
+        self.resolutor.close()
+        if self.cache_bibliografia is not None:
+            self.cache_bibliografia.close()
+
+
+@contextmanager
+def guardar_contenido(ctx):
+    """Paso que escribe el contenido de cada lote en `contenido.parquet` y lo deja pasar."""
+    with ctx.artefactos.escritor_documentos("extract", "contenido", ESQUEMA_CONTENIDO) as escritor:
+        def guardar(lotes):
+            for lote in lotes:
+                escritor.escribir(lote["contenidos"])
+                yield lote
+
+        yield guardar
+
+
+def etapa_extract(ctx, en_flujo=()):
+    """
+    Extrae las guías nuevas o modificadas y resuelve su bibliografía.
+
+    Artefactos: `contenido.parquet` (un documento por guía, sin vectores), una tabla Parquet
+    por tabla de PostgreSQL (con los ids locales del acumulador) y `guias.json` (rutas
+    procesadas, PDFs eliminados e ids de asignatura afectados).
+
+    Las etapas de `en_flujo` (las siguientes de la misma ejecución) se ejecutan como pasos
+    del mismo flujo: cada lote de guías se carga en cuanto se extrae, de modo que las
+    escrituras en PostgreSQL, GraphDB y Elasticsearch se solapan con el análisis de los PDFs.
+    Escriben los mismos artefactos que ejecutadas por separado.
+
+    Retorna:
+        bool: False si no hay cambios en las guías y no hace falta ejecutar el resto.
+    """
+    args = ctx.args
+    extraccion = Extraccion(ctx)
+    try:
+        if not extraccion.hay_cambios:
+            print("No hay cambios en las guías docentes")
+            return False
+
+        # El análisis de los PDFs, la resolución de referencias, la escritura del artefacto y
+        # las etapas en flujo se solapan: cada paso corre en su hilo y se comunica con el
+        # siguiente por una cola acotada
+        with ExitStack() as pila:
+            pasos = [("contenido", pila.enter_context(guardar_contenido(ctx)))]
+            if "load-pg" in en_flujo:
+                pasos.append(("load-pg", pila.enter_context(
+                    cargador_pg(ctx, extraccion.relaciones.dataframes, extraccion.ids_eliminados))))
+            if "link" in en_flujo:
+                pasos.append(("link", pila.enter_context(enlazador(ctx, extraccion.ids_eliminados))))
+            if "embed" in en_flujo:
+                pasos.append(("embed", pila.enter_context(vectorizador(ctx, len(extraccion.pendientes)))))
+            if "load-es" in en_flujo:
+                pasos.append(("load-es", pila.enter_context(indexador_es(ctx, extraccion.ids_eliminados))))
+
+            flujo = (
+                Flujo(capacidad=args.capacidad)
+                .etapa("extraer", extraccion.extraer)
+                .etapa("metadatos", extraccion.metadatos)
+            )
+            for nombre, paso in pasos[:-1]:
+                flujo.etapa(nombre, paso)
+            flujo.sumidero(*pasos[-1])
+            flujo.ejecutar()
+            flujo.imprimir_informe()
+            ctx.perfilador.anotar("extract", flujo=flujo.informe(), scholar=extraccion.resolutor.stats())
+
+        extraccion.terminar()
+        return True
+    finally:
+        extraccion.close()
+
+
+############################
+# Etapa embed              #
+############################
+
+@contextmanager
+def vectorizador(ctx, n):
+    """
+    Paso de la etapa embed: añade sus vectores a los documentos de cada lote y los copia
+    en las matrices del artefacto, que se confirman al cerrar.
+
+    Los lotes se acumulan hasta reunir `--lote-embeddings` guías y se vectorizan juntos,
+    de modo que el modelo recibe lotes grandes y los textos repetidos entre guías se
+    codifican una sola vez; después se emiten en el orden en que llegaron.
+    """
+    args, artefactos = ctx.args, ctx.artefactos
+    cache = EmbeddingCache(args.cache_embeddings, MODELO_EMBEDDINGS) if args.cache_embeddings else None
+    model = ModeloPerezoso(MODELO_EMBEDDINGS)
+
+    matrices = {campo: artefactos.crear_matriz("embed", campo, n, DIM_EMBEDDINGS) for campo in CAMPOS_VECTOR}
+    presentes = {campo: np.zeros(n, dtype=bool) for campo in CAMPOS_VECTOR}
+    fila = 0
+
+    def vectorizar_grupo(grupo):
+        nonlocal fila
+        documentos = [doc for lote in grupo for doc in lote["contenidos"]]
+        for doc in vectorizar_documentos(documentos, model, batch_size=args.batch_size, cache=cache):
+            for campo in CAMPOS_VECTOR:
+                if campo in doc:
+                    matrices[campo][fila] = doc[campo]
+                    presentes[campo][fila] = True
+            fila += 1
+        return grupo
+
+    def vectorizar(lotes):
+        grupo, guias = [], 0
+        for lote in lotes:
+            grupo.append(lote)
+            guias += len(lote["contenidos"])
+            if guias >= args.lote_embeddings:
+                yield from vectorizar_grupo(grupo)
+                grupo, guias = [], 0
+        if grupo:
+            yield from vectorizar_grupo(grupo)
+
+    try:
+        yield vectorizar
+
+        for campo in CAMPOS_VECTOR:
+            artefactos.confirmar_matriz("embed", campo, matrices[campo])
+            artefactos.escribir_matriz("embed", f"{campo}_presente", presentes[campo])
+        print(f"Embeddings calculados para {n} guías")
+        ctx.perfilador.anotar("embed", guias=n)
+        if cache is not None:
+            print("Caché de embeddings:", cache.stats())
+            ctx.perfilador.anotar("embed", cache=cache.stats())
+    finally:
+        if cache is not None:
+            cache.close()
+
+
+def etapa_embed(ctx):
+    """
+    Calcula los vectores del contenido extraído.
+
+    Artefactos: una matriz `N x DIM_EMBEDDINGS` por campo vectorial, con las filas en el
+    orden de `contenido.parquet`, y una máscara `<campo>_presente` con las filas que tienen
+    vector (los textos vacíos no se vectorizan).
+    """
+    args, artefactos = ctx.args, ctx.artefactos
+    n = artefactos.contar_documentos("extract", "contenido")
+    lotes = ({"contenidos": lote} for lote in artefactos.leer_documentos("extract", "contenido", args.lote_embeddings))
+    with vectorizador(ctx, n) as vectorizar:
+        deque(vectorizar(lotes), maxlen=0)
+
+
+############################
+# Etapa load-pg            #
+############################
+
+@contextmanager
+def cargador_pg(ctx, tablas_extract, ids_eliminados):
+    """
+    Paso de la etapa load-pg: carga las tablas de cada lote en PostgreSQL y traduce sus
+    ids locales a los definitivos, que son los que ven los pasos siguientes.
+
+    Toda la carga se hace en una transacción y con upserts (COPY a tablas de staging y un
+    INSERT ... ON CONFLICT por tabla), de modo que repetir la etapa no duplica filas. Las
+    asignaturas eliminadas se borran al final, cuando ya se conocen todas.
+
+    Parámetros:
+        tablas_extract (callable): Devuelve las tablas completas de la etapa extract, a las
+            que se aplican los ids definitivos para escribir los artefactos.
+        ids_eliminados (callable): Devuelve las asignaturas a eliminar.
+    """
+    engine = ctx.engine
+    ids_locales = {tabla: {} for tabla, *_ in IDS_SUSTITUTOS}
+    # Filas enviadas, filas insertadas o actualizadas y segundos de carga por tabla
+    carga_pg = {tabla: [0, 0, 0.0] for tabla in COLUMNAS}
+
+    def cargar(lotes):
+        with engine.begin() as conn:
+            for lote in lotes:
+                tablas = lote["tablas"]
+                # Los enlaces de las guías modificadas se recargan desde cero
+                borrar_enlaces_asignaturas(conn, lote["ids"])
+
+                # Ids estables: se reutiliza el id ya guardado para cada correo o título y los
+                # ids locales del acumulador se traducen en las tablas de enlace
+                for tabla, columna, enlace, columna_enlace in IDS_SUSTITUTOS:
+                    df = tablas[tabla]
+                    ids = asignar_ids(conn, tabla, columna, df[columna])
+                    ids_locales[tabla].update(zip(df["id"], df[columna].map(ids)))
+                    df["id"] = df[columna].map(ids)
+                    tablas[enlace][columna_enlace] = tablas[enlace][columna_enlace].map(ids_locales[tabla])
+
+                for tabla, df in tablas.items():
+                    if not df.empty:
+                        t0 = time.perf_counter()
+                        filas = copiar_upsert(conn, tabla, df)
+                        carga_pg[tabla][0] += len(df)
+                        carga_pg[tabla][1] += filas
+                        carga_pg[tabla][2] += time.perf_counter() - t0
+                yield lote
+
+            borrar_enlaces_asignaturas(conn, ids_eliminados(), borrar_asignaturas=True)
+            sellar_version(conn, version_datos(ctx, "load-pg"))
+
+    yield cargar
+
+    # Artefactos: las tablas completas con los ids definitivos, que son los que usa `link`
+    tablas = tablas_extract()
+    for tabla, _, enlace, columna_enlace in IDS_SUSTITUTOS:
+        tablas[tabla]["id"] = tablas[tabla]["id"].map(ids_locales[tabla])
+        tablas[enlace][columna_enlace] = tablas[enlace][columna_enlace].map(ids_locales[tabla])
+    for tabla, df in tablas.items():
+        ctx.artefactos.escribir_tabla("load-pg", tabla, df)
+
+    ctx.perfilador.anotar("load-pg", tablas={
+        tabla: {"filas": enviadas, "escritas": escritas, "segundos": round(segundos, 3)}
+        for tabla, (enviadas, escritas, segundos) in carga_pg.items()
+        if enviadas
+    })
+    for tabla, (enviadas, escritas, segundos) in carga_pg.items():
+        if enviadas:
+            print(f"PostgreSQL {tabla}: {enviadas} filas ({escritas} escritas) en {segundos:.2f} s, {enviadas / segundos if segundos else 0:.0f} filas/s")
+
+
+def etapa_load_pg(ctx):
+    """
+    Carga en PostgreSQL las tablas extraídas, en un único lote.
+
+    Artefactos: las mismas tablas con los ids definitivos de profesores y bibliografías,
+    que son los que usa la etapa `link`.
+    """
+    artefactos = ctx.artefactos
+    guias = artefactos.leer_json("extract", "guias")
+
+    def tablas_extract():
+        return {tabla: artefactos.leer_tabla("extract", tabla) for tabla in COLUMNAS}
+
+    lote = {"tablas": tablas_extract(), "ids": guias["ids_procesados"]}
+    with cargador_pg(ctx, tablas_extract, lambda: guias["ids_eliminados"]) as cargar:
+        deque(cargar([lote]), maxlen=0)
+
+
+############################
+# Etapa load-es            #
+############################
+
+@contextmanager
+def indexador_es(ctx, ids_eliminados):
+    """
+    Paso final de la etapa load-es: indexa en Elasticsearch los documentos (ya con sus
+    vectores) de los lotes que recibe y, al cerrar, borra las asignaturas eliminadas.
+    """
+    args = ctx.args
+    # Durante la carga el índice no se refresca ni replica; al salir se restaura y se refresca
+    with IndexadorMasivo(
+        ctx.es,
+        INDEX_NAME,
+        workers=args.es_workers,
+        chunk_docs=args.es_chunk_docs,
+        chunk_bytes=int(args.es_chunk_mb * 1024 * 1024),
+    ) as indexador:
+        def indexar(lotes):
+            # parallel_bulk consume los documentos a medida que llegan los lotes
+            indexador.indexar(doc for lote in lotes for doc in lote["contenidos"])
+
+        yield indexar
+        bulk_delete_data(ctx.es, ids_eliminados(), INDEX_NAME)
+    print("Elasticsearch:", indexador.informe())
+    ctx.perfilador.anotar("load-es", elasticsearch=indexador.informe())
+    with ctx.engine.begin() as conn:
+        sellar_version(conn, version_datos(ctx, "load-es"))
+
+
+def etapa_load_es(ctx):
+    """Indexa en Elasticsearch el contenido extraído junto con sus vectores."""
+    args, artefactos = ctx.args, ctx.artefactos
+    guias = artefactos.leer_json("extract", "guias")
+    vectores = {campo: artefactos.leer_matriz("embed", campo) for campo in CAMPOS_VECTOR}
+    presentes = {campo: artefactos.leer_matriz("embed", f"{campo}_presente") for campo in CAMPOS_VECTOR}
+
+    def lotes():
+        fila = 0
+        for lote in artefactos.leer_documentos("extract", "contenido", args.lote):
+            for doc in lote:
+                doc.pop("texto_competencias", None)
+                for campo in CAMPOS_VECTOR:
+                    if presentes[campo][fila]:
+                        doc[campo] = np.asarray(vectores[campo][fila])
+                fila += 1
+            yield {"contenidos": lote}
+
+    with indexador_es(ctx, lambda: guias["ids_eliminados"]) as indexar:
+        indexar(lotes())
+
+
+############################
+# Etapa link               #
+############################
+
+@contextmanager
+def enlazador(ctx, ids_eliminados):
+    """
+    Paso de la etapa link: sube a GraphDB las tripletas de las filas de cada lote (con los
+    ids definitivos de PostgreSQL) y de su contenido. Las tripletas de las asignaturas del
+    lote se borran antes y las de las eliminadas, al terminar.
+    """
+    args = ctx.args
+    cargador = CargadorGraphDB(args.graphdb_url, tam_lote=args.graphdb_lote, workers=args.graphdb_workers)
+
+    def enlazar(lotes):
+        for lote in lotes:
+            for ids in en_lotes(lote["ids"], 500):
+                borrar_triples_asignaturas(args.graphdb_url, ids)
+            cargador.subir(chain(tripletas_tablas(lote["tablas"]), chain.from_iterable(map(tripletas_contenido, lote["contenidos"]))))
+            yield lote
+        for ids in en_lotes(ids_eliminados(), 500):
+            borrar_triples_asignaturas(args.graphdb_url, ids)
+
+    try:
+        yield enlazar
+    finally:
+        cargador.close()
+    print("GraphDB:", cargador.informe())
+    ctx.perfilador.anotar("link", graphdb=cargador.informe())
+
+
+def etapa_link(ctx):
+    """
+    Sube a GraphDB las tripletas de las filas cargadas en PostgreSQL y del contenido. Las
+    tripletas de las guías modificadas o eliminadas se borran antes.
+    """
+    args, artefactos = ctx.args, ctx.artefactos
+    guias = artefactos.leer_json("extract", "guias")
+    lote = {
+        "tablas": {tabla: artefactos.leer_tabla("load-pg", tabla) for tabla in COLUMNAS},
+        "contenidos": (doc for lote in artefactos.leer_documentos("extract", "contenido", args.lote) for doc in lote),
+        "ids": guias["ids_procesados"],
+    }
+    with enlazador(ctx, lambda: guias["ids_eliminados"]) as enlazar:
+        deque(enlazar([lote]), maxlen=0)
+
+
+ETAPAS = ["extract", "embed", "load-pg", "load-es", "link"]
+
+FUNCIONES_ETAPAS = {
+    "extract": etapa_extract,
+    "embed": etapa_embed,
+    "load-pg": etapa_load_pg,
+    "load-es": etapa_load_es,
+    "link": etapa_link,
+}
+
+# Etapas cuyos artefactos necesita cada etapa
+DEPENDENCIAS = {
+    "extract": [],
+    "embed": ["extract"],
+    "load-pg": ["extract"],
+    "load-es": ["extract", "embed"],
+    "link": ["extract", "load-pg"],
+}
+
+
+def planificar_etapas(args, artefactos):
+    """
+    Decide qué etapas ejecutar: las de `--only`, las que van desde `--from` o, si no se
+    indica ninguna, las que quedaron pendientes en la última ejecución. Si la última
+    ejecución terminó (o sus artefactos son de otra versión) se empieza una nueva.
+    """
+    completadas = artefactos.completadas
+    if args.solo:
+        etapas = [e for e in ETAPAS if e in args.solo]
+    elif args.desde:
+        etapas = ETAPAS[ETAPAS.index(args.desde):]
     else:
-        print(f"Batch {i//batch_size + 1} subido correctamente ({len(batch)} triples)")
+        etapas = [e for e in ETAPAS if e not in completadas]
+        if etapas and "extract" in completadas:
+            print(f"Reanudando la ejecución desde la etapa {etapas[0]}")
+        else:
+            etapas = list(ETAPAS)
+
+    # Una ejecución con extract empieza de cero: no cuentan las etapas completadas antes
+    if "extract" in etapas:
+        completadas = []
+    for etapa in etapas:
+        faltan = [d for d in DEPENDENCIAS[etapa] if d not in etapas and d not in completadas]
+        if faltan:
+            raise SystemExit(f"La etapa {etapa} necesita los artefactos de {', '.join(faltan)}; ejecútalas antes")
+    return etapas
+
+
+def marcar_cargadas(args, artefactos):
+    """
+    Cuando todas las etapas de la ejecución han terminado, las guías quedan cargadas en el
+    manifiesto, salvo las que tienen referencias sin resolver, que siguen pendientes.
+    """
+    guias = artefactos.leer_json("extract", "guias")
+    incompletas = set(guias.get("bibliografia_incompleta", []))
+    manifest = Manifest(args.manifest)
+    for ruta in guias["pendientes"]:
+        if ruta in incompletas:
+            continue
+        entrada = manifest.entradas.get(os.path.basename(ruta))
+        if entrada is not None:
+            entrada["estado"] = ESTADO_CARGADO
+    for nombre in guias["eliminados"]:
+        manifest.eliminar(nombre)
+    manifest.guardar()
+    if incompletas:
+        print(f"Guías pendientes por bibliografía sin resolver: {len(incompletas)}")
+
+
+def main():
+    args = parse_args()
+
+    if args.cprofile:
+        perfilar(extraer_guia, args.cprofile, salida=args.cprofile_salida)
+        print(f"Estadísticas de cProfile guardadas en {args.cprofile_salida}")
+        return
+
+    # Los artefactos solo se reutilizan si los generó la misma versión de los extractores y del modelo
+    artefactos = Artefactos(args.artefactos, {
+        "artefactos": VERSION_ARTEFACTOS,
+        "extractor": VERSION_EXTRACTOR,
+        "modelo": MODELO_EMBEDDINGS,
+    })
+    etapas = planificar_etapas(args, artefactos)
+    if "extract" in etapas:
+        artefactos.nueva_ejecucion()
+    else:
+        artefactos.invalidar(etapas)
 
-print("Datos enlazados")
\ No newline at end of file
+    # Las etapas que siguen a extract en la misma ejecución se ejecutan en su flujo
+    if "extract" in etapas and not args.por_etapas:
+        grupos = [etapas]
+    else:
+        grupos = [[etapa] for etapa in etapas]
+
+    ctx = Contexto(args, artefactos)
+    try:
+        for grupo in grupos:
+            nombre = "+".join(grupo)
+            print(f"=== Etapa {nombre} ===")
+            with ctx.perfilador.etapa(nombre):
+                if len(grupo) > 1:
+                    hay_cambios = etapa_extract(ctx, en_flujo=grupo[1:])
+                else:
+                    hay_cambios = FUNCIONES_ETAPAS[grupo[0]](ctx)
+            print(f"Etapa {nombre} completada en {ctx.perfilador.etapas[nombre]['segundos']:.2f} s")
+            if grupo[0] == "extract" and hay_cambios is False:
+                # Nada que cargar: la ejecución se da por terminada
+                for e in ETAPAS:
+                    artefactos.completar(e)
+                return
+            for etapa in grupo:
+                artefactos.completar(etapa)
+
+        if set(ETAPAS) <= set(artefactos.completadas):
+            # Solo ahora se consideran cargadas las guías procesadas
+            marcar_cargadas(args, artefactos)
+            print("Datos almacenados y enlazados")
+    finally:
+        # El informe se escribe también si una etapa falla, con lo medido hasta entonces
+        ctx.perfilador.imprimir_resumen(args.perfil_top)
+        if args.perfil:
+            ctx.perfilador.guardar(args.perfil, args.perfil_top)
+            print(f"Informe de perfilado guardado en {args.perfil}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import pandas as pd
+
+# Columnas de cada tabla de `tables.py`, en orden de carga (las entidades antes que sus enlaces)
+COLUMNAS = {
+    "asignaturas": ["id", "nombre", "numero_creditos", "agno_academico", "semestre", "idioma"],
+    "titulaciones": ["id", "nombre", "tipo_estudio"],
+    "escuelas": ["id", "nombre", "entidad_dbpedia"],
+    "titulacionesasignaturas": ["titulacion_id", "asignatura_id"],
+    "titulacionesescuelas": ["titulacion_id", "escuela_id"],
+    "profesores": ["id", "nombre", "correo_electronico"],
+    "profesoresasignaturas": ["profesor_id", "asignatura_id"],
+    "bibliografias": ["id", "titulo", "autores", "direccion_url"],
+    "bibliografiaasignaturas": ["asignatura_id", "bibliografia_id"],
+}
+
+
+class AcumuladorRelaciones:
+    """
+    Acumula las relaciones extraídas de las guías en diccionarios indexados por su clave
+    natural y solo las convierte en DataFrames al cargarlas.
+
+    Añadir una guía cuesta lo mismo sea cual sea el tamaño del corpus (no hay pd.concat ni
+    búsquedas lineales) y los ids sustitutos de profesores y bibliografías se asignan una
+    única vez, en orden de aparición, sin renumerar los ya usados en las tablas de enlace.
+
+    Las entidades (clave -> fila) y los enlaces (tuplas) se guardan en `self.tablas`; cada
+    fila nueva se apunta además en una lista de pendientes para poder cargarla por lotes
+    con `vaciar`.
+    """
+
+    def __init__(self):
+        self.tablas = {tabla: {} for tabla in COLUMNAS}
+        self._nuevas = {tabla: [] for tabla in COLUMNAS}
+
+    def _agregar(self, tabla, clave, fila):
+        """Añade la fila si su clave no existe y devuelve la fila almacenada."""
+        existente = self.tablas[tabla].get(clave)
+        if existente is not None:
+            return existente
+        self.tablas[tabla][clave] = fila
+        self._nuevas[tabla].append(fila)
+        return fila
+
+    def agregar_guia(self, registro):
+        """
+        Añade los metadatos de una guía (registro devuelto por `extraer_guia`).
+
+        Retorna:
+            str: Id de la asignatura.
+        """
+        asignatura = registro["asignatura"]
+        titulacion = registro["titulacion"]
+        escuela = registro["escuela"]
+        id_asignatura = asignatura["id"]
+
+        self._agregar("asignaturas", id_asignatura, dict(asignatura))
+        self._agregar("titulaciones", titulacion["id"], dict(titulacion))
+        self._agregar("escuelas", escuela["id"], dict(escuela))
+        enlace = (titulacion["id"], escuela["id"])
+        self._agregar("titulacionesescuelas", enlace, enlace)
+        enlace = (titulacion["id"], id_asignatura)
+        self._agregar("titulacionesasignaturas", enlace, enlace)
+
+        for profesor in registro["profesores"]:
+            profesor_id = self.agregar_profesor(profesor["Nombre"], profesor["Correo electrónico"])
+            enlace = (profesor_id, id_asignatura)
+            self._agregar("profesoresasignaturas", enlace, enlace)
+
+        return id_asignatura
+
+    def agregar_profesor(self, nombre, correo):
+        """Devuelve el id del profesor con ese correo, creándolo si no existe."""
+        profesores = self.tablas["profesores"]
+        if correo not in profesores:
+            self._agregar("profesores", correo, {"id": len(profesores), "nombre": nombre, "correo_electronico": correo})
+        return profesores[correo]["id"]
+
+    def agregar_bibliografia(self, id_asignatura, referencia):
+        """
+        Enlaza a la asignatura una referencia resuelta en Google Scholar
+        ({"Titulo", "Autores", "Enlace"}), creándola si no existe.
+        """
+        titulo = referencia["Titulo"]
+        bibliografias = self.tablas["bibliografias"]
+        if titulo not in bibliografias:
+            self._agregar("bibliografias", titulo, {
+                "id": len(bibliografias),
+                "titulo": titulo,
+                "autores": referencia.get("Autores", ""),
+                "direccion_url": referencia.get("Enlace", ""),
+            })
+        bibliografia_id = bibliografias[titulo]["id"]
+        enlace = (id_asignatura, bibliografia_id)
+        self._agregar("bibliografiaasignaturas", enlace, enlace)
+        return bibliografia_id
+
+    @staticmethod
+    def _dataframe(tabla, filas):
+        return pd.DataFrame(list(filas), columns=COLUMNAS[tabla])
+
+    def dataframes(self):
+        """
+        Convierte todas las relaciones acumuladas en DataFrames con las columnas de `tables.py`.
+
+        Retorna:
+            dict[str, pandas.DataFrame]: DataFrame por nombre de tabla, en orden de carga.
+        """
+        return {tabla: self._dataframe(tabla, filas.values()) for tabla, filas in self.tablas.items()}
+
+    def vaciar(self):
+        """
+        Devuelve, como DataFrames, solo las filas añadidas desde la última llamada y las
+        marca como cargadas. Las claves se conservan para seguir deduplicando.
+        """
+        nuevas = {tabla: self._dataframe(tabla, filas) for tabla, filas in self._nuevas.items()}
+        self._nuevas = {tabla: [] for tabla in COLUMNAS}
+        return nuevas
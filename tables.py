@@ -1,11 +1,179 @@
-from sqlalchemy import create_engine, Column, Integer, String, ForeignKey
+import io
+from sqlalchemy import create_engine, Column, DateTime, Integer, String, ForeignKey, func, select, text
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import declarative_base, relationship
 
 Base = declarative_base()
 
+# Tablas que enlazan cada asignatura con el resto de entidades
+TABLAS_ENLACE_ASIGNATURA = ["profesoresasignaturas", "titulacionesasignaturas", "bibliografiaasignaturas"]
+
+# Migraciones idempotentes que se aplican tras crear las tablas, también sobre una base de
+# datos ya existente (create_all no añade índices a tablas que ya existen):
+# - f_unaccent: envoltorio IMMUTABLE de unaccent, que sí puede usarse en índices.
+# - Índices GIN de trigramas y de texto completo sobre el nombre de las asignaturas, para
+#   resolver asignaturas por nombre (SQL_FIND_ASIG_BY_NAME del chatbot) sin recorrer la tabla.
+# - Índices por la segunda columna de la clave primaria de las tablas de enlace: los
+#   filtros por asignatura_id no pueden usar una clave que empieza por otra columna.
+# - asignatura_id de las tablas de enlace con el mismo tipo que asignaturas.id.
+MIGRACIONES = [
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$
+    """,
+    """
+    DO $$
+    DECLARE
+        tipo text := (
+            SELECT format_type(atttypid, atttypmod) FROM pg_attribute
+            WHERE attrelid = 'asignaturas'::regclass AND attname = 'id'
+        );
+        tabla text;
+    BEGIN
+        FOREACH tabla IN ARRAY ARRAY['profesoresasignaturas', 'titulacionesasignaturas', 'bibliografiaasignaturas'] LOOP
+            IF (
+                SELECT format_type(atttypid, atttypmod) FROM pg_attribute
+                WHERE attrelid = tabla::regclass AND attname = 'asignatura_id'
+            ) <> tipo THEN
+                EXECUTE format('ALTER TABLE %I ALTER COLUMN asignatura_id TYPE %s USING asignatura_id::%s', tabla, tipo, tipo);
+            END IF;
+        END LOOP;
+    END $$
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_profesoresasignaturas_asignatura_id ON profesoresasignaturas (asignatura_id)",
+    "CREATE INDEX IF NOT EXISTS ix_titulacionesasignaturas_asignatura_id ON titulacionesasignaturas (asignatura_id)",
+    "CREATE INDEX IF NOT EXISTS ix_bibliografiaasignaturas_bibliografia_id ON bibliografiaasignaturas (bibliografia_id)",
+    "CREATE INDEX IF NOT EXISTS asignaturas_nombre_trgm ON asignaturas USING gin (lower(f_unaccent(nombre)) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS asignaturas_nombre_tsv ON asignaturas USING gin (to_tsvector('spanish', f_unaccent(nombre)))",
+]
+
+
 def create_tables(engine):
     Base.metadata.create_all(engine)
-    
+    migrar(engine)
+
+
+def migrar(engine):
+    """Aplica MIGRACIONES en una transacción."""
+    with engine.begin() as conn:
+        for sentencia in MIGRACIONES:
+            conn.execute(text(sentencia))
+
+
+def copiar_upsert(conn, tabla, df):
+    """
+    Carga un DataFrame con COPY FROM STDIN en una tabla temporal de staging y lo fusiona
+    con la tabla definitiva mediante INSERT ... SELECT ... ON CONFLICT sobre la clave
+    primaria: actualiza las columnas no clave si la fila ya existe, o la ignora si la
+    tabla solo tiene columnas clave (tablas de enlace).
+
+    La tabla de staging se crea una vez por transacción (ON COMMIT DROP) y se vacía antes
+    de cada carga, de modo que puede llamarse varias veces dentro de la misma transacción.
+
+    Parámetros:
+        conn (sqlalchemy.engine.Connection): Conexión con una transacción abierta.
+        tabla (str): Nombre de la tabla de este módulo.
+        df (pandas.DataFrame): Filas a cargar, con columnas de la tabla.
+
+    Retorna:
+        int: Filas insertadas o actualizadas.
+    """
+    if df.empty:
+        return 0
+    t = Base.metadata.tables[tabla]
+    columnas = list(df.columns)
+    pk = [c.name for c in t.primary_key.columns]
+    staging = f"staging_{tabla}"
+    lista = ", ".join(columnas)
+
+    # Los ids que pandas haya convertido a float (3.0) se escriben como enteros y los
+    # nulos como \N, para que las cadenas vacías no se carguen como NULL
+    buffer = io.StringIO()
+    df.convert_dtypes().to_csv(buffer, index=False, header=False, na_rep="\\N")
+
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(f"CREATE TEMP TABLE IF NOT EXISTS {staging} (LIKE {tabla} INCLUDING DEFAULTS) ON COMMIT DROP")
+        cursor.execute(f"TRUNCATE {staging}")
+        copia = f"COPY {staging} ({lista}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+        if hasattr(cursor, "copy_expert"):  # psycopg2
+            buffer.seek(0)
+            cursor.copy_expert(copia, buffer)
+        else:  # psycopg 3
+            with cursor.copy(copia) as copy:
+                copy.write(buffer.getvalue())
+
+        actualizables = [c for c in columnas if c not in pk]
+        if actualizables:
+            conflicto = "DO UPDATE SET " + ", ".join(f"{c} = EXCLUDED.{c}" for c in actualizables)
+        else:
+            conflicto = "DO NOTHING"
+        # DISTINCT ON evita que una misma clave aparezca dos veces en el INSERT
+        cursor.execute(
+            f"INSERT INTO {tabla} ({lista}) "
+            f"SELECT DISTINCT ON ({', '.join(pk)}) {lista} FROM {staging} "
+            f"ON CONFLICT ({', '.join(pk)}) {conflicto}"
+        )
+        return cursor.rowcount
+    finally:
+        cursor.close()
+
+
+def asignar_ids(conn, tabla, columna, valores):
+    """
+    Asigna ids estables a los valores de una columna natural (correo, título...).
+
+    Reutiliza el id ya almacenado en la base de datos para cada valor existente y
+    asigna ids nuevos, a partir del máximo actual, al resto.
+
+    Retorna:
+        dict: {valor: id}
+    """
+    t = Base.metadata.tables[tabla]
+    existentes = dict(conn.execute(select(t.c[columna], t.c.id)).all())
+    siguiente = max(existentes.values(), default=-1) + 1
+    ids = {}
+    for valor in valores:
+        if valor in ids:
+            continue
+        if valor in existentes:
+            ids[valor] = existentes[valor]
+        else:
+            ids[valor] = siguiente
+            siguiente += 1
+    return ids
+
+
+def sellar_version(conn, version):
+    """
+    Registra la versión de los datos cargados. Los consumidores (la caché del chatbot)
+    descartan lo que tengan guardado cuando la versión cambia.
+    """
+    tabla = Base.metadata.tables["versiondatos"]
+    stmt = insert(tabla).values(id=1, version=version, fecha=func.now())
+    conn.execute(stmt.on_conflict_do_update(index_elements=["id"], set_={"version": version, "fecha": func.now()}))
+
+
+def borrar_enlaces_asignaturas(conn, ids_asignaturas, borrar_asignaturas=False):
+    """
+    Borra las filas de las tablas de enlace de las asignaturas indicadas y, opcionalmente,
+    las propias asignaturas. Se usa antes de recargar las guías modificadas y para
+    eliminar las guías que ya no existen.
+    """
+    ids = [int(i) for i in ids_asignaturas]
+    if not ids:
+        return
+    for nombre in TABLAS_ENLACE_ASIGNATURA:
+        t = Base.metadata.tables[nombre]
+        conn.execute(t.delete().where(t.c.asignatura_id.in_(ids)))
+    if borrar_asignaturas:
+        t = Base.metadata.tables["asignaturas"]
+        conn.execute(t.delete().where(t.c.id.in_(ids)))
+
+
 class Titulacion(Base):
     __tablename__ = "titulaciones"
     id = Column(String(10), primary_key=True)
@@ -65,7 +233,7 @@ class Bibliografia(Base):
 class ProfesoresAsignaturas(Base):
     __tablename__ = "profesoresasignaturas"
     profesor_id = Column(Integer, ForeignKey("profesores.id"), primary_key=True)
-    asignatura_id = Column(Integer, ForeignKey("asignaturas.id"), primary_key=True)
+    asignatura_id = Column(Integer, ForeignKey("asignaturas.id"), primary_key=True, index=True)
 
 
 class TitulacionesEscuelas(Base):
@@ -77,10 +245,17 @@ class TitulacionesEscuelas(Base):
 class TitulacionesAsignaturas(Base):
     __tablename__ = "titulacionesasignaturas"
     titulacion_id = Column(String(10), ForeignKey("titulaciones.id"), primary_key=True)
-    asignatura_id = Column(Integer, ForeignKey("asignaturas.id"), primary_key=True)
+    asignatura_id = Column(Integer, ForeignKey("asignaturas.id"), primary_key=True, index=True)
 
 
 class BibliografiasAsignaturas(Base):
     __tablename__ = "bibliografiaasignaturas"
     asignatura_id = Column(Integer, ForeignKey("asignaturas.id"), primary_key=True)
-    bibliografia_id = Column(Integer, ForeignKey("bibliografias.id"), primary_key=True)
+    bibliografia_id = Column(Integer, ForeignKey("bibliografias.id"), primary_key=True, index=True)
+
+
+class VersionDatos(Base):
+    __tablename__ = "versiondatos"
+    id = Column(Integer, primary_key=True)
+    version = Column(String(64), nullable=False)
+    fecha = Column(DateTime(timezone=True), nullable=False)
@@ -0,0 +1,140 @@
+from urllib.parse import quote
+
+import pandas as pd
+
+# Generación de tripletas N-Triples directamente a partir de los registros de la ingesta,
+# sin construir un rdflib.Graph ni volver a leer PostgreSQL o Elasticsearch. Todas las
+# URIs siguen el esquema <http://upm.es/ontology/{Tipo}/{id}> (con el tipo en mayúscula).
+
+UPM = "http://upm.es/ontology/"
+XSD = "http://www.w3.org/2001/XMLSchema#"
+RDF_TYPE = "<http://www.w3.org/1999/02/22-rdf-syntax-ns#type>"
+
+# Escapes de N-Triples (ECHAR) y el resto de caracteres de control como \uXXXX
+_ESCAPES = {ord("\\"): "\\\\", ord('"'): '\\"', ord("\n"): "\\n", ord("\r"): "\\r", ord("\t"): "\\t"}
+_ESCAPES.update({c: f"\\u{c:04X}" for c in range(0x20) if c not in _ESCAPES})
+_ESCAPES[0x7F] = "\\u007F"
+
+
+def escapar_literal(texto):
+    """Escapa un texto para usarlo entre comillas en un literal N-Triples."""
+    if texto is None:
+        return ""
+    return str(texto).translate(_ESCAPES)
+
+
+def iri(tipo, id):
+    """URI de un recurso de la ontología, con el id codificado para que sea un IRI válido."""
+    if isinstance(id, float) and id.is_integer():
+        id = int(id)
+    return f"<{UPM}{tipo}/{quote(str(id), safe='')}>"
+
+
+def propiedad(nombre):
+    return f"<{UPM}{nombre}>"
+
+
+def literal(valor, tipo=None):
+    """Literal N-Triples; con `tipo` ("string", "integer"...) se añade el datatype de XSD."""
+    texto = f'"{escapar_literal(valor)}"'
+    return f"{texto}^^<{XSD}{tipo}>" if tipo else texto
+
+
+def tripleta(sujeto, predicado, objeto):
+    return f"{sujeto} {predicado} {objeto} ."
+
+
+def _vacio(valor):
+    return valor is None or (not isinstance(valor, (list, dict)) and pd.isna(valor)) or str(valor).strip() == ""
+
+
+def tripletas_tablas(tablas):
+    """
+    Genera las tripletas de las entidades y enlaces de un lote de filas.
+
+    Parámetros:
+        tablas (dict[str, pandas.DataFrame]): Filas por tabla con las columnas de
+            `relaciones.COLUMNAS` y los ids definitivos (los que se cargan en PostgreSQL).
+
+    Retorna:
+        Iterator[str]: Líneas N-Triples.
+    """
+    for fila in tablas["escuelas"].itertuples(index=False):
+        s = iri("Escuela", fila.id)
+        yield tripleta(s, RDF_TYPE, propiedad("Escuela"))
+        yield tripleta(s, propiedad("nombre"), literal(fila.nombre, "string"))
+        yield tripleta(s, propiedad("codigo"), literal(fila.id, "integer"))
+        if not _vacio(fila.entidad_dbpedia):
+            yield tripleta(s, propiedad("entidad_dbpedia"), f"<{fila.entidad_dbpedia}>")
+
+    for fila in tablas["titulaciones"].itertuples(index=False):
+        s = iri("Titulacion", fila.id)
+        yield tripleta(s, RDF_TYPE, propiedad("Titulacion"))
+        yield tripleta(s, propiedad("nombre"), literal(fila.nombre, "string"))
+        yield tripleta(s, propiedad("codigoTitulacion"), literal(fila.id, "string"))
+        yield tripleta(s, propiedad("tipo"), literal(fila.tipo_estudio, "string"))
+
+    for fila in tablas["asignaturas"].itertuples(index=False):
+        s = iri("Asignatura", fila.id)
+        yield tripleta(s, RDF_TYPE, propiedad("Asignatura"))
+        yield tripleta(s, propiedad("nombre"), literal(fila.nombre, "string"))
+        yield tripleta(s, propiedad("creditosECTS"), literal(fila.numero_creditos, "integer"))
+        if not _vacio(fila.semestre):
+            yield tripleta(s, propiedad("semestre"), literal(fila.semestre, "string"))
+        if not _vacio(fila.idioma):
+            yield tripleta(s, propiedad("idioma"), literal(fila.idioma, "string"))
+
+    for fila in tablas["profesores"].itertuples(index=False):
+        s = iri("Profesor", fila.id)
+        yield tripleta(s, RDF_TYPE, propiedad("Profesor"))
+        yield tripleta(s, propiedad("nombre"), literal(fila.nombre, "string"))
+        yield tripleta(s, propiedad("correo"), literal(fila.correo_electronico, "string"))
+
+    for fila in tablas["bibliografias"].itertuples(index=False):
+        s = iri("RecursoBibliografico", fila.id)
+        yield tripleta(s, RDF_TYPE, propiedad("RecursoBibliografico"))
+        yield tripleta(s, propiedad("titulo"), literal(fila.titulo, "string"))
+        yield tripleta(s, propiedad("autor"), literal(fila.autores, "string"))
+        if not _vacio(fila.direccion_url):
+            yield tripleta(s, propiedad("direccionURL"), literal(fila.direccion_url, "string"))
+
+    for fila in tablas["titulacionesescuelas"].itertuples(index=False):
+        yield tripleta(iri("Escuela", fila.escuela_id), propiedad("imparteTitulacion"), iri("Titulacion", fila.titulacion_id))
+
+    for fila in tablas["titulacionesasignaturas"].itertuples(index=False):
+        yield tripleta(iri("Titulacion", fila.titulacion_id), propiedad("incluyeAsignatura"), iri("Asignatura", fila.asignatura_id))
+
+    for fila in tablas["profesoresasignaturas"].itertuples(index=False):
+        yield tripleta(iri("Asignatura", fila.asignatura_id), propiedad("tieneProfesor"), iri("Profesor", fila.profesor_id))
+
+    for fila in tablas["bibliografiaasignaturas"].itertuples(index=False):
+        yield tripleta(iri("Asignatura", fila.asignatura_id), propiedad("tieneRecursoBibliografico"), iri("RecursoBibliografico", fila.bibliografia_id))
+
+
+def tripletas_contenido(doc):
+    """
+    Genera las tripletas del contenido de una guía (descripción, conocimientos previos,
+    competencias y temario) a partir del documento de Elasticsearch, antes o después de
+    añadirle los vectores. Los textos vacíos no generan tripleta.
+
+    Retorna:
+        Iterator[str]: Líneas N-Triples.
+    """
+    s = iri("Asignatura", doc["id_asignatura"])
+
+    for campo, predicado in (("descripcion_asignatura", "descripcion"), ("conocimientos_previos", "conocimientosPrevios")):
+        if not _vacio(doc.get(campo)):
+            yield tripleta(s, propiedad(predicado), literal(doc[campo]))
+
+    for comp in doc.get("competencias") or []:
+        if not _vacio(comp.get("texto")):
+            yield tripleta(s, propiedad("competencia"), literal(comp["texto"]))
+        if not _vacio(comp.get("codigo")):
+            yield tripleta(s, propiedad("codigoCompetencia"), literal(comp["codigo"]))
+
+    for tema in doc.get("temario") or []:
+        if not _vacio(tema.get("titulo")):
+            yield tripleta(s, propiedad("tema"), literal(tema["titulo"]))
+        for sub in tema.get("subtemas") or []:
+            if not _vacio(sub.get("titulo")):
+                yield tripleta(s, propiedad("subtema"), literal(sub["titulo"]))
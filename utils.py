@@ -1,4 +1,5 @@
 import pdfplumber
+import pypdfium2
 import pandas as pd
 import requests
 import re
@@ -6,14 +7,207 @@ from bs4 import BeautifulSoup
 from urllib.parse import quote
 from pathlib import Path
 import re
-from rdflib import URIRef
 from elasticsearch.helpers import bulk
 import random
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import lru_cache
 
 ######################
 # Funciones Pipeline #
 ######################
 
+# Versión de los extractores. Se guarda en el manifiesto de ingesta: al cambiarla,
+# todas las guías se vuelven a procesar en la siguiente ejecución.
+VERSION_EXTRACTOR = "1"
+
+class ParsedGuide:
+    """
+    Guía docente abierta una única vez con pdfplumber.
+
+    Guarda en caché, por página, el texto completo, el texto recortado (sin encabezados
+    ni pies de página), las palabras y las tablas, de forma que todos los extractores
+    comparten el mismo análisis del PDF en lugar de volver a abrirlo y recorrerlo. Las
+    tablas solo se buscan donde hace falta: `posicion_encabezados` localiza las páginas que
+    contienen unos encabezados con la capa de texto de pdfium (que pdfplumber ya instala),
+    sin que pdfplumber tenga que analizar los objetos de cada página.
+    `contadores` registra cuántas veces se ha llamado realmente a pdfplumber de cada tipo.
+
+    Parámetros:
+        pdf_path (str | Path): Ruta del archivo PDF.
+        margen_superior (int): Altura en puntos a recortar desde la parte superior.
+        margen_inferior (int): Altura en puntos a recortar desde la parte inferior.
+    """
+
+    def __init__(self, pdf_path, margen_superior=60, margen_inferior=60):
+        self.ruta = Path(pdf_path)
+        assert self.ruta.exists(), f"No existe: {self.ruta}"
+        self.margen_superior = margen_superior
+        self.margen_inferior = margen_inferior
+
+        self._pdf = pdfplumber.open(self.ruta)
+        self.paginas = self._pdf.pages
+        n = len(self.paginas)
+        self._texto = [None] * n
+        self._recortes = [None] * n
+        self._texto_recortado = [None] * n
+        self._palabras = [None] * n
+        self._tablas = [None] * n
+        self._capa_texto = [None] * n
+        self._pdfium = None
+        self._tablas_recortadas = {}
+        self._texto_secciones = None
+        self._indice_secciones = None
+        self.contadores = {"texto": 0, "texto_recortado": 0, "palabras": 0, "tablas": 0}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self.paginas)
+
+    def close(self):
+        self._pdf.close()
+        if self._pdfium is not None:
+            self._pdfium.close()
+
+    def texto_pagina(self, i):
+        """Texto completo de la página i (cadena vacía si no tiene texto)."""
+        if self._texto[i] is None:
+            self.contadores["texto"] += 1
+            self._texto[i] = self.paginas[i].extract_text() or ""
+        return self._texto[i]
+
+    def recorte(self, i):
+        """Página i recortada sin encabezado ni pie de página."""
+        if self._recortes[i] is None:
+            page = self.paginas[i]
+            area_util = (0, self.margen_inferior, page.width, page.height - self.margen_superior)
+            self._recortes[i] = page.within_bbox(area_util)
+        return self._recortes[i]
+
+    def texto_recortado(self, i):
+        """Texto de la página i sin encabezado ni pie de página."""
+        if self._texto_recortado[i] is None:
+            self.contadores["texto_recortado"] += 1
+            self._texto_recortado[i] = self.recorte(i).extract_text() or ""
+        return self._texto_recortado[i]
+
+    def palabras(self, i):
+        """Palabras de la página i con sus posiciones (extract_words con flujo de texto)."""
+        if self._palabras[i] is None:
+            self.contadores["palabras"] += 1
+            self._palabras[i] = self.paginas[i].extract_words(use_text_flow=True, keep_blank_chars=False)
+        return self._palabras[i]
+
+    def tablas(self, i):
+        """Tablas de la página i con más de una fila."""
+        if self._tablas[i] is None:
+            pagina = self.paginas[i]
+            # extract_tables usa por defecto la estrategia "lines": sin líneas no hay tablas
+            if not pagina.edges:
+                self._tablas[i] = []
+            else:
+                self.contadores["tablas"] += 1
+                self._tablas[i] = [tabla for tabla in pagina.extract_tables() if tabla and len(tabla) > 1]
+        return self._tablas[i]
+
+    def capa_texto(self, i):
+        """
+        Texto de la página i según pdfium, sin espacios y en minúsculas, junto con el índice
+        de cada carácter en la página (para obtener después su posición).
+        """
+        if self._capa_texto[i] is None:
+            if self._pdfium is None:
+                self._pdfium = pypdfium2.PdfDocument(str(self.ruta))
+            textpage = self._pdfium[i].get_textpage()
+            texto, indices = [], []
+            for indice, caracter in enumerate(textpage.get_text_range()):
+                if not caracter.isspace():
+                    for c in caracter.lower():
+                        texto.append(c)
+                        indices.append(indice)
+            textpage.close()
+            self._capa_texto[i] = ("".join(texto), indices)
+        return self._capa_texto[i]
+
+    def posicion_encabezados(self, i, encabezados):
+        """
+        Comprueba si la página i contiene todos los encabezados (sin distinguir mayúsculas
+        ni espacios) y devuelve la coordenada `top` (como en pdfplumber) de la primera
+        aparición de cualquiera de ellos, o None si falta alguno.
+        """
+        texto, indices = self.capa_texto(i)
+        apariciones = []
+        for encabezado in encabezados:
+            clave = "".join(encabezado.split()).lower()
+            inicio = texto.find(clave)
+            if inicio < 0:
+                return None
+            while inicio >= 0:
+                apariciones.append(indices[inicio])
+                inicio = texto.find(clave, inicio + 1)
+
+        pagina = self._pdfium[i]
+        textpage = pagina.get_textpage()
+        # pdfium mide desde abajo; el borde superior del carácter pasa a `top` de pdfplumber
+        alto = pagina.get_height()
+        top = min(alto - textpage.get_charbox(indice)[3] for indice in apariciones)
+        textpage.close()
+        return top
+
+    def tablas_desde(self, i, top):
+        """
+        Tablas de la página i con más de una fila situadas por debajo de `top`. La página se
+        recorta desde la línea horizontal inmediatamente superior a `top`, para no partir
+        la fila que contiene ese texto. Si las tablas de la página completa ya están en
+        caché se devuelven esas.
+        """
+        if self._tablas[i] is not None:
+            return self._tablas[i]
+        pagina = self.paginas[i]
+        corte = max((borde["top"] for borde in pagina.horizontal_edges if borde["top"] <= top), default=0) - 1
+        if corte <= 0:
+            return self.tablas(i)
+        clave = (i, round(corte, 1))
+        if clave not in self._tablas_recortadas:
+            self.contadores["tablas"] += 1
+            recorte = pagina.crop((0, corte, pagina.width, pagina.height))
+            self._tablas_recortadas[clave] = [tabla for tabla in recorte.extract_tables() if tabla and len(tabla) > 1]
+        return self._tablas_recortadas[clave]
+
+    def texto_limpio(self, desde=0):
+        """Texto recortado de todas las páginas a partir de la página `desde`."""
+        return "".join(texto + "\n" for texto in map(self.texto_recortado, range(desde, len(self))) if texto)
+
+    def texto_secciones(self):
+        """Texto limpio a partir de la tercera página, donde empiezan las secciones numeradas."""
+        if self._texto_secciones is None:
+            self._texto_secciones = self.texto_limpio(desde=2)
+        return self._texto_secciones
+
+    def indice_secciones(self):
+        """Índice de encabezados numerados del texto de secciones (se construye una vez)."""
+        if self._indice_secciones is None:
+            self._indice_secciones = IndiceSecciones(self.texto_secciones())
+        return self._indice_secciones
+
+
+@contextmanager
+def abrir_guia(entrada):
+    """
+    Devuelve la guía ya analizada si `entrada` es un ParsedGuide; si es una ruta,
+    abre el PDF y lo cierra al terminar.
+    """
+    if isinstance(entrada, ParsedGuide):
+        yield entrada
+    else:
+        with ParsedGuide(entrada) as guia:
+            yield guia
+
 def hasTargetHeaders(tabla, encabezados_objetivo):
     """
     Verifica si la primera fila de una tabla PDF contiene todos los encabezados esperados.
@@ -34,20 +228,18 @@ def hasTargetHeaders(tabla, encabezados_objetivo):
 def extract_asignatura(pdf_path:str, titulo_regex=r"1\.1\.\s*Datos\s+de\s+la\s+asignatura"):
     """
     Busca el título en la página, recorta el área bajo el título y extrae la primera tabla.
+    Acepta una ruta o un ParsedGuide ya abierto.
     Devuelve un DataFrame (una fila con todas las claves/valores).
     """
-    pdf_path = Path(pdf_path)
-    assert pdf_path.exists(), f"No existe: {pdf_path}"
-
-    with pdfplumber.open(pdf_path) as pdf:
-        for pnum, page in enumerate(pdf.pages, start=1):
+    with abrir_guia(pdf_path) as guia:
+        for pnum, page in enumerate(guia.paginas):
             # Detectar si el título está en esta página (texto normalizado)
-            text = page.extract_text() or ""
+            text = guia.texto_pagina(pnum)
             if not re.search(titulo_regex, text, flags=re.IGNORECASE):
                 continue
 
             # Obtener posición Y del título usando palabras (para recortar por debajo)
-            words = page.extract_words(use_text_flow=True, keep_blank_chars=False)
+            words = guia.palabras(pnum)
             # Normalizamos palabras
             tokens = [w["text"] for w in words]
             norm_tokens = [re.sub(r"\s+", " ", t.strip()) for t in tokens]
@@ -87,12 +279,14 @@ def extract_asignatura(pdf_path:str, titulo_regex=r"1\.1\.\s*Datos\s+de\s+la\s+a
 
             # Recortar área por debajo del título y extraer tablas
             region = page.crop((0, crop_top, page.width, page.height))
+            guia.contadores["tablas"] += 1
             tablas = region.extract_tables({
                 "vertical_strategy": "lines",
                 "horizontal_strategy": "lines",
                 "intersection_tolerance": 5,
             })
             if not tablas:
+                guia.contadores["tablas"] += 1
                 tablas = region.extract_tables({
                     "vertical_strategy": "text",
                     "horizontal_strategy": "text",
@@ -118,74 +312,96 @@ def extract_asignatura(pdf_path:str, titulo_regex=r"1\.1\.\s*Datos\s+de\s+la\s+a
                 if df.shape[1] == 2:
                     df = df.rename(columns={df.columns[0]: "clave", df.columns[1]: "valor"})
                     # Filas totalmente vacías fuera
-                    df = df.dropna(how="all").applymap(lambda x: x.strip() if isinstance(x, str) else x)
+                    df = df.dropna(how="all").map(lambda x: x.strip() if isinstance(x, str) else x)
                     # Convertir a DataFrame de una sola fila con todas las claves
                     kv = dict(zip(df["clave"], df["valor"]))
                     resultado = pd.DataFrame([kv])
                 else:
                     # Si viniera como más columnas, se deja tal cual
-                    resultado = df.applymap(lambda x: x.strip() if isinstance(x, str) else x)
+                    resultado = df.map(lambda x: x.strip() if isinstance(x, str) else x)
 
                 return resultado  # se ha encontrado la tabla
 
     raise ValueError("No se pudo localizar la tabla de '1.1. Datos de la asignatura' en el PDF.")
 
-def scrapBibliography(ruta, encabezados_objetivo):
+def buscarTablaCombinada(guia, encabezados_objetivo):
     """
-    Extrae una tabla específica desde un PDF que contiene los encabezados objetivo.
+    Localiza la primera tabla que contiene los encabezados objetivo y la combina con las
+    tablas que la continúan en las páginas siguientes.
+
+    Primero se extraen tablas solo de las páginas cuya capa de texto contiene todos los
+    encabezados (recortadas desde el primero de ellos) y de las páginas de continuación.
+    Si ninguna de esas páginas da la tabla (capa de texto ausente o distinta de la que lee
+    pdfplumber), se recorren las tablas completas de todas las páginas, como antes.
 
     Parámetros:
-        ruta (str): Ruta del archivo PDF.
+        guia (ParsedGuide): Guía ya analizada.
         encabezados_objetivo (set[str]): Encabezados que identifican la tabla buscada.
 
     Retorna:
-        pandas.DataFrame: Tabla encontrada, limpiada y combinada si se extiende en varias páginas.
+        list[list[str]] | None: Filas combinadas (la primera es el encabezado) o None si no existe.
     """
-    tablas_por_pagina = []
-
-    with pdfplumber.open(ruta) as pdf:
-        for pagina in pdf.pages:
-            tablas_pagina = []
-            for tabla in pagina.extract_tables():
-                if tabla and len(tabla) > 1:
-                    tablas_pagina.append(tabla)
-            tablas_por_pagina.append(tablas_pagina)
-
     tabla_encontrada = None
     indice_pagina = -1
     indice_tabla = -1
+    tablas_pagina = []
+
+    def indice_con_encabezados(tablas):
+        return next((j for j, tabla in enumerate(tablas) if hasTargetHeaders(tabla, encabezados_objetivo)), None)
+
+    for i in range(len(guia)):
+        top = guia.posicion_encabezados(i, encabezados_objetivo)
+        if top is None:
+            continue
+        tablas_pagina = guia.tablas_desde(i, top)
+        j = indice_con_encabezados(tablas_pagina)
+        if j is None:
+            # Si el recorte no contiene la tabla (posiciones que no cuadran entre pdfium y
+            # pdfplumber), se vuelve a buscar en la página completa
+            tablas_pagina = guia.tablas(i)
+            j = indice_con_encabezados(tablas_pagina)
+        if j is not None:
+            tabla_encontrada = tablas_pagina[j]
+            indice_pagina = i
+            indice_tabla = j
+            break
 
-    for i, tablas_pag in enumerate(tablas_por_pagina):
-        for j, tabla in enumerate(tablas_pag):
-            if hasTargetHeaders(tabla, encabezados_objetivo):
-                tabla_encontrada = tabla
+    if not tabla_encontrada:
+        # Ninguna página candidata contiene la tabla: se recorren todas las páginas
+        for i in range(len(guia)):
+            tablas_pagina = guia.tablas(i)
+            j = indice_con_encabezados(tablas_pagina)
+            if j is not None:
+                tabla_encontrada = tablas_pagina[j]
                 indice_pagina = i
                 indice_tabla = j
                 break
-        if tabla_encontrada:
-            break
-    
+
     if not tabla_encontrada:
-        return pd.DataFrame()  
+        return None
 
+    # Combinar con tablas de páginas siguientes si es necesario
     filas_combinadas = list(tabla_encontrada)
     pagina_actual = indice_pagina
 
     while True:
-        tablas_pag_actual = tablas_por_pagina[pagina_actual]
-
-        if indice_tabla != len(tablas_pag_actual) - 1:
+        # Verificar si la tabla actual es la última de la página (en la página de la tabla
+        # encontrada, entre las tablas del recorte)
+        tablas_actual = tablas_pagina if pagina_actual == indice_pagina else guia.tablas(pagina_actual)
+        if indice_tabla != len(tablas_actual) - 1:
             break
 
-        if pagina_actual + 1 >= len(tablas_por_pagina):
+        # Verificar si hay una página siguiente
+        if pagina_actual + 1 >= len(guia):
             break
 
-        tablas_pag_siguiente = tablas_por_pagina[pagina_actual + 1]
+        # Verificar si la página siguiente tiene tablas
+        tablas_pag_siguiente = guia.tablas(pagina_actual + 1)
         if not tablas_pag_siguiente:
             break
 
+        # Si la primera tabla de la siguiente página tiene encabezados, es otra tabla
         primera_tabla_siguiente = tablas_pag_siguiente[0]
-
         if hasTargetHeaders(primera_tabla_siguiente, encabezados_objetivo):
             break
 
@@ -193,6 +409,25 @@ def scrapBibliography(ruta, encabezados_objetivo):
         pagina_actual += 1
         indice_tabla = 0
 
+    return filas_combinadas
+
+def scrapBibliography(ruta, encabezados_objetivo):
+    """
+    Extrae una tabla específica desde un PDF que contiene los encabezados objetivo.
+
+    Parámetros:
+        ruta (str | ParsedGuide): Ruta del archivo PDF o guía ya analizada.
+        encabezados_objetivo (set[str]): Encabezados que identifican la tabla buscada.
+
+    Retorna:
+        pandas.DataFrame: Tabla encontrada, limpiada y combinada si se extiende en varias páginas.
+    """
+    with abrir_guia(ruta) as guia:
+        filas_combinadas = buscarTablaCombinada(guia, encabezados_objetivo)
+
+    if not filas_combinadas:
+        return pd.DataFrame()  
+
     df = pd.DataFrame(filas_combinadas[1:], columns=filas_combinadas[0])
 
     df = df[~df["Nombre"].str.contains(r"^https?://", na=False)]
@@ -203,49 +438,38 @@ def scrapBibliography(ruta, encabezados_objetivo):
 
     return df
 
-def scrapGoogleScholar(name):
+# Cabeceras de navegador entre las que se elige al consultar Google Scholar
+CABECERAS_SCHOLAR = [
+        {
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                        "(KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
+            "Accept-Language": "es-ES,es;q=0.9,en;q=0.8",
+            "Accept-Encoding": "gzip, deflate, br",
+        },
+        {
+            "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+                        "AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.0 Safari/605.1.15",
+            "Accept-Language": "en-US,en;q=0.9,es;q=0.8",
+        },
+        {
+            "User-Agent": "Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:118.0) "
+                        "Gecko/20100101 Firefox/118.0",
+            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+        },
+        {
+            "User-Agent": "Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X) "
+                        "AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.0 Mobile/15E148 Safari/604.1",
+        },
+]
+
+def parsear_resultado_scholar(html):
     """
-    Busca un autor o título en Google Scholar y devuelve información básica del primer resultado.
-
-    Parámetros:
-        name (str): Nombre del autor o texto a buscar.
+    Extrae título, autores y enlace del primer resultado de una página de Google Scholar.
 
     Retorna:
-        dict: Contiene título, autores y enlace del primer resultado encontrado.
+        dict: {"Titulo", "Autores", "Enlace"} o diccionario vacío si no hay resultados.
     """
-    url = f"https://scholar.google.com/scholar?q={quote(name)}"
-
-    headers_list = [
-            {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
-                            "(KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
-                "Accept-Language": "es-ES,es;q=0.9,en;q=0.8",
-                "Accept-Encoding": "gzip, deflate, br",
-            },
-            {
-                "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
-                            "AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.0 Safari/605.1.15",
-                "Accept-Language": "en-US,en;q=0.9,es;q=0.8",
-            },
-            {
-                "User-Agent": "Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:118.0) "
-                            "Gecko/20100101 Firefox/118.0",
-                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-            },
-            {
-                "User-Agent": "Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X) "
-                            "AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.0 Mobile/15E148 Safari/604.1",
-            },
-    ]
-
-    headers = random.choice(headers_list)
-
-    respuesta = requests.get(url, headers=headers)
-
-    if respuesta.status_code != 200:
-        raise Exception(f"Error al acceder a Google Scholar: {respuesta.status_code}")
-
-    soup = BeautifulSoup(respuesta.text, "html.parser")
+    soup = BeautifulSoup(html, "html.parser")
     resultado = {}
     item = soup.select_one(".gs_r.gs_or.gs_scl")
 
@@ -267,104 +491,69 @@ def scrapGoogleScholar(name):
 
     return resultado
 
-def extraer_texto_limpio(ruta_pdf, margen_superior=60, margen_inferior=60):
+def scrapGoogleScholar(name, base_url="https://scholar.google.com"):
+    """
+    Busca un autor o título en Google Scholar y devuelve información básica del primer resultado.
+
+    Parámetros:
+        name (str): Nombre del autor o texto a buscar.
+        base_url (str): URL base de Google Scholar (o de un servidor local equivalente).
+
+    Retorna:
+        dict: Contiene título, autores y enlace del primer resultado encontrado.
+    """
+    url = f"{base_url}/scholar?q={quote(name)}"
+
+    headers = random.choice(CABECERAS_SCHOLAR)
+
+    respuesta = requests.get(url, headers=headers)
+
+    if respuesta.status_code != 200:
+        raise Exception(f"Error al acceder a Google Scholar: {respuesta.status_code}")
+
+    return parsear_resultado_scholar(respuesta.text)
+
+def extraer_texto_limpio(ruta_pdf, margen_superior=None, margen_inferior=None):
     """
     Extrae el texto completo de un PDF eliminando encabezados y pies de página, recortando por posición física en el PDF.
     Devuelve también las páginas recortadas como objetos pdfplumber.Page.
 
     Parámetros:
-        ruta_pdf (str): Ruta del archivo PDF.
-        margen_superior (int): Altura en puntos a recortar desde la parte superior.
-        margen_inferior (int): Altura en puntos a recortar desde la parte inferior.
+        ruta_pdf (str | ParsedGuide): Ruta del archivo PDF o guía ya analizada.
+        margen_superior (int | None): Altura en puntos a recortar desde la parte superior
+            (por defecto, la de la guía; 60 si se pasa una ruta).
+        margen_inferior (int | None): Altura en puntos a recortar desde la parte inferior
+            (por defecto, la de la guía; 60 si se pasa una ruta).
 
     Devuelve:
         tuple[str, list]: Texto limpio y lista de páginas recortadas (pdfplumber.Page)
     """
-    texto_limpio = ""
-    paginas_recortadas = []
+    if not isinstance(ruta_pdf, ParsedGuide):
+        superior = 60 if margen_superior is None else margen_superior
+        inferior = 60 if margen_inferior is None else margen_inferior
+        with ParsedGuide(ruta_pdf, superior, inferior) as guia:
+            return guia.texto_limpio(), [guia.recorte(i) for i in range(len(guia))]
 
-    with pdfplumber.open(ruta_pdf) as pdf:
-        for page in pdf.pages:
-            y0, y1 = margen_inferior, page.height - margen_superior
-            area_util = (0, y0, page.width, y1)
-            recorte = page.within_bbox(area_util)
-            paginas_recortadas.append(recorte)
-            texto = recorte.extract_text()
-            if texto:
-                texto_limpio += texto + "\n"
+    guia = ruta_pdf
+    superior = guia.margen_superior if margen_superior is None else margen_superior
+    inferior = guia.margen_inferior if margen_inferior is None else margen_inferior
+    if (superior, inferior) == (guia.margen_superior, guia.margen_inferior):
+        return guia.texto_limpio(), [guia.recorte(i) for i in range(len(guia))]
 
-    return texto_limpio, paginas_recortadas
+    # Márgenes distintos de los de la guía: se recortan las páginas aquí, sin usar su caché
+    recortes = [page.within_bbox((0, inferior, page.width, page.height - superior)) for page in guia.paginas]
+    textos = (recorte.extract_text() or "" for recorte in recortes)
+    return "".join(texto + "\n" for texto in textos if texto), recortes
 
 
 def scrapProfesores(ruta, encabezados_objetivo):
-    # Extraer tablas por página
-    tablas_por_pagina = []
-    
-    with pdfplumber.open(ruta) as pdf:
-        for pagina in pdf.pages:
-            tablas_pagina = []
-            for tabla in pagina.extract_tables():
-                if tabla and len(tabla) > 1:  
-                    tablas_pagina.append(tabla)
-            tablas_por_pagina.append(tablas_pagina)
-
-    # Buscar la tabla con los encabezados objetivo
-    tabla_encontrada = None
-    indice_pagina = -1
-    indice_tabla = -1
+    # Buscar la tabla con los encabezados objetivo (combinada entre páginas)
+    with abrir_guia(ruta) as guia:
+        filas_combinadas = buscarTablaCombinada(guia, encabezados_objetivo)
 
-    for i, tablas_pag in enumerate(tablas_por_pagina):
-        for j, tabla in enumerate(tablas_pag):
-            if hasTargetHeaders(tabla, encabezados_objetivo):
-                tabla_encontrada = tabla
-                indice_pagina = i
-                indice_tabla = j
-                break
-        if tabla_encontrada:
-            break
-
-    if not tabla_encontrada:
+    if not filas_combinadas:
         return pd.DataFrame()
 
-    # Combinar con tablas de páginas siguientes si es necesario
-    filas_combinadas = list(tabla_encontrada)
-    pagina_actual = indice_pagina
-
-    while True:
-        tablas_pag_actual = tablas_por_pagina[pagina_actual]
-        
-        # Verificar si la tabla actual es la última de la página
-        if indice_tabla != len(tablas_pag_actual) - 1:
-            # No es la última tabla de la página, terminar
-            break
-        
-        # Verificar si hay una página siguiente
-        if pagina_actual + 1 >= len(tablas_por_pagina):
-            # No hay más páginas, terminar
-            break
-        
-        # Verificar si la página siguiente tiene tablas
-        tablas_pag_siguiente = tablas_por_pagina[pagina_actual + 1]
-        if not tablas_pag_siguiente:
-            # No hay tablas en la siguiente página, terminar
-            break
-        
-        # Obtener la primera tabla de la página siguiente
-        primera_tabla_siguiente = tablas_pag_siguiente[0]
-        
-        # Verificar si la primera tabla de la siguiente página tiene encabezados
-        if hasTargetHeaders(primera_tabla_siguiente, encabezados_objetivo):
-            # Tiene encabezados, no combinar
-            break
-        
-        # Combinar: agregar las filas de la primera tabla de la siguiente página
-        # (sin incluir la primera fila si parece un encabezado)
-        filas_combinadas.extend(primera_tabla_siguiente)
-        
-        # Actualizar para la siguiente iteración
-        pagina_actual += 1
-        indice_tabla = 0
-
     # Crear DataFrame con las filas combinadas
     df = pd.DataFrame(filas_combinadas[1:], columns=filas_combinadas[0])
     df["Nombre"] = df["Nombre"].str.split("\n").str[0]
@@ -372,85 +561,117 @@ def scrapProfesores(ruta, encabezados_objetivo):
     
     return df[["Nombre", "Correo electrónico"]] 
 
-def extraer_seccion(ruta_pdf, titulo=None, inicio=None, fin=None):
+@lru_cache(maxsize=None)
+def _patron_titulo_seccion(titulo):
+    return re.compile(rf"{re.escape(titulo)}\b", flags=re.IGNORECASE)
+
+
+class IndiceSecciones:
     """
-    Extrae una sección genérica de una guía en PDF usando pdfplumber.
+    Índice de los encabezados numerados ("N." y "N.M.") de un texto, construido en una
+    sola pasada. Localizar una sección recorre solo los encabezados y extraerla es un
+    corte del texto, en lugar de volver a buscar con expresiones regulares en todo él.
 
-    Devuelve únicamente la sección delimitada por título, inicio y fin.
-    Si no encuentra algún límite, devuelve cadena vacía.
+    Parámetros:
+        texto (str): Texto limpio de la guía.
     """
-    _, paginas_recortadas = extraer_texto_limpio(ruta_pdf)
-
-    texto_a_buscar = ""
-    for page in paginas_recortadas[2:]:
-        texto = page.extract_text()
-        if texto:
-            texto_a_buscar += texto + "\n"
-
-    def patron_dinamico(texto, es_subtitulo=False):
-        if not texto:
-            return None
-        if es_subtitulo:
-            return rf"\b\d+\.\d+\.\s*{re.escape(texto)}\b"
-        else:
-            return rf"\b\d+\.\s*{re.escape(texto)}\b"
-
-    patron_titulo = patron_dinamico(titulo)
-    patron_inicio = patron_dinamico(inicio, es_subtitulo=True)
-    patron_fin = patron_dinamico(fin, es_subtitulo=True)
-
-    # Paso 1: localizar el título principal
-    if patron_titulo:
-        match_titulo = re.search(patron_titulo, texto_a_buscar, flags=re.IGNORECASE)
-        if not match_titulo:
-            return ""  # No encontró el título
-        texto_post_titulo = texto_a_buscar[match_titulo.end():]
-    else:
-        texto_post_titulo = texto_a_buscar
 
-    # Paso 2: buscar inicio y fin dentro del texto posterior al título
-    if patron_inicio:
-        match_inicio = re.search(patron_inicio, texto_post_titulo, flags=re.IGNORECASE)
-        if not match_inicio:
+    _PATRON_ENCABEZADO = re.compile(r"\b(\d+)\.(?:(\d+)\.)?\s*")
+
+    def __init__(self, texto):
+        self.texto = texto
+        # (inicio, inicio del segundo número o None, fin del prefijo numérico)
+        self.encabezados = [
+            (m.start(), m.start(2) if m.group(2) else None, m.end())
+            for m in self._PATRON_ENCABEZADO.finditer(texto)
+        ]
+        self._inicios = [e[0] for e in self.encabezados]
+
+    def buscar(self, titulo, desde=0, subtitulo=False):
+        """
+        Localiza el primer encabezado "N. titulo" (o "N.M. titulo" si `subtitulo`) que
+        empieza en `desde` o después.
+
+        Retorna:
+            tuple[int, int] | None: Posición de inicio del encabezado y posición tras el título.
+        """
+        patron = _patron_titulo_seccion(titulo)
+        for inicio, inicio_segundo, fin_prefijo in self.encabezados[bisect_left(self._inicios, desde):]:
+            if subtitulo and inicio_segundo is None:
+                continue
+            m = patron.match(self.texto, fin_prefijo)
+            if m:
+                # Un título de primer nivel también casa con el segundo número de "N.M."
+                if not subtitulo and inicio_segundo is not None:
+                    inicio = inicio_segundo
+                return inicio, m.end()
+        return None
+
+    def seccion(self, titulo=None, inicio=None, fin=None):
+        """
+        Devuelve el texto entre los subtítulos `inicio` y `fin` dentro de la sección `titulo`.
+        Si no encuentra algún límite, devuelve cadena vacía.
+        """
+        # Paso 1: localizar el título principal
+        desde = 0
+        if titulo:
+            match_titulo = self.buscar(titulo)
+            if not match_titulo:
+                return ""  # No encontró el título
+            desde = match_titulo[1]
+
+        # Paso 2: buscar inicio y fin a partir del título
+        match_inicio = self.buscar(inicio, desde, subtitulo=True) if inicio else None
+        if inicio and not match_inicio:
             return ""  # No encontró el inicio
-    else:
-        match_inicio = None
-
-    if patron_fin:
-        match_fin = re.search(patron_fin, texto_post_titulo, flags=re.IGNORECASE)
-        if not match_fin:
+        match_fin = self.buscar(fin, desde, subtitulo=True) if fin else None
+        if fin and not match_fin:
             return ""  # No encontró el fin
-    else:
-        match_fin = None
-
-    # Extraer según los matches encontrados
-    if match_inicio and match_fin:
-        texto_extraido = texto_post_titulo[match_inicio.end():match_fin.start()]
-    elif match_inicio and not match_fin:
-        texto_extraido = texto_post_titulo[match_inicio.end():]
-    elif not match_inicio and match_fin:
-        texto_extraido = texto_post_titulo[:match_fin.start()]
-    else:
-        # Si no hay inicio ni fin, devolvemos vacío
-        return ""
 
-    return texto_extraido.strip()
+        # Extraer según los matches encontrados
+        if match_inicio and match_fin:
+            texto_extraido = self.texto[match_inicio[1]:max(match_fin[0], match_inicio[1])]
+        elif match_inicio and not match_fin:
+            texto_extraido = self.texto[match_inicio[1]:]
+        elif not match_inicio and match_fin:
+            texto_extraido = self.texto[desde:match_fin[0]]
+        else:
+            # Si no hay inicio ni fin, devolvemos vacío
+            return ""
+
+        return texto_extraido.strip()
+
+
+def extraer_seccion(ruta_pdf, titulo=None, inicio=None, fin=None):
+    """
+    Extrae una sección genérica de una guía en PDF usando pdfplumber.
+
+    Devuelve únicamente la sección delimitada por título, inicio y fin.
+    Si no encuentra algún límite, devuelve cadena vacía.
+    Acepta una ruta o un ParsedGuide, cuyo índice de secciones se reutiliza entre llamadas.
+    """
+    with abrir_guia(ruta_pdf) as guia:
+        return guia.indice_secciones().seccion(titulo, inicio, fin)
 
 
 ## Descripción de la asignatura
-def extraer_descripcion_asignatura(ruta_pdf, model):
-    descripcion_texto = extraer_seccion(
+def extraer_texto_descripcion(ruta_pdf):
+    """Texto de la sección 'Descripción de la asignatura'."""
+    return extraer_seccion(
         ruta_pdf,
         titulo="Descripción de la asignatura y temario",
         inicio="Descripción de la asignatura",
         fin="Temario de la asignatura"
     )
 
-    vector = model.encode(descripcion_texto).tolist()
-
-    return descripcion_texto, vector
+def extraer_texto_competencias(entrada):
+    """
+    Competencias de la guía sin vectorizar.
 
-def extraer_competencias(entrada, model):
+    Retorna:
+        tuple[list[dict], str]: Competencias ({codigo, texto}) y texto a vectorizar
+        (cadena vacía si la sección no tiene contenido).
+    """
     texto_competencias = extraer_seccion(
         entrada,
         titulo="Competencias y resultados de aprendizaje",
@@ -468,25 +689,17 @@ def extraer_competencias(entrada, model):
             "codigo": codigo.strip(),
             "texto": texto_competencia,
         })
-    if textos:
-        vector = model.encode(" ".join(textos)).tolist()
-    else:
-        vector = []
 
-    return competencias, vector
+    return competencias, " ".join(textos)
 
-def extraer_conocimientos_previos(pdf_path, model):
+def extraer_texto_conocimientos_previos(pdf_path):
+    """Texto de la sección 'Conocimientos previos recomendados'."""
     extraido = extraer_seccion(pdf_path, titulo="Conocimientos previos recomendados", inicio="Asignaturas previas que se recomienda haber cursado", fin="Competencias")
     conocimientos_previos = ""
     for line in extraido.splitlines():
         if not "Competencias y resultados de aprendizaje" in line:
             conocimientos_previos += line + "\n"
-    conocimientos_previos = conocimientos_previos.strip()
-
-    vector = model.encode(conocimientos_previos).tolist()
-
-    return conocimientos_previos, vector
-
+    return conocimientos_previos.strip()
 
 def extraer_temario_asignatura(ruta_pdf):
     """
@@ -540,42 +753,26 @@ def estructurar_temario(temario_texto):
 
     return estructura
 
-def bulk_index_data(es, data, index_name):
-    batch_size = 50  
-    for i in range(0, len(data), batch_size):
-        batch = data[i:i+batch_size]
-        actions = []
-        for doc in batch:
-            actions.append({
-                "_index": index_name,
-                "_id": doc['id_asignatura'],
-                "_source": doc
-            })
-        resp = bulk(es, actions, raise_on_error=True)
-        print("Indexed:", resp[0], "Errors:", resp[1])
-    
-def uri(base, tipo, id):
-    return URIRef(f"{base}{tipo}/{id}")
-
-def escape_rdf_literal(text):
-    if text is None:
-        return ""
-    return text.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
-
-def doc_to_triples(doc):
-    subj = f"<http://upm.es/ontology/asignatura/{doc['id_asignatura']}>"
-    triples = []
-
-    triples.append(f'{subj} <http://upm.es/ontology/descripcion> "{escape_rdf_literal(doc.get("descripcion_asignatura",""))}" .')
-    triples.append(f'{subj} <http://upm.es/ontology/conocimientosPrevios> "{escape_rdf_literal(doc.get("conocimientos_previos",""))}" .')
+def bulk_delete_data(es, ids, index_name):
+    """Borra del índice los documentos con los ids indicados (ignora los que no existen)."""
+    actions = [{"_op_type": "delete", "_index": index_name, "_id": id} for id in ids]
+    if actions:
+        resp = bulk(es, actions, raise_on_error=False)
+        print("Deleted:", resp[0])
 
-    for comp in doc.get("competencias", []):
-        triples.append(f'{subj} <http://upm.es/ontology/competencia> "{escape_rdf_literal(comp.get("texto",""))}" .')
-        triples.append(f'{subj} <http://upm.es/ontology/codigoCompetencia> "{escape_rdf_literal(comp.get("codigo",""))}" .')
-
-    for tema in doc.get("temario", []):
-        triples.append(f'{subj} <http://upm.es/ontology/tema> "{escape_rdf_literal(tema.get("titulo",""))}" .')
-        for sub in tema.get("subtemas", []):
-            triples.append(f'{subj} <http://upm.es/ontology/subtema> "{escape_rdf_literal(sub.get("titulo",""))}" .')
-
-    return triples
\ No newline at end of file
+def borrar_triples_asignaturas(endpoint, ids_asignaturas, base="http://upm.es/ontology/"):
+    """
+    Borra de GraphDB las tripletas cuyo sujeto u objeto es alguna de las asignaturas indicadas,
+    para poder volver a insertar las de las guías modificadas sin dejar valores obsoletos.
+    """
+    operaciones = []
+    for id in ids_asignaturas:
+        for tipo in ("Asignatura", "asignatura"):
+            recurso = f"<{base}{tipo}/{id}>"
+            operaciones.append(f"DELETE WHERE {{ {recurso} ?p ?o }}")
+            operaciones.append(f"DELETE WHERE {{ ?s ?p {recurso} }}")
+    if not operaciones:
+        return
+    r = requests.post(endpoint, data={"update": " ;\n".join(operaciones)})
+    if r.status_code != 204:
+        print("Error borrando tripletas:", r.status_code, r.text)